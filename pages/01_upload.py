@@ -1,10 +1,13 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import io
-import os
-from utils.processamento import carregar_dados, calcular_resultados_dimensoes
-from utils.constantes import DIMENSOES_HSE, DESCRICOES_DIMENSOES
+from utils.processamento import (
+    carregar_conjunto, calcular_resultados, mostrar_progresso_precomputacao, registrar_conjunto_sessao,
+    carregar_conjunto_arquivos, empresa_da_sessao, persistir_analise, reabrir_analise, instrumentar_pagina
+)
+from utils.qualidade import tabela_perguntas, MINIMO_LINHA_RETA
+from utils.precomputacao import iniciar_precomputacao
+from utils.pontuacao import classificar_riscos
+from utils.constantes import DIMENSOES_HSE, DESCRICOES_DIMENSOES, TAMANHO_MAXIMO_UPLOAD_MB
 
 # Aplicar estilo consistente da Escutaris
 def aplicar_estilo_escutaris():
@@ -155,14 +158,21 @@ aplicar_estilo_escutaris()
 
 # Título da página
 st.title("Upload de Dados - HSE-IT")
+instrumentar_pagina("Upload")
 st.markdown("### Carregue seu arquivo de respostas do questionário HSE-IT para análise")
 
 # Descrição da página com instruções
 with st.expander("ℹ️ Instruções para upload", expanded=False):
-    st.markdown("""
+    st.markdown(f"""
     ### Formatos suportados:
     - **Excel (.xlsx, .xls)**: Planilha Excel com respostas individuais
     - **CSV (.csv)**: Arquivo CSV exportado do Google Forms ou outro sistema
+    - **ZIP (.zip)**: Vários arquivos Excel ou CSV compactados
+    
+    ### Vários arquivos:
+    Envie vários arquivos de uma vez (por exemplo, uma exportação por filial ou por onda de coleta) ou um ZIP com eles.
+    As perguntas são reconhecidas pelo número, mesmo que o texto do cabeçalho varie entre os arquivos, e a análise
+    ganha a característica demográfica "Arquivo de Origem" para comparar os arquivos entre si.
     
     ### Estrutura necessária:
     - As primeiras colunas devem conter informações demográficas (Setor, Cargo, etc.)
@@ -176,7 +186,7 @@ with st.expander("ℹ️ Instruções para upload", expanded=False):
     
     ### Verificações realizadas:
     - Formato do arquivo (.csv, .xlsx ou .xls)
-    - Tamanho do arquivo (máximo 10 MB)
+    - Tamanho do arquivo (máximo {TAMANHO_MAXIMO_UPLOAD_MB} MB)
     - Presença das perguntas do HSE-IT (espera-se pelo menos 30 das 35 perguntas)
     - Quantidade de dados ausentes (idealmente menos de 20%)
     - Intervalo dos valores (deve estar entre 1 e 5)
@@ -191,35 +201,76 @@ with st.expander("ℹ️ Instruções para upload", expanded=False):
 # Container para o upload
 with st.container():
     st.markdown('<div class="uploadbox">', unsafe_allow_html=True)
-    uploaded_file = st.file_uploader("Escolha um arquivo Excel ou CSV", type=["xlsx", "xls", "csv"])
-    st.caption("Tamanho máximo: 10 MB. Formatos aceitos: Excel (.xlsx, .xls) e CSV (.csv)")
+    arquivos_enviados = st.file_uploader(
+        "Escolha um ou mais arquivos Excel, CSV ou ZIP", type=["xlsx", "xls", "csv", "zip"], accept_multiple_files=True
+    )
+    st.caption(
+        f"Tamanho máximo: {TAMANHO_MAXIMO_UPLOAD_MB} MB no total. Formatos aceitos: Excel (.xlsx, .xls), CSV (.csv) "
+        "e ZIP com esses arquivos. Vários arquivos (ex: um por filial) são combinados em uma única análise."
+    )
     st.markdown('</div>', unsafe_allow_html=True)
 
-# Processar o arquivo quando enviado
-if uploaded_file is not None:
+# Processar os arquivos quando enviados
+if arquivos_enviados:
     try:
         # Informação de progresso
         with st.spinner("Carregando e processando dados..."):
-            # Verificar extensão do arquivo
-            extension = uploaded_file.name.split('.')[-1].lower()
-            if extension not in ['csv', 'xlsx', 'xls']:
-                st.error(f"Formato de arquivo não suportado: .{extension}. Por favor, use arquivos CSV ou Excel (XLSX/XLS).")
+            # Verificar extensão dos arquivos
+            extensoes = sorted({arquivo.name.split('.')[-1].lower() for arquivo in arquivos_enviados})
+            invalidas = [ext for ext in extensoes if ext not in ['csv', 'xlsx', 'xls', 'zip']]
+            if invalidas:
+                st.error(f"Formato de arquivo não suportado: .{invalidas[0]}. Por favor, use arquivos CSV, Excel (XLSX/XLS) ou ZIP.")
                 st.stop()
+            extension = ", .".join(extensoes)
             
-            # Verificar tamanho do arquivo (limite de 10MB)
-            file_size = len(uploaded_file.getvalue()) / (1024 * 1024)  # em MB
-            if file_size > 10:
-                st.error(f"O arquivo é muito grande ({file_size:.1f} MB). O tamanho máximo permitido é 10 MB.")
+            # Verificar tamanho dos arquivos sem copiar o conteúdo
+            file_size = sum(arquivo.size for arquivo in arquivos_enviados) / (1024 * 1024)  # em MB
+            if file_size > TAMANHO_MAXIMO_UPLOAD_MB:
+                st.error(f"O envio é muito grande ({file_size:.1f} MB). O tamanho máximo permitido é {TAMANHO_MAXIMO_UPLOAD_MB} MB.")
                 st.stop()
             
-            # Carregar dados
-            df, df_perguntas, colunas_filtro, colunas_perguntas = carregar_dados(uploaded_file)
+            # Carregar dados (a impressão digital do conjunto é calculada uma única vez aqui)
+            if len(arquivos_enviados) == 1 and extensoes != ["zip"]:
+                nome_analise = arquivos_enviados[0].name
+                
+                # Planilhas .xlsx são lidas em blocos de linhas, com o andamento da leitura
+                barra = st.progress(0.0, text="Lendo planilha...")
+                
+                def mostrar_linhas(lidas, total):
+                    if total:
+                        barra.progress(min(lidas / total, 1.0), text=f"{lidas} de {total} linhas lidas")
+                    else:
+                        barra.progress(0.0, text=f"{lidas} linhas lidas")
+                
+                conjunto = carregar_conjunto(arquivos_enviados[0], mostrar_linhas)
+                barra.empty()
+            else:
+                nomes = [arquivo.name for arquivo in arquivos_enviados]
+                nome_analise = nomes[0] if len(nomes) == 1 else f"{len(nomes)} arquivos ({', '.join(nomes)})"
+                
+                # Arquivos lidos em paralelo e combinados com a coluna do arquivo de origem
+                barra = st.progress(0.0, text="Lendo arquivos...")
+                
+                def mostrar_leitura(concluidos, total, nome):
+                    barra.progress(concluidos / total, text=f"{concluidos} de {total} arquivos lidos (último: {nome})")
+                
+                conjunto, erros_arquivos = carregar_conjunto_arquivos(arquivos_enviados, mostrar_leitura)
+                barra.empty()
+                for nome, erro in erros_arquivos:
+                    st.warning(f"O arquivo {nome} foi ignorado: {erro}")
             
             # Verificar se os dados foram carregados corretamente
-            if df is None or len(df) == 0:
+            if conjunto is None or conjunto["num_respostas"] == 0:
                 st.error("Não foi possível carregar dados do arquivo. Verifique o formato e tente novamente.")
                 st.stop()
             
+            df = conjunto["df"]
+            colunas_filtro = conjunto["colunas_filtro"]
+            colunas_perguntas = conjunto["colunas_perguntas"]
+            
+            # Relatório de qualidade calculado uma única vez ao montar o conjunto
+            qualidade = conjunto["qualidade"]
+            
             # Contagens e estatísticas básicas
             total_respostas = len(df)
             colunas_demograficas = [col for col in colunas_filtro if col != "Carimbo de data/hora"]
@@ -242,9 +293,7 @@ if uploaded_file is not None:
                 mensagens_validacao.append(f"Foram encontradas apenas {len(colunas_perguntas)} perguntas. O HSE-IT contém 35 perguntas.")
             
             # Verificar valores ausentes nas perguntas
-            valores_ausentes = df_perguntas.isna().sum().sum()
-            total_valores = df_perguntas.size
-            percentual_ausente = (valores_ausentes / total_valores) * 100 if total_valores > 0 else 0
+            percentual_ausente = qualidade["percentual_ausente"]
             
             if percentual_ausente > 30:  # Se mais de 30% dos dados estão ausentes
                 dados_validos = False
@@ -253,12 +302,15 @@ if uploaded_file is not None:
                 mensagens_aviso.append(f"Há {percentual_ausente:.1f}% de respostas ausentes. Os resultados podem ser afetados.")
             
             # Verificar se os valores estão no intervalo correto (1-5)
-            valores_min = df_perguntas.min().min()
-            valores_max = df_perguntas.max().max()
+            valores_min = qualidade["minimo"]
+            valores_max = qualidade["maximo"]
             
-            if pd.notna(valores_min) and pd.notna(valores_max):
-                if valores_min < 1 or valores_max > 5:
-                    mensagens_aviso.append(f"Foram encontrados valores fora do intervalo esperado (1-5): mínimo={valores_min}, máximo={valores_max}. Isso pode afetar os resultados.")
+            if qualidade["fora_faixa"] > 0:
+                mensagens_aviso.append(f"Foram encontrados {qualidade['fora_faixa']} valores fora do intervalo esperado (1-5): mínimo={valores_min:g}, máximo={valores_max:g}. Isso pode afetar os resultados.")
+            
+            # Verificar respondentes que marcaram a mesma resposta em todas as perguntas
+            if qualidade["linha_reta"] > 0:
+                mensagens_aviso.append(f"{qualidade['linha_reta']} respondente(s) marcaram a mesma resposta em todas as perguntas (pelo menos {MINIMO_LINHA_RETA} respondidas). Como o HSE-IT tem questões invertidas, essas respostas podem não refletir a percepção real.")
             
             # Adicionar alerta para empresas pequenas
             if total_respostas < 10:
@@ -277,25 +329,41 @@ if uploaded_file is not None:
             # Calcular resultados se os dados forem válidos
             if dados_validos:
                 # Calcular resultados para validação
-                resultados = calcular_resultados_dimensoes(df, df_perguntas, colunas_perguntas)
+                resultados = calcular_resultados(conjunto)
                 df_resultados = pd.DataFrame(resultados)
                 
                 # Gerar plano de ação baseado nos resultados
                 from utils.processamento import gerar_sugestoes_acoes
                 df_plano_acao = gerar_sugestoes_acoes(df_resultados)
                 
-                # Armazenar no session_state para acesso em outras páginas
-                st.session_state.df = df
-                st.session_state.df_perguntas = df_perguntas
-                st.session_state.colunas_filtro = colunas_filtro
-                st.session_state.colunas_perguntas = colunas_perguntas
+                # Armazenar no session_state para acesso em outras páginas: os dados ficam
+                # no registro compartilhado entre sessões e a sessão guarda apenas uma alça
+                conjunto = registrar_conjunto_sessao(conjunto)
+                
+                # Guardar a pesquisa da empresa no banco; se ela já tinha um plano editado, retomá-lo.
+                # Só quando o conjunto muda: nas demais execuções da página o plano da sessão
+                # pode ter edições que ainda não foram salvas
+                if st.session_state.get("impressao_persistida") != conjunto["impressao"]:
+                    pesquisa_id, plano_salvo = persistir_analise(conjunto, nome_analise, df_resultados)
+                    st.session_state.pesquisa_id = pesquisa_id
+                    st.session_state.impressao_persistida = conjunto["impressao"]
+                    st.session_state.pop("plano_padrao", None)
+                    if plano_salvo is not None:
+                        st.session_state.plano_editavel = plano_salvo
+                    else:
+                        st.session_state.pop("plano_editavel", None)
+                
                 st.session_state.df_resultados = df_resultados
                 st.session_state.df_plano_acao = df_plano_acao
                 st.session_state.filtro_opcao = "Empresa Toda"
                 st.session_state.filtro_valor = "Geral"
+                st.session_state.predicado = ()
                 st.session_state.DIMENSOES_HSE = DIMENSOES_HSE
                 st.session_state.DESCRICOES_DIMENSOES = DESCRICOES_DIMENSOES
                 
+                # Pré-calcular em segundo plano os resultados de cada coluna demográfica
+                iniciar_precomputacao(conjunto)
+                
                 # Mostrar informações do arquivo
                 st.markdown('<div class="success">', unsafe_allow_html=True)
                 st.success(f"✅ Arquivo carregado com sucesso! {total_respostas} respostas processadas.")
@@ -309,6 +377,10 @@ if uploaded_file is not None:
                     st.markdown(f"**Total de respostas:** {total_respostas}")
                     st.markdown(f"**Dados demográficos:** {', '.join(colunas_demograficas)}")
                     st.markdown(f"**Perguntas identificadas:** {len(colunas_perguntas)}/35")
+                    from utils.combinacao import COLUNA_ARQUIVO_ORIGEM
+                    if COLUNA_ARQUIVO_ORIGEM in colunas_filtro:
+                        por_arquivo = df[COLUNA_ARQUIVO_ORIGEM].value_counts(sort=False)
+                        st.markdown("**Arquivos combinados:** " + ", ".join(f"{nome} ({n})" for nome, n in por_arquivo.items()))
                     
                     # Lista de verificação de qualidade
                     st.markdown("### Verificações de qualidade:")
@@ -334,16 +406,48 @@ if uploaded_file is not None:
                     else:
                         checklist_html += f"<li class='checklist-item-warning'>Número muito pequeno de respostas ({total_respostas}), análise será simplificada</li>"
                     
-                    if pd.notna(valores_min) and pd.notna(valores_max) and valores_min >= 1 and valores_max <= 5:
+                    if qualidade["fora_faixa"] == 0:
                         checklist_html += f"<li>Valores dentro do intervalo esperado (1-5)</li>"
                     else:
-                        checklist_html += f"<li class='checklist-item-warning'>Valores fora do intervalo esperado (mín={valores_min}, máx={valores_max})</li>"
+                        checklist_html += f"<li class='checklist-item-warning'>Valores fora do intervalo esperado ({qualidade['fora_faixa']} valores; mín={valores_min:g}, máx={valores_max:g})</li>"
+                    
+                    if qualidade["linha_reta"] == 0:
+                        checklist_html += f"<li>Sem respostas em linha reta</li>"
+                    else:
+                        checklist_html += f"<li class='checklist-item-warning'>{qualidade['linha_reta']} respondente(s) com a mesma resposta em todas as perguntas</li>"
                     
                     checklist_html += "</ul>"
                     st.markdown(checklist_html, unsafe_allow_html=True)
+                    
+                    # Detalhes por pergunta e planilha de qualidade para download
+                    with st.expander("📋 Qualidade por pergunta"):
+                        st.dataframe(tabela_perguntas(qualidade), hide_index=True, use_container_width=True)
+                        
+                        if st.button("Gerar Planilha de Qualidade", use_container_width=True):
+                            from utils.relatorios import gerar_planilha_qualidade
+                            from utils.cache_relatorios import chave_relatorio, obter_relatorio
+                            
+                            chave = chave_relatorio("planilha_qualidade", conjunto["impressao"])
+                            planilha, _ = obter_relatorio(chave, lambda: gerar_planilha_qualidade(qualidade))
+                            st.session_state.planilha_qualidade = (conjunto["impressao"], planilha)
+                        
+                        impressao_planilha, planilha = st.session_state.get("planilha_qualidade", (None, None))
+                        if impressao_planilha == conjunto["impressao"]:
+                            st.download_button(
+                                label="Baixar Planilha de Qualidade",
+                                data=planilha,
+                                file_name="qualidade_respostas_hse_it.xlsx",
+                                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                                use_container_width=True
+                            )
                 
                 with col2:
                     st.subheader("Dimensões Avaliadas")
+                    # Cores de risco de todas as dimensões em uma única classificação
+                    cores_dimensoes = dict(zip(
+                        df_resultados["Dimensão"], classificar_riscos(df_resultados["Média"])["cor"]
+                    ))
+
                     # Mostrar resumo das dimensões encontradas
                     for dimensao, _ in DIMENSOES_HSE.items():
                         resultado_dimensao = df_resultados[df_resultados["Dimensão"] == dimensao]
@@ -351,12 +455,7 @@ if uploaded_file is not None:
                             media = resultado_dimensao.iloc[0]["Média"]
                             risco = resultado_dimensao.iloc[0]["Risco"]
                             
-                            # Obter a cor com base no nível de risco
-                            cor = "red" if "Muito Alto" in risco else \
-                                  "orange" if "Alto" in risco else \
-                                  "yellow" if "Moderado" in risco else \
-                                  "green" if "Baixo" in risco else \
-                                  "purple"
+                            cor = cores_dimensoes[dimensao]
                             
                             st.markdown(f"- **{dimensao}**: {media:.2f} - <span style='color:{cor};'>{risco}</span>", unsafe_allow_html=True)
                 
@@ -381,6 +480,10 @@ if uploaded_file is not None:
                 with col3:
                     if st.button("Gerar Relatórios", use_container_width=True):
                         st.switch_page("pages/04_relatorios.py")
+                
+                # Andamento do pré-cálculo das análises demográficas; a página não espera
+                # por ele, e as próximas execuções mostram o estado atualizado
+                mostrar_progresso_precomputacao(conjunto)
             else:
                 # Mostrar mensagens de validação se houver problemas
                 st.markdown('<div class="error">', unsafe_allow_html=True)
@@ -425,6 +528,56 @@ else:
     # Instruções quando não há arquivo carregado
     st.info("Carregue um arquivo para começar a análise. Se você não tem um arquivo com dados, visite a página 'Informações' para baixar um template.")
     
+    # Análises já enviadas pela empresa, guardadas no banco local
+    from utils.banco import listar_pesquisas
+    
+    empresa = empresa_da_sessao()
+    try:
+        pesquisas_salvas = listar_pesquisas(empresa) if empresa else []
+    except Exception as e:
+        print(f"Erro ao listar análises salvas: {str(e)}")
+        pesquisas_salvas = []
+    
+    if pesquisas_salvas:
+        with st.expander(f"📂 Análises salvas de {empresa}", expanded=True):
+            rotulos = {
+                pesquisa["id"]: f"{pesquisa['nome_arquivo']} · {pesquisa['num_respostas']} respostas · "
+                                f"{pd.to_datetime(pesquisa['criada_em']).strftime('%d/%m/%Y %H:%M')}"
+                                + (" · plano editado" if pesquisa["tem_plano"] else "")
+                for pesquisa in pesquisas_salvas
+            }
+            pesquisa_id = st.selectbox("Selecione uma análise", options=list(rotulos), format_func=rotulos.get)
+            
+            if st.button("Reabrir análise", use_container_width=True):
+                with st.spinner("Reabrindo análise..."):
+                    analise = reabrir_analise(pesquisa_id)
+                
+                if analise is None:
+                    st.error("Não foi possível reabrir a análise selecionada.")
+                else:
+                    conjunto, df_resultados, plano_salvo = analise
+                    
+                    # Mesmo estado de sessão de um upload
+                    from utils.processamento import gerar_sugestoes_acoes
+                    conjunto = registrar_conjunto_sessao(conjunto)
+                    st.session_state.pesquisa_id = pesquisa_id
+                    st.session_state.impressao_persistida = conjunto["impressao"]
+                    st.session_state.pop("plano_padrao", None)
+                    if plano_salvo is not None:
+                        st.session_state.plano_editavel = plano_salvo
+                    else:
+                        st.session_state.pop("plano_editavel", None)
+                    st.session_state.df_resultados = df_resultados
+                    st.session_state.df_plano_acao = gerar_sugestoes_acoes(df_resultados)
+                    st.session_state.filtro_opcao = "Empresa Toda"
+                    st.session_state.filtro_valor = "Geral"
+                    st.session_state.predicado = ()
+                    st.session_state.DIMENSOES_HSE = DIMENSOES_HSE
+                    st.session_state.DESCRICOES_DIMENSOES = DESCRICOES_DIMENSOES
+                    iniciar_precomputacao(conjunto)
+                    
+                    st.success(f"✅ Análise reaberta: {rotulos[pesquisa_id]}. Acesse as páginas de Resultados, Plano de Ação e Relatórios para continuar.")
+    
     # Mostrar progresso do fluxo de trabalho
     st.markdown("""
     <div class="info-box">
@@ -480,6 +633,8 @@ else:
         st.markdown("### Precisa de um modelo para começar?")
         
         if st.button("Baixar Modelo de Exemplo (CSV)"):
+            import numpy as np
+            
             # Criar um CSV de exemplo mais completo
             colunas_completas = ["Setor", "Cargo", "Tempo_Empresa", "Genero", "Faixa_Etaria", "Escolaridade", "Regime_Trabalho"]
             # Adicionar as 35 perguntas
@@ -1,10 +1,12 @@
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
+# O plotly é importado nas funções de gráficos: o título, os filtros e os avisos da
+# página aparecem antes de ele ser carregado
 import numpy as np
-from utils.processamento import classificar_risco
+from utils.processamento import classificar_risco, conjunto_da_sessao, instrumentar_pagina
+from utils.pontuacao import classificar_riscos
 from utils.constantes import DESCRICOES_DIMENSOES
+from utils.instrumentacao import cronometrar
 
 # Aplicar estilo consistente da Escutaris
 def aplicar_estilo_escutaris():
@@ -104,6 +106,7 @@ aplicar_estilo_escutaris()
 
 # Título da página
 st.title("Resultados da Avaliação HSE-IT")
+instrumentar_pagina("Resultados")
 
 # Verificar se há dados para exibir - CORRIGIDO: Uso seguro de session_state
 if "df_resultados" not in st.session_state or st.session_state.get("df_resultados") is None:
@@ -138,70 +141,64 @@ with st.sidebar:
     st.divider()
     
     # Adicionar filtros demográficos - CORRIGIDO: Verificação segura
-    df = st.session_state.get("df")
-    colunas_filtro = st.session_state.get("colunas_filtro")
+    # Conjunto de dados do upload, compartilhado entre sessões (a sessão guarda só a alça)
+    conjunto = conjunto_da_sessao()
     
-    if df is not None and colunas_filtro is not None:
+    if conjunto is not None:
         st.subheader("Filtrar Resultados")
         
-        # Criar seletores para cada coluna de filtro
-        filtro_selecionado = st.selectbox(
-            "Filtrar por:",
-            ["Empresa Toda"] + [col for col in colunas_filtro if col != "Carimbo de data/hora"]
-        )
-        
-        if filtro_selecionado != "Empresa Toda":
-            valores_filtro = df[filtro_selecionado].dropna().unique()
-            valor_selecionado = st.selectbox(f"Selecione {filtro_selecionado}:", valores_filtro)
+        if conjunto["colunas_filtro"]:
+            cubo = conjunto["cubo"]
+            
+            # Criar seletores para as colunas de filtro (combinadas com E)
+            colunas_selecionadas = st.multiselect(
+                "Filtrar por:",
+                cubo["colunas"],
+                help="Selecione uma ou mais características; as condições são combinadas"
+            )
             
-            if st.button("Aplicar Filtro"):
+            filtros = {}
+            for coluna in colunas_selecionadas:
+                filtros[coluna] = st.selectbox(f"Selecione {coluna}:", cubo["categorias"][coluna])
+            
+            if filtros and st.button("Aplicar Filtro"):
                 try:
-                    # Atualizar dados com base no filtro
-                    df_perguntas = st.session_state.get("df_perguntas")
-                    colunas_perguntas = st.session_state.get("colunas_perguntas")
+                    # Importar funções necessárias
+                    from utils.processamento import calcular_resultados
+                    from utils.conjunto import criar_predicado, descrever_predicado
+                    
+                    # Calcular novos resultados a partir dos agregados, com cache por (impressão, predicado)
+                    predicado = criar_predicado(filtros)
+                    resultados_filtrados = calcular_resultados(conjunto, predicado)
                     
-                    if None in [df_perguntas, colunas_perguntas]:
-                        st.error("Dados necessários para filtragem não estão disponíveis.")
+                    if resultados_filtrados:
+                        descricao_opcao, descricao_valor = descrever_predicado(predicado)
+                        st.session_state["predicado"] = predicado
+                        df_resultados = pd.DataFrame(resultados_filtrados)
+                        st.session_state["df_resultados_filtrados"] = df_resultados
+                        st.session_state["filtro_aplicado"] = True
+                        st.session_state["filtro_opcao"] = descricao_opcao
+                        st.session_state["filtro_valor"] = descricao_valor
+                        st.success(f"Filtro aplicado: {descricao_opcao} = {descricao_valor}")
+                        st.experimental_rerun()
                     else:
-                        indices_filtrados = df.index[df[filtro_selecionado] == valor_selecionado].tolist()
-                        df_perguntas_filtradas = df_perguntas.loc[indices_filtrados]
-                        
-                        # Importar função necessária
-                        from utils.processamento import calcular_resultados_dimensoes
-                        
-                        # Calcular novos resultados
-                        resultados_filtrados = calcular_resultados_dimensoes(
-                            df[df[filtro_selecionado] == valor_selecionado],
-                            df_perguntas_filtradas,
-                            colunas_perguntas
-                        )
-                        
-                        if resultados_filtrados:
-                            df_resultados = pd.DataFrame(resultados_filtrados)
-                            st.session_state["df_resultados_filtrados"] = df_resultados
-                            st.session_state["filtro_aplicado"] = True
-                            st.session_state["filtro_opcao"] = filtro_selecionado
-                            st.session_state["filtro_valor"] = valor_selecionado
-                            st.success(f"Filtro aplicado: {filtro_selecionado} = {valor_selecionado}")
-                            st.experimental_rerun()
+                        st.warning("Nenhuma resposta atende à combinação de filtros selecionada.")
                 except Exception as e:
                     st.error(f"Erro ao aplicar filtro: {str(e)}")
+        else:
+            st.error("Dados necessários para filtragem não estão disponíveis.")
         
         # Botão para limpar filtros
         if st.session_state.get("filtro_aplicado", False):
             if st.button("Limpar Filtros"):
-                if st.session_state.get("df_resultados_original") is not None:
-                    st.session_state["df_resultados"] = st.session_state["df_resultados_original"].copy()
-                    st.session_state["filtro_aplicado"] = False
-                    st.session_state["filtro_opcao"] = "Empresa Toda"
-                    st.session_state["filtro_valor"] = "Geral"
-                    if "df_resultados_filtrados" in st.session_state:
-                        del st.session_state["df_resultados_filtrados"]
-                    st.experimental_rerun()
-
-# Se for a primeira vez carregando a página, salvar os resultados originais
-if "df_resultados_original" not in st.session_state:
-    st.session_state["df_resultados_original"] = df_resultados.copy()
+                # df_resultados (empresa toda) não é alterado pelos filtros: basta descartar os filtrados
+                st.session_state["filtro_aplicado"] = False
+                st.session_state["filtro_opcao"] = "Empresa Toda"
+                st.session_state["filtro_valor"] = "Geral"
+                st.session_state["predicado"] = ()
+                if "df_resultados_filtrados" in st.session_state:
+                    del st.session_state["df_resultados_filtrados"]
+                st.experimental_rerun()
 
 # Se houver resultados filtrados, usar esses
 if st.session_state.get("filtro_aplicado", False) and st.session_state.get("df_resultados_filtrados") is not None:
@@ -277,18 +274,17 @@ def criar_dashboard(df_resultados, filtro_opcao, filtro_valor):
     return
 
 # Função para criar gráfico de barras usando Plotly
+@cronometrar("criar_grafico_barras")
 def criar_grafico_barras(df_resultados):
+    import plotly.graph_objects as go
+    
     # Ordenar resultados do menor para o maior (pior para melhor)
     df_sorted = df_resultados.sort_values(by="Média")
     
     # Preparar dados para o gráfico
-    cores = []
+    cores = list(classificar_riscos(df_sorted["Média"])["cor"])
     hover_texts = []
     
-    for media in df_sorted["Média"]:
-        _, cor = classificar_risco(media)
-        cores.append(cor)
-    
     for _, row in df_sorted.iterrows():
         # Acesso seguro para a descrição da dimensão
         descricao = row.get("Descrição", "Sem descrição disponível")
@@ -364,7 +360,10 @@ def criar_grafico_barras(df_resultados):
     return fig
 
 # Função para criar gráfico de radar
+@cronometrar("criar_grafico_radar")
 def criar_grafico_radar(df_resultados):
+    import plotly.graph_objects as go
+    
     # Preparar dados para o gráfico de radar
     categorias = df_resultados["Dimensão"].tolist()
     valores = df_resultados["Média"].tolist()
@@ -416,6 +415,8 @@ def criar_grafico_radar(df_resultados):
 
 # Função para mostrar detalhes por dimensão
 def mostrar_detalhes_dimensao(df_resultados):
+    import plotly.graph_objects as go
+    
     st.subheader("Detalhes por Dimensão")
     
     # Criar abas para cada dimensão
@@ -492,14 +493,17 @@ def mostrar_detalhes_dimensao(df_resultados):
                             
                         # Garantir que questoes é iterável
                         if questoes:
+                            # Mapeamento questão -> coluna resolvido uma vez por layout de cabeçalhos
+                            from utils.pontuacao import resolver_questoes
+                            conjunto = conjunto_da_sessao()
+                            colunas_perguntas = conjunto["colunas_perguntas"] if conjunto is not None else []
+                            indices = resolver_questoes(colunas_perguntas)["indices"]
+                            
                             for q in questoes:
                                 # Tentar buscar o texto da questão
                                 q_text = f"Questão {q}"
-                                colunas_perguntas = st.session_state.get("colunas_perguntas", [])
-                                for col in colunas_perguntas:
-                                    if str(col).strip().startswith(str(q)):
-                                        q_text = str(col).strip()
-                                        break
+                                if isinstance(q, (int, np.integer)) and 1 <= q <= len(indices) and indices[q - 1] >= 0:
+                                    q_text = str(colunas_perguntas[indices[q - 1]]).strip()
                                 st.markdown(f"- **{q}**: {q_text}")
                     st.markdown('</div>', unsafe_allow_html=True)
                 
@@ -528,12 +532,14 @@ def mostrar_detalhes_dimensao(df_resultados):
                 st.error(f"Erro ao mostrar detalhes da dimensão {dimensao}: {str(e)}")
 
 # Função para criar análise demográfica
-def criar_analise_demografica(df, df_perguntas, colunas_perguntas):
+def criar_analise_demografica(conjunto):
+    import plotly.graph_objects as go
+    
     st.subheader("Análise por Características Demográficas")
     st.write("Explore os resultados por diferentes características demográficas como setor, cargo, gênero, etc.")
     
     # Obter colunas demográficas disponíveis
-    demograficas = [col for col in st.session_state.get("colunas_filtro", []) if col != "Carimbo de data/hora"]
+    demograficas = [col for col in conjunto["colunas_filtro"] if col != "Carimbo de data/hora"]
     
     if not demograficas:
         st.warning("Não foram encontradas colunas demográficas nos dados.")
@@ -542,40 +548,26 @@ def criar_analise_demografica(df, df_perguntas, colunas_perguntas):
     # Seletor para a coluna demográfica
     col_demo = st.selectbox("Selecione uma característica para análise:", demograficas)
     
+    # Andamento do pré-cálculo iniciado no upload (colunas prontas não são recalculadas)
+    from utils.processamento import mostrar_progresso_precomputacao
+    mostrar_progresso_precomputacao(conjunto)
+    
     # Criar função para análise demográfica
-    def analisar_por_demografia(df, col_demo):
-        resultados = []
+    def analisar_por_demografia(conjunto, col_demo):
         try:
-            valores_unicos = df[col_demo].dropna().unique()
-            
-            for valor in valores_unicos:
-                if pd.notna(valor):
-                    df_filtrado = df[df[col_demo] == valor]
-                    indices_filtrados = df.index[df[col_demo] == valor].tolist()
-                    df_perguntas_filtradas = df_perguntas.loc[indices_filtrados]
-                    
-                    # Importar função necessária
-                    from utils.processamento import calcular_resultados_dimensoes
-                    
-                    # Calcular resultados para este filtro
-                    resultados_filtro = calcular_resultados_dimensoes(
-                        df_filtrado, 
-                        df_perguntas_filtradas, 
-                        colunas_perguntas
-                    )
-                    
-                    # Adicionar valor do filtro
-                    for res in resultados_filtro:
-                        res[col_demo] = valor
-                        resultados.append(res)
+            # Importar funções necessárias
+            from utils.processamento import calcular_resultados_por_coluna
+
+            # Todos os grupos da coluna em uma única redução agrupada, com cache por
+            # (impressão do conjunto, coluna)
+            return calcular_resultados_por_coluna(conjunto, col_demo)
         except Exception as e:
             st.error(f"Erro ao analisar dados por {col_demo}: {str(e)}")
-            
-        return pd.DataFrame(resultados) if resultados else None
+            return None
     
     # Obter e mostrar resultados
     with st.spinner(f"Analisando dados por {col_demo}..."):
-        df_demografico = analisar_por_demografia(df, col_demo)
+        df_demografico = analisar_por_demografia(conjunto, col_demo)
     
     if df_demografico is not None and not df_demografico.empty:  # CORRIGIDO: Verificação de DataFrame vazio
         # Verificar a quantidade de valores únicos para escolher a melhor visualização
@@ -589,24 +581,18 @@ def criar_analise_demografica(df, df_perguntas, colunas_perguntas):
             # Adicionar heatmap
             st.write("Clique em uma célula para ver os detalhes:")
             
-            # Aplicar formatação de cores
-            def color_scale(val):
-                if pd.isna(val):
-                    return ""
-                    
-                if val <= 1:
-                    return f'background-color: #FF6B6B; color: white'
-                elif val <= 2:
-                    return f'background-color: #FFA500'
-                elif val <= 3:
-                    return f'background-color: #FFFF00'
-                elif val <= 4:
-                    return f'background-color: #90EE90'
-                else:
-                    return f'background-color: #BB8FCE'
+            # Aplicar formatação de cores: a tabela inteira é classificada de uma vez
+            def color_scale(tabela):
+                riscos = classificar_riscos(tabela.to_numpy())
+                estilos = np.where(
+                    riscos["codigos"] >= 0,
+                    "background-color: " + riscos["cor_hex"] + "; color: " + riscos["cor_texto"],
+                    ""
+                )
+                return pd.DataFrame(estilos.reshape(tabela.shape), index=tabela.index, columns=tabela.columns)
             
             # Aplicar o estilo
-            df_styled = df_pivot.style.applymap(color_scale).format("{:.2f}")
+            df_styled = df_pivot.style.apply(color_scale, axis=None).format("{:.2f}")
             
             st.dataframe(df_styled)
             
@@ -751,12 +737,10 @@ try:
 
     elif view_mode == "Análise Demográfica":
         # CORREÇÃO: Verificação adequada dos dados demográficos
-        df = st.session_state.get("df")
-        df_perguntas = st.session_state.get("df_perguntas")
-        colunas_perguntas = st.session_state.get("colunas_perguntas")
+        conjunto = conjunto_da_sessao()
         
-        if None not in [df, df_perguntas, colunas_perguntas]:
-            criar_analise_demografica(df, df_perguntas, colunas_perguntas)
+        if conjunto is not None:
+            criar_analise_demografica(conjunto)
         else:
             st.error("Dados necessários para análise demográfica não estão disponíveis.")
         
@@ -1,10 +1,11 @@
 import streamlit as st
 import pandas as pd
 import io
-import plotly.graph_objects as go
-import plotly.express as px
 from datetime import datetime, timedelta
-from utils.processamento import classificar_risco, padronizar_formato_data
+from utils.processamento import classificar_risco, padronizar_formato_data, instrumentar_pagina
+from utils.constantes import NIVEIS_RISCO
+from utils.pontuacao import classificar_riscos
+from utils.banco import salvar_plano
 
 # Aplicar estilo consistente da Escutaris
 def aplicar_estilo_escutaris():
@@ -237,6 +238,7 @@ aplicar_estilo_escutaris()
 
 # Título da página
 st.title("Plano de Ação - HSE-IT")
+instrumentar_pagina("Plano de Ação")
 
 # Verificar se há dados para exibir - CORRIGIDO: Verificação segura
 if "df_resultados" not in st.session_state or st.session_state.get("df_resultados") is None:
@@ -272,7 +274,7 @@ except Exception as e:
     st.stop()
 
 # Definir níveis de risco para filtrar
-niveis_risco = ["Risco Muito Alto 🔴", "Risco Alto 🟠", "Risco Moderado 🟡", "Risco Baixo 🟢", "Risco Muito Baixo 🟣"]
+niveis_risco = [nivel["rotulo"] for nivel in NIVEIS_RISCO]
 
 # Definir filtros para o plano de ação
 col1, col2 = st.columns(2)
@@ -593,11 +595,18 @@ else:
     st.subheader("Plano de Ação - HSE-IT")
     
     # Inicializar ou recuperar o plano editável da sessão - CORRIGIDO: Uso seguro
+    # O plano gerado só substitui o da sessão enquanto este não tiver sido editado: um
+    # plano salvo no banco (reaberto no upload) ou com edições é mantido mesmo que os
+    # filtros mudem o número de linhas
+    plano_padrao = st.session_state.get("plano_padrao")
     if "plano_editavel" not in st.session_state:
         st.session_state["plano_editavel"] = df_plano.copy()
-    elif len(st.session_state.get("plano_editavel", pd.DataFrame())) != len(df_plano):
-        # Se os filtros mudaram e o tamanho mudou, atualizar o plano
+        st.session_state["plano_padrao"] = df_plano
+    elif (len(st.session_state["plano_editavel"]) != len(df_plano)
+          and plano_padrao is not None and st.session_state["plano_editavel"].equals(plano_padrao)):
+        # Se os filtros mudaram e o tamanho mudou, atualizar o plano ainda não editado
         st.session_state["plano_editavel"] = df_plano.copy()
+        st.session_state["plano_padrao"] = df_plano
     
     # Criar uma visualização editável do plano
     try:
@@ -678,28 +687,28 @@ else:
         )
         
         # Configuração para Prazo com verificação de compatibilidade
-if hasattr(st.column_config, "DateColumn"):
-    try:
-        prazo_config = st.column_config.DateColumn(
-            "Prazo",
-            help="Prazo para implementação das ações",
-            min_value=datetime.now().date(),
-            format="DD/MM/YYYY",
-            width="medium"
-        )
-    except:
-        # Fallback se houver erro com DateColumn
-        prazo_config = st.column_config.Column(
-            "Prazo",
-            help="Prazo para implementação das ações (formato: DD/MM/YYYY)",
-            width="medium"
-        )
-else:
-    # Fallback para versões sem DateColumn
-    prazo_config = st.column_config.Column(
-        "Prazo",
-        help="Prazo para implementação das ações (formato: DD/MM/YYYY)",
-        width="medium"
+        if hasattr(st.column_config, "DateColumn"):
+            try:
+                prazo_config = st.column_config.DateColumn(
+                    "Prazo",
+                    help="Prazo para implementação das ações",
+                    min_value=datetime.now().date(),
+                    format="DD/MM/YYYY",
+                    width="medium"
+                )
+            except:
+                # Fallback se houver erro com DateColumn
+                prazo_config = st.column_config.Column(
+                    "Prazo",
+                    help="Prazo para implementação das ações (formato: DD/MM/YYYY)",
+                    width="medium"
+                )
+        else:
+            # Fallback para versões sem DateColumn
+            prazo_config = st.column_config.Column(
+                "Prazo",
+                help="Prazo para implementação das ações (formato: DD/MM/YYYY)",
+                width="medium"
     )
         
         # Usar as configurações na definição do data_editor
@@ -720,8 +729,14 @@ else:
             hide_index=True
         )
         
-        # Atualizar o estado da sessão com as edições
+        # Atualizar o estado da sessão com as edições e guardá-las no banco quando mudarem
+        plano_anterior = st.session_state.get("plano_editavel")
         st.session_state["plano_editavel"] = edited_df
+        if st.session_state.get("pesquisa_id") and (plano_anterior is None or not edited_df.equals(plano_anterior)):
+            try:
+                salvar_plano(st.session_state["pesquisa_id"], edited_df)
+            except Exception as e:
+                st.warning(f"Não foi possível salvar o plano de ação: {str(e)}")
     except Exception as e:
         st.error(f"Erro ao exibir editor de dados: {str(e)}")
         st.info("Tente ajustar os filtros ou recarregar a página.")
@@ -786,14 +801,17 @@ else:
                     'border': 1
                 })
                 
-                # Formatos para níveis de risco
-                risco_formats = {
-                    'Risco Muito Alto 🔴': workbook.add_format({'bg_color': '#FF6B6B', 'bold': True, 'border': 1}),
-                    'Risco Alto 🟠': workbook.add_format({'bg_color': '#FFA500', 'bold': True, 'border': 1}),
-                    'Risco Moderado 🟡': workbook.add_format({'bg_color': '#FFFF00', 'border': 1}),
-                    'Risco Baixo 🟢': workbook.add_format({'bg_color': '#90EE90', 'border': 1}),
-                    'Risco Muito Baixo 🟣': workbook.add_format({'bg_color': '#B0E0E6', 'border': 1})
-                }
+                # Formatos para níveis de risco, na ordem de NIVEIS_RISCO (códigos de
+                # classificar_riscos); os dois níveis mais altos em negrito. A planilha
+                # do plano mantém sua paleta própria (Muito Baixo em azul claro)
+                cores_plano = ['#FF6B6B', '#FFA500', '#FFFF00', '#90EE90', '#B0E0E6']
+                risco_formats = [
+                    workbook.add_format({'bg_color': cor, 'bold': codigo < 2, 'border': 1})
+                    for codigo, cor in enumerate(cores_plano)
+                ]
+                
+                # Nível de risco de cada linha do plano a partir da média, de uma só vez
+                codigos_plano = classificar_riscos(pd.to_numeric(df["Média"], errors="coerce"))["codigos"] if "Média" in df.columns else []
                 
                 # Configurar largura das colunas
                 worksheet.set_column('A:A', 25)  # Dimensão
@@ -826,20 +844,9 @@ else:
                         worksheet.write(row_num, 0, dimensao, wrap_format)  # Dimensão
                         worksheet.write(row_num, 1, media, wrap_format)  # Média
                         
-                        # Aplicar formatos de nível de risco
-                        if nivel_risco in risco_formats:
-                            worksheet.write(row_num, 2, nivel_risco, risco_formats[nivel_risco])
-                        else:
-                            # Verificar correspondência parcial
-                            formato_encontrado = False
-                            for key, formato in risco_formats.items():
-                                if key.split()[0] in nivel_risco:
-                                    worksheet.write(row_num, 2, nivel_risco, formato)
-                                    formato_encontrado = True
-                                    break
-                            
-                            if not formato_encontrado:
-                                worksheet.write(row_num, 2, nivel_risco, wrap_format)
+                        # Aplicar formatos de nível de risco (linhas sem média ficam sem cor)
+                        codigo = codigos_plano[row_num - 1] if len(codigos_plano) else -1
+                        worksheet.write(row_num, 2, nivel_risco, risco_formats[codigo] if codigo >= 0 else wrap_format)
                         
                         worksheet.write(row_num, 3, riscos, wrap_format)  # Riscos Potenciais
                         worksheet.write(row_num, 4, sugestoes, wrap_format)  # Sugestões
@@ -922,17 +929,18 @@ else:
                 worksheet_info.write(linha, 0, 'Níveis de risco:', subtitle_format)
                 linha += 1
                 
-                niveis = [
-                    {'nivel': 'Risco Muito Alto 🔴', 'descricao': 'Prioridade imediata. Requer intervenção em 1-3 meses.', 'formato': risco_formats['Risco Muito Alto 🔴']},
-                    {'nivel': 'Risco Alto 🟠', 'descricao': 'Prioridade alta. Implementar ações em 3-6 meses.', 'formato': risco_formats['Risco Alto 🟠']},
-                    {'nivel': 'Risco Moderado 🟡', 'descricao': 'Prioridade média. Implementar ações em 6-12 meses.', 'formato': risco_formats['Risco Moderado 🟡']},
-                    {'nivel': 'Risco Baixo 🟢', 'descricao': 'Prioridade baixa. Implementar ações em 12-18 meses.', 'formato': risco_formats['Risco Baixo 🟢']},
-                    {'nivel': 'Risco Muito Baixo 🟣', 'descricao': 'Manutenção. Manter boas práticas e revisar anualmente.', 'formato': risco_formats['Risco Muito Baixo 🟣']}
+                # Descrições na ordem de NIVEIS_RISCO
+                descricoes_niveis = [
+                    'Prioridade imediata. Requer intervenção em 1-3 meses.',
+                    'Prioridade alta. Implementar ações em 3-6 meses.',
+                    'Prioridade média. Implementar ações em 6-12 meses.',
+                    'Prioridade baixa. Implementar ações em 12-18 meses.',
+                    'Manutenção. Manter boas práticas e revisar anualmente.'
                 ]
                 
-                for n in niveis:
-                    worksheet_info.write(linha, 0, n['nivel'], n['formato'])
-                    worksheet_info.write(linha, 1, n['descricao'])
+                for nivel, descricao, formato in zip(NIVEIS_RISCO, descricoes_niveis, risco_formats):
+                    worksheet_info.write(linha, 0, nivel["rotulo"], formato)
+                    worksheet_info.write(linha, 1, descricao)
                     linha += 1
                 
                 linha += 1
@@ -962,12 +970,13 @@ else:
                         worksheet_diag.set_column('D:D', 15)  # Risco
                         worksheet_diag.set_column('E:E', 15)  # Número de Respostas
                         
-                        # Formatar células de risco
-                        for row_num, row in enumerate(df_resultados.itertuples(), 1):
-                            if hasattr(row, "Risco"):
-                                nivel_risco = row.Risco
-                                if nivel_risco in risco_formats:
-                                    worksheet_diag.write(row_num, 3, nivel_risco, risco_formats[nivel_risco])
+                        # Formatar células de risco a partir das médias
+                        if "Risco" in df_resultados.columns and "Média" in df_resultados.columns:
+                            col_risco = df_resultados.columns.get_loc("Risco")
+                            codigos = classificar_riscos(df_resultados["Média"])["codigos"]
+                            for row_num, (nivel_risco, codigo) in enumerate(zip(df_resultados["Risco"], codigos), 1):
+                                if codigo >= 0:
+                                    worksheet_diag.write(row_num, col_risco, nivel_risco, risco_formats[codigo])
                     except Exception as e:
                         print(f"Erro ao adicionar aba de diagnóstico: {str(e)}")
                         # Não interromper por erro na aba de diagnóstico
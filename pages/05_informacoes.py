@@ -1,7 +1,10 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from utils.constantes import DIMENSOES_HSE, DESCRICOES_DIMENSOES, QUESTOES_INVERTIDAS
+from utils.processamento import instrumentar_pagina
+from utils.constantes import (
+    DIMENSOES_HSE, DESCRICOES_DIMENSOES, QUESTOES_INVERTIDAS, QUESTOES_HSE, COLUNAS_DEMOGRAFICAS_TEMPLATE
+)
 
 # Aplicar estilo consistente da Escutaris
 def aplicar_estilo_escutaris():
@@ -110,6 +113,7 @@ aplicar_estilo_escutaris()
 
 # Título da página
 st.title("Informações HSE-IT")
+instrumentar_pagina("Informações")
 
 # Sobre o Questionário HSE-IT (Card)
 st.markdown('<div class="info-card">', unsafe_allow_html=True)
@@ -270,48 +274,10 @@ def gerar_template_excel():
            workbook = writer.book
            
            # Criar DataFrame com a estrutura esperada
-           colunas = [
-               "Setor", "Cargo", "Tempo_Empresa", "Genero", "Faixa_Etaria", "Escolaridade", "Regime_Trabalho",
-           ]
+           colunas = list(COLUNAS_DEMOGRAFICAS_TEMPLATE)
            
            # As questões HSE-IT
-           questoes_hse = [
-               "1. Sei claramente o que é esperado de mim no trabalho",
-               "2. Posso decidir quando fazer uma pausa",
-               "3. Grupos de trabalho diferentes pedem-me coisas difíceis de conjugar",
-               "4. Sei do que necessito para fazer o meu trabalho",
-               "5. Sou sujeito a assédio pessoal sob a forma de palavras ou comportamentos incorretos",
-               "6. Tenho prazos impossíveis de cumprir",
-               "7. Se o trabalho se torna difícil, os colegas ajudam-me",
-               "8. Recebo feedback de apoio sobre o trabalho que faço",
-               "9. Tenho que trabalhar muito intensivamente",
-               "10. Tenho capacidade de decisão sobre a minha rapidez de trabalho",
-               "11. Sei claramente os meus deveres e responsabilidades",
-               "12. Tenho que negligenciar tarefas porque tenho uma carga elevada para cumprir",
-               "13. Sei claramente as metas e objetivos do meu departamento",
-               "14. Há fricção ou animosidade entre os colegas",
-               "15. Posso decidir como fazer o meu trabalho",
-               "16. Não consigo fazer pausas suficientes",
-               "17. Compreendo como o meu trabalho se integra no objetivo geral da organização",
-               "18. Sou pressionado a trabalhar durante horários longos",
-               "19. Tenho poder de escolha para decidir o que faço no trabalho",
-               "20. Tenho que trabalhar muito depressa",
-               "21. Sou sujeito a intimidação/perseguição no trabalho",
-               "22. Tenho pressões de tempo irrealistas",
-               "23. Posso estar seguro de que o meu chefe imediato me ajuda num problema de trabalho",
-               "24. Tenho ajuda e apoio necessários dos colegas",
-               "25. Tenho algum poder de decisão sobre a minha forma de trabalho",
-               "26. Tenho oportunidades suficientes para questionar os chefes sobre mudanças no trabalho",
-               "27. Sou respeitado como mereço pelos colegas de trabalho",
-               "28. O pessoal é sempre consultado sobre mudança no trabalho",
-               "29. Posso falar com o meu chefe imediato sobre algo no trabalho que me transtornou ou irritou",
-               "30. O meu horário pode ser flexível",
-               "31. Os meus colegas estão dispostos a ouvir os meus problemas relacionados com o trabalho",
-               "32. Quando são efetuadas mudanças no trabalho, sei claramente como resultarão na prática",
-               "33. Recebo apoio durante trabalho que pode ser emocionalmente exigente",
-               "34. Os relacionamentos no trabalho estão sob pressão",
-               "35. O meu chefe imediato encoraja-me no trabalho"
-           ]
+           questoes_hse = QUESTOES_HSE
            
            # Adicionar questões ao template
            for q in questoes_hse:
@@ -0,0 +1,75 @@
+import os
+import threading
+
+import pandas as pd
+import pytest
+
+from utils import cache_arquivos
+from utils.cache_arquivos import gravar_cache, ler_cache, limitar_cache
+
+@pytest.fixture(autouse=True)
+def diretorio_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_arquivos, "DIRETORIO_CACHE", str(tmp_path))
+    return tmp_path
+
+def _df():
+    return pd.DataFrame({
+        "Setor": pd.Categorical(["TI", "RH", None]),
+        "1. Pergunta": pd.array([1, None, 5], dtype="Int8"),
+        "2. Pergunta": pd.Series([1.5, 2.0, None], dtype="float32")
+    })
+
+def test_grava_e_le_com_os_mesmos_tipos():
+    df = _df()
+    assert gravar_cache("a", df, ["Setor"], ["1. Pergunta", "2. Pergunta"])
+
+    lido, colunas_filtro, colunas_perguntas = ler_cache("a")
+    pd.testing.assert_frame_equal(lido, df)
+    assert colunas_filtro == ["Setor"]
+    assert colunas_perguntas == ["1. Pergunta", "2. Pergunta"]
+
+def test_versao_antiga_e_ignorada(monkeypatch):
+    gravar_cache("a", _df(), ["Setor"], ["1. Pergunta"])
+    monkeypatch.setattr(cache_arquivos, "VERSAO_CACHE", cache_arquivos.VERSAO_CACHE + 1)
+    assert ler_cache("a") is None
+
+def test_remove_as_entradas_usadas_ha_mais_tempo(diretorio_cache):
+    for i, chave in enumerate(["antiga", "media", "nova"]):
+        gravar_cache(chave, _df(), ["Setor"], ["1. Pergunta"])
+        for extensao in (".parquet", ".json"):
+            os.utime(diretorio_cache / (chave + extensao), (1000 + i, 1000 + i))
+
+    # Ler a entrada mais antiga a torna a mais recente
+    assert ler_cache("antiga") is not None
+
+    tamanho_entrada = sum(os.path.getsize(diretorio_cache / ("media" + ext)) for ext in (".parquet", ".json"))
+    limitar_cache(limite_mb=2.5 * tamanho_entrada / (1024 * 1024))
+
+    assert ler_cache("media") is None
+    assert ler_cache("antiga") is not None
+    assert ler_cache("nova") is not None
+
+def test_gravacoes_simultaneas_da_mesma_chave(diretorio_cache):
+    resultados = []
+    threads = [
+        threading.Thread(target=lambda: resultados.append(gravar_cache("a", _df(), ["Setor"], ["1. Pergunta"])))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert resultados == [True] * 8
+    assert sorted(os.listdir(diretorio_cache)) == ["a.json", "a.parquet"]
+    assert ler_cache("a") is not None
+
+def test_falha_na_gravacao_nao_deixa_temporarios(diretorio_cache, monkeypatch):
+    def gravar_e_falhar(self, caminho, **kwargs):
+        with open(caminho, 'wb') as f:
+            f.write(b"incompleto")
+        raise OSError("disco cheio")
+
+    monkeypatch.setattr(pd.DataFrame, "to_parquet", gravar_e_falhar)
+    assert not gravar_cache("a", _df(), ["Setor"], ["1. Pergunta"])
+    assert os.listdir(diretorio_cache) == []
@@ -0,0 +1,82 @@
+import io
+import os
+import threading
+
+import pandas as pd
+import pytest
+
+from utils import cache_relatorios
+from utils.cache_relatorios import (
+    chave_relatorio, gravar_relatorio, hash_dataframe, ler_relatorio, limitar_cache_relatorios, obter_relatorio
+)
+
+@pytest.fixture(autouse=True)
+def diretorio_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_relatorios, "DIRETORIO_CACHE_RELATORIOS", str(tmp_path))
+    return tmp_path
+
+def _plano(responsavel=""):
+    return pd.DataFrame({
+        "Dimensão": ["Demanda", "Demanda"],
+        "Sugestão de Ação": ["Revisar prazos", "Mapear atividades"],
+        "Responsável": [responsavel, ""]
+    })
+
+def test_chave_muda_com_o_plano_o_filtro_e_o_tipo():
+    base = chave_relatorio("excel_completo", "abc", (), hash_dataframe(_plano()))
+
+    assert base == chave_relatorio("excel_completo", "abc", (), hash_dataframe(_plano()))
+    assert base != chave_relatorio("excel_completo", "abc", (), hash_dataframe(_plano("Ana")))
+    assert base != chave_relatorio("excel_completo", "abc", (("Setor", ("TI",)),), hash_dataframe(_plano()))
+    assert base != chave_relatorio("pdf_plano_acao", "abc", (), hash_dataframe(_plano()))
+    assert base != chave_relatorio("excel_completo", "def", (), hash_dataframe(_plano()))
+
+def test_versao_do_modelo_invalida_a_chave(monkeypatch):
+    antes = chave_relatorio("pdf_resultados", "abc")
+    monkeypatch.setitem(cache_relatorios.VERSOES_MODELOS, "pdf_resultados", 2)
+    assert chave_relatorio("pdf_resultados", "abc") != antes
+
+def test_obter_relatorio_gera_uma_vez():
+    chamadas = []
+
+    def gerar():
+        chamadas.append(1)
+        return io.BytesIO(b"%PDF relatorio")
+
+    primeiro, do_cache_1 = obter_relatorio("k", gerar)
+    segundo, do_cache_2 = obter_relatorio("k", gerar)
+
+    assert (do_cache_1, do_cache_2) == (False, True)
+    assert primeiro.getvalue() == segundo.getvalue() == b"%PDF relatorio"
+    assert len(chamadas) == 1
+
+def test_falha_na_geracao_nao_e_gravada():
+    assert obter_relatorio("k", lambda: None) == (None, False)
+    assert ler_relatorio("k") is None
+
+def test_remove_os_relatorios_usados_ha_mais_tempo(diretorio_cache):
+    for i, chave in enumerate(["antigo", "medio", "novo"]):
+        gravar_relatorio(chave, b"x" * 1000)
+        os.utime(diretorio_cache / (chave + ".bin"), (1000 + i, 1000 + i))
+    assert ler_relatorio("antigo") is not None
+
+    limitar_cache_relatorios(limite_mb=2500 / (1024 * 1024))
+
+    assert ler_relatorio("medio") is None
+    assert ler_relatorio("antigo") is not None
+    assert ler_relatorio("novo") is not None
+
+def test_gravacoes_simultaneas_nao_deixam_temporarios(diretorio_cache):
+    resultados = []
+    threads = [
+        threading.Thread(target=lambda: resultados.append(gravar_relatorio("k", b"y" * 100_000)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert resultados == [True] * 8
+    assert os.listdir(diretorio_cache) == ["k.bin"]
+    assert ler_relatorio("k") == b"y" * 100_000
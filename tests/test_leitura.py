@@ -0,0 +1,89 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from utils.cubo import construir_cubo, consultar_cubo
+from utils.leitura import carregar_arquivo, ler_csv_em_blocos, ler_excel_em_blocos
+from utils.pontuacao import calcular_resultados_gerais
+
+PERGUNTAS = [f"{q}. Pergunta {q}" for q in range(1, 36)]
+
+def _dados(num_linhas=1500, semente=0):
+    gerador = np.random.default_rng(semente)
+    # Setor numérico nas primeiras 900 linhas e misturado (números e texto) depois:
+    # o tipo inferido pelo pandas muda de um bloco para outro
+    setor = [1] * 900 + ["1", "A"] * ((num_linhas - 900) // 2)
+    dados = {"Setor": setor, "Cargo": gerador.choice(["Analista", "Gerente"], num_linhas)}
+    for pergunta in PERGUNTAS:
+        dados[pergunta] = gerador.integers(1, 6, num_linhas)
+    df = pd.DataFrame(dados)
+    # Algumas respostas em branco, para as contagens do cubo
+    df.iloc[::7, 2] = np.nan
+    return df
+
+def _csv(df):
+    return io.BytesIO(df.to_csv(index=False).encode("utf-8"))
+
+def _xlsx(df):
+    arquivo = io.BytesIO()
+    df.to_excel(arquivo, index=False)
+    arquivo.seek(0)
+    return arquivo
+
+def _conferir_cubo_do_df(df, colunas_filtro, colunas_perguntas, cubo):
+    # O cubo lido em blocos deve ser o mesmo montado do DataFrame final (como no
+    # reenvio servido pelo cache Parquet)
+    referencia = construir_cubo(df, df, colunas_filtro, colunas_perguntas)
+    for col in referencia["colunas"]:
+        assert set(cubo["categorias"][col]) == set(referencia["categorias"][col])
+        assert set(cubo["categorias"][col]) == set(df[col].dropna().unique())
+        for valor in referencia["categorias"][col]:
+            obtido = consultar_cubo(cubo, {col: valor})
+            esperado = consultar_cubo(referencia, {col: valor})
+            assert obtido["tamanho"] == esperado["tamanho"] == int((df[col] == valor).sum())
+            np.testing.assert_allclose(obtido["somas"], esperado["somas"])
+            np.testing.assert_array_equal(obtido["contagens"], esperado["contagens"])
+
+def test_csv_em_blocos_igual_a_leitura_inteira():
+    original = _dados()
+    df, colunas_filtro, colunas_perguntas, cubo = ler_csv_em_blocos(_csv(original), tamanho_bloco=600)
+    inteiro = pd.read_csv(_csv(original))
+
+    assert len(df) == len(inteiro)
+    assert colunas_perguntas == PERGUNTAS
+    for pergunta in PERGUNTAS:
+        np.testing.assert_array_equal(
+            df[pergunta].to_numpy(dtype=float, na_value=np.nan), inteiro[pergunta].to_numpy(dtype=float)
+        )
+    assert df["Cargo"].astype(str).tolist() == inteiro["Cargo"].astype(str).tolist()
+    assert calcular_resultados_gerais(df[colunas_perguntas], colunas_perguntas) == \
+        calcular_resultados_gerais(inteiro[colunas_perguntas], colunas_perguntas)
+
+def test_csv_tipo_muda_entre_blocos():
+    df, colunas_filtro, colunas_perguntas, cubo = ler_csv_em_blocos(_csv(_dados()), tamanho_bloco=600)
+
+    # Categorias unificadas como texto: um único "1" com as 1500 linhas que o têm
+    assert sorted(df["Setor"].cat.categories) == ["1", "A"]
+    assert int((df["Setor"] == "1").sum()) == 1200
+    _conferir_cubo_do_df(df, colunas_filtro, colunas_perguntas, cubo)
+
+def test_excel_tipo_muda_entre_blocos():
+    df, colunas_filtro, colunas_perguntas, cubo = ler_excel_em_blocos(_xlsx(_dados()), tamanho_bloco=600)
+
+    assert len(df) == 1500
+    assert sorted(df["Setor"].cat.categories) == ["1", "A"]
+    _conferir_cubo_do_df(df, colunas_filtro, colunas_perguntas, cubo)
+
+def test_recarga_do_cache_da_o_mesmo_cubo(tmp_path, monkeypatch):
+    monkeypatch.setattr("utils.cache_arquivos.DIRETORIO_CACHE", str(tmp_path))
+    conteudo = _csv(_dados()).getvalue()
+
+    primeira = carregar_arquivo(io.BytesIO(conteudo), "respostas.csv", chave="abc")
+    segunda = carregar_arquivo(io.BytesIO(conteudo), "respostas.csv", chave="abc")
+
+    for col in primeira[3]["colunas"]:
+        assert primeira[3]["categorias"][col] == segunda[3]["categorias"][col]
+    np.testing.assert_array_equal(primeira[3]["celulas"], segunda[3]["celulas"])
+    np.testing.assert_allclose(primeira[3]["somas"], segunda[3]["somas"])
+    np.testing.assert_array_equal(primeira[3]["tamanhos"], segunda[3]["tamanhos"])
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+from utils.constantes import DIMENSOES_HSE, QUESTOES_INVERTIDAS
+from utils.pontuacao import (
+    calcular_resultados_gerais, calcular_resultados_segmentos, classificar_riscos, matriz_respostas
+)
+
+PERGUNTAS = [f"{q}. Pergunta {q}" for q in range(1, 36)]
+
+def _respostas(num_linhas=300, semente=0, ausentes=0.1):
+    gerador = np.random.default_rng(semente)
+    valores = gerador.integers(1, 6, (num_linhas, 35)).astype(float)
+    valores[gerador.random(valores.shape) < ausentes] = np.nan
+    df = pd.DataFrame(valores, columns=PERGUNTAS)
+    df.insert(0, "Setor", gerador.choice(["Financeiro", "RH", "TI"], num_linhas))
+    return df
+
+def _medias_referencia(df_perguntas):
+    # Cálculo original, dimensão a dimensão: inverte as questões e faz a média de
+    # todas as respostas válidas das questões da dimensão
+    processado = df_perguntas.copy()
+    for q in QUESTOES_INVERTIDAS:
+        processado[PERGUNTAS[q - 1]] = 6 - processado[PERGUNTAS[q - 1]]
+    medias = {}
+    for dimensao, questoes in DIMENSOES_HSE.items():
+        valores = processado[[PERGUNTAS[q - 1] for q in questoes]].to_numpy().ravel()
+        valores = valores[~np.isnan(valores)]
+        medias[dimensao] = round(valores.mean(), 2) if len(valores) else None
+    return medias
+
+def test_resultados_gerais_iguais_ao_calculo_original():
+    df = _respostas()
+    resultados = calcular_resultados_gerais(df[PERGUNTAS], PERGUNTAS)
+
+    esperado = _medias_referencia(df[PERGUNTAS])
+    assert [r["Dimensão"] for r in resultados] == list(DIMENSOES_HSE)
+    for resultado in resultados:
+        assert resultado["Média"] == esperado[resultado["Dimensão"]]
+        assert resultado["Número de Respostas"] == len(df)
+
+def test_segmentos_iguais_ao_filtro_grupo_a_grupo():
+    df = _respostas()
+    df_segmentos = calcular_resultados_segmentos(df, df[PERGUNTAS], PERGUNTAS, "Setor")
+
+    for setor, df_setor in df.groupby("Setor"):
+        obtido = df_segmentos[df_segmentos["Setor"] == setor].set_index("Dimensão")
+        esperado = calcular_resultados_gerais(df_setor[PERGUNTAS], PERGUNTAS)
+        for resultado in esperado:
+            linha = obtido.loc[resultado["Dimensão"]]
+            assert linha["Média"] == resultado["Média"]
+            assert linha["Risco"] == resultado["Risco"]
+            assert linha["Número de Respostas"] == len(df_setor)
+
+def test_dimensao_sem_respostas():
+    df = _respostas(num_linhas=20)
+    for q in DIMENSOES_HSE["Controle"]:
+        df[PERGUNTAS[q - 1]] = np.nan
+
+    controle = next(r for r in calcular_resultados_gerais(df[PERGUNTAS], PERGUNTAS) if r["Dimensão"] == "Controle")
+    assert controle["Média"] is None
+    assert controle["Risco"] == "Sem dados suficientes"
+
+def test_colunas_fora_de_ordem_e_questoes_invertidas():
+    df = _respostas(num_linhas=50)
+    embaralhadas = list(np.random.default_rng(3).permutation(PERGUNTAS))
+
+    matriz = matriz_respostas(df[embaralhadas], embaralhadas)
+    for q in (1, QUESTOES_INVERTIDAS[0]):
+        coluna = df[PERGUNTAS[q - 1]].to_numpy()
+        esperado = 6 - coluna if q in QUESTOES_INVERTIDAS else coluna
+        np.testing.assert_array_equal(matriz[:, q - 1], esperado)
+
+def test_limites_de_risco():
+    # Limites fechados à direita, como na classificação original (média <= 1 é Muito Alto)
+    codigos = classificar_riscos([0.5, 1, 1.01, 2, 3, 4, 4.01, None])["codigos"]
+    assert codigos.tolist() == [0, 0, 1, 1, 2, 3, 4, -1]
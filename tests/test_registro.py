@@ -0,0 +1,42 @@
+import gc
+
+from utils.registro import RegistroConjuntos
+
+def _conjunto(impressao, num_respostas=10):
+    return {"impressao": impressao, "num_respostas": num_respostas}
+
+def test_mesma_impressao_compartilha_o_conjunto():
+    registro = RegistroConjuntos()
+    primeiro = _conjunto("abc")
+    alca_a = registro.registrar(primeiro)
+    alca_b = registro.registrar(_conjunto("abc"))
+
+    assert alca_a.conjunto is primeiro
+    assert alca_b.conjunto is primeiro
+    assert registro.estatisticas() == {"conjuntos": 1, "referencias": 2, "respostas": 10}
+
+def test_conjunto_sai_com_a_ultima_alca():
+    registro = RegistroConjuntos()
+    alca_a = registro.registrar(_conjunto("abc"))
+    alca_b = registro.registrar(_conjunto("abc"))
+
+    del alca_a
+    gc.collect()
+    assert registro.obter("abc") is not None
+    assert registro.estatisticas()["referencias"] == 1
+
+    del alca_b
+    gc.collect()
+    assert registro.obter("abc") is None
+    assert registro.estatisticas() == {"conjuntos": 0, "referencias": 0, "respostas": 0}
+
+def test_substituir_a_alca_da_sessao_libera_o_conjunto_anterior():
+    registro = RegistroConjuntos()
+    sessao = {"alca": registro.registrar(_conjunto("abc"))}
+
+    sessao["alca"] = registro.registrar(_conjunto("def", num_respostas=5))
+    gc.collect()
+
+    assert registro.obter("abc") is None
+    assert sessao["alca"].conjunto["impressao"] == "def"
+    assert registro.estatisticas() == {"conjuntos": 1, "referencias": 1, "respostas": 5}
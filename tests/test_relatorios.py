@@ -0,0 +1,43 @@
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from utils.constantes import DIMENSOES_HSE
+from utils.pacote import gerar_pacote_segmentos
+from utils.pontuacao import calcular_resultados_segmentos
+from utils.relatorios import gerar_pdf
+
+PERGUNTAS = [f"{q}. Pergunta {q}" for q in range(1, 36)]
+
+def _segmentos_com_dimensao_vazia():
+    gerador = np.random.default_rng(1)
+    df = pd.DataFrame({"Setor": ["Financeiro"] * 20 + ["Jurídico"] * 5})
+    for pergunta in PERGUNTAS:
+        df[pergunta] = pd.array(gerador.integers(1, 6, len(df)), dtype="Int8")
+    # O Jurídico não respondeu nenhuma questão de Demanda
+    for questao in DIMENSOES_HSE["Demanda"]:
+        df.loc[df["Setor"] == "Jurídico", PERGUNTAS[questao - 1]] = pd.NA
+    return calcular_resultados_segmentos(df, df[PERGUNTAS], PERGUNTAS, "Setor")
+
+def test_pacote_com_dimensao_sem_respostas():
+    df_segmentos = _segmentos_com_dimensao_vazia()
+    sem_media = df_segmentos[(df_segmentos["Setor"] == "Jurídico") & (df_segmentos["Dimensão"] == "Demanda")]
+    assert sem_media["Média"].isna().all()
+
+    pacote, erros = gerar_pacote_segmentos(df_segmentos, "Setor", processos=1)
+
+    assert erros == []
+    with zipfile.ZipFile(pacote) as arquivo:
+        nomes = arquivo.namelist()
+    assert "Financeiro/resultados_hse_it_Financeiro.pdf" in nomes
+    assert "Jurídico/resultados_hse_it_Jurídico.pdf" in nomes
+
+def test_pdf_com_media_ausente():
+    # Média None (coluna object), como nos resultados montados dimensão a dimensão
+    df_resultados = pd.DataFrame({
+        "Dimensão": ["Demanda", "Controle"],
+        "Média": pd.Series([None, 3.4], dtype=object),
+        "Risco": ["Sem dados suficientes", "Risco Baixo 🟢"]
+    })
+    assert gerar_pdf(df_resultados).getvalue().startswith(b"%PDF")
@@ -1,49 +1,67 @@
 import streamlit as st
-import json
 import os
+import json
 import hashlib
+import threading
 from datetime import datetime, timedelta
+from utils import banco
 
-# Arquivo para armazenar usuários (pode ser substituído por um DB posteriormente)
+# Arquivo JSON onde os usuários eram armazenados; hoje usado apenas para importar
+# os cadastros existentes para o banco SQLite (utils.banco) na primeira execução
 USERS_FILE = "data/usuarios.json"
 
-# Garantir que o diretório existe
-os.makedirs(os.path.dirname(USERS_FILE), exist_ok=True)
+_trava_cadastro = threading.Lock()
+_cadastro_pronto = threading.Event()
+
+def _inicializar_cadastro():
+    """
+    Preenche o cadastro se o banco ainda não tiver nenhum usuário. Executada no
+    primeiro acesso ao cadastro, e não na importação do módulo: abrir a tela de login
+    não toca no disco.
+    """
+    if _cadastro_pronto.is_set():
+        return
+
+    with _trava_cadastro:
+        if _cadastro_pronto.is_set():
+            return
+
+        if banco.contar_usuarios() == 0:
+            if os.path.exists(USERS_FILE):
+                with open(USERS_FILE, 'r', encoding='utf-8') as f:
+                    banco.importar_usuarios(json.load(f))
+            else:
+                default_users = {
+                    "admin@escutaris.com.br": {
+                        "senha_hash": hashlib.sha256("senha123".encode()).hexdigest(),
+                        "nome": "Administrador",
+                        "empresa": "Escutaris",
+                        "plano": "admin",
+                        "validade": "2099-12-31"
+                    },
+                    "demo@exemplo.com": {
+                        "senha_hash": hashlib.sha256("demo123".encode()).hexdigest(),
+                        "nome": "Usuário Demo",
+                        "empresa": "Demo Ltda",
+                        "plano": "demo",
+                        "validade": "2099-12-31"
+                    }
+                }
+                banco.importar_usuarios(default_users)
 
-# Inicializar arquivo de usuários se não existir
-if not os.path.exists(USERS_FILE):
-    default_users = {
-        "admin@escutaris.com.br": {
-            "senha_hash": hashlib.sha256("senha123".encode()).hexdigest(),
-            "nome": "Administrador",
-            "empresa": "Escutaris",
-            "plano": "admin",
-            "validade": "2099-12-31"
-        },
-        "demo@exemplo.com": {
-            "senha_hash": hashlib.sha256("demo123".encode()).hexdigest(),
-            "nome": "Usuário Demo",
-            "empresa": "Demo Ltda",
-            "plano": "demo",
-            "validade": "2099-12-31"
-        }
-    }
-    with open(USERS_FILE, 'w') as f:
-        json.dump(default_users, f, indent=4)
+        _cadastro_pronto.set()
 
 def carregar_usuarios():
-    """Carrega a lista de usuários do arquivo JSON"""
+    """Carrega a lista de usuários do banco"""
     try:
-        with open(USERS_FILE, 'r') as f:
-            return json.load(f)
+        _inicializar_cadastro()
+        return banco.listar_usuarios()
     except Exception as e:
         st.error(f"Erro ao carregar usuários: {str(e)}")
         return {}
 
 def adicionar_usuario(email, senha, nome, empresa, plano="basico", validade_dias=30):
     """Adiciona um novo usuário ao sistema"""
-    usuarios = carregar_usuarios()
-    
     # Calcular data de validade
     hoje = datetime.now()
     validade = (hoje + timedelta(days=validade_dias)).strftime("%Y-%m-%d")
@@ -52,28 +70,31 @@ def adicionar_usuario(email, senha, nome, empresa, plano="basico", validade_dias
     senha_hash = hashlib.sha256(senha.encode()).hexdigest()
     
     # Adicionar usuário
-    usuarios[email] = {
+    _inicializar_cadastro()
+    banco.salvar_usuario(email, {
         "senha_hash": senha_hash,
         "nome": nome,
         "empresa": empresa,
         "plano": plano,
         "validade": validade
-    }
-    
-    # Salvar de volta no arquivo
-    with open(USERS_FILE, 'w') as f:
-        json.dump(usuarios, f, indent=4)
+    })
     
     return True
 
-def verificar_senha(email, senha):
+def remover_usuario(email):
+    """Remove um usuário do sistema; retorna False se ele não estava cadastrado"""
+    _inicializar_cadastro()
+    return banco.remover_usuario(email)
+
+def verificar_credenciais(email, senha):
     """Verifica se as credenciais são válidas e se a licença está ativa"""
-    usuarios = carregar_usuarios()
+    # Busca pela chave primária do banco
+    _inicializar_cadastro()
+    usuario = banco.obter_usuario(email)
     
-    if email not in usuarios:
+    if usuario is None:
         return False
     
-    usuario = usuarios[email]
     senha_hash = hashlib.sha256(senha.encode()).hexdigest()
     
     if senha_hash != usuario["senha_hash"]:
@@ -131,7 +152,7 @@ def verificar_senha():
             submitted = st.form_submit_button("Entrar", use_container_width=True)
             
             if submitted:
-                resultado = verificar_senha(email, senha)
+                resultado = verificar_credenciais(email, senha)
                 
                 if resultado == "expirado":
                     st.error("Sua licença expirou. Entre em contato com a Escutaris para renovação.")
@@ -224,8 +245,6 @@ def pagina_admin():
             
             if st.button(f"Excluir {email}", key=f"del_{email}"):
                 # Remover usuário
-                del usuarios[email]
-                with open(USERS_FILE, 'w') as f:
-                    json.dump(usuarios, f, indent=4)
+                remover_usuario(email)
                 st.success(f"Usuário {email} removido!")
                 st.experimental_rerun()
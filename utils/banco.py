@@ -0,0 +1,311 @@
+import io
+import os
+import json
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+
+# Persistência local em SQLite, separada por empresa.
+# Guarda usuários e licenças, as pesquisas enviadas (dados normalizados em Parquet),
+# os resultados calculados e os planos de ação editados, para que uma análise possa
+# ser reaberta depois de reiniciar o servidor sem reenviar o arquivo. O banco usa o
+# modo WAL (leituras não esperam as gravações) e um pool de conexões compartilhado
+# pelas sessões; toda consulta de dados de pesquisa é restrita à empresa informada.
+# O pandas só é importado pelas funções de pesquisas: a tela de login consulta
+# usuários sem carregá-lo.
+
+CAMINHO_BANCO = "data/escutaris.db"
+
+# Conexões mantidas abertas por banco
+TAMANHO_POOL = 8
+
+# Tempo de espera por uma trava de gravação antes de desistir (ms)
+ESPERA_TRAVA_MS = 5000
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS empresas (
+    id INTEGER PRIMARY KEY,
+    nome TEXT NOT NULL UNIQUE,
+    criada_em TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS usuarios (
+    email TEXT PRIMARY KEY,
+    senha_hash TEXT NOT NULL,
+    nome TEXT NOT NULL,
+    empresa_id INTEGER NOT NULL REFERENCES empresas(id),
+    plano TEXT NOT NULL,
+    validade TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_usuarios_empresa ON usuarios(empresa_id);
+
+CREATE TABLE IF NOT EXISTS pesquisas (
+    id INTEGER PRIMARY KEY,
+    empresa_id INTEGER NOT NULL REFERENCES empresas(id),
+    impressao TEXT NOT NULL,
+    nome_arquivo TEXT NOT NULL,
+    num_respostas INTEGER NOT NULL,
+    colunas_filtro TEXT NOT NULL,
+    colunas_perguntas TEXT NOT NULL,
+    dados BLOB NOT NULL,
+    criada_em TEXT NOT NULL,
+    UNIQUE (empresa_id, impressao)
+);
+CREATE INDEX IF NOT EXISTS idx_pesquisas_empresa ON pesquisas(empresa_id, criada_em);
+
+CREATE TABLE IF NOT EXISTS resultados (
+    pesquisa_id INTEGER NOT NULL REFERENCES pesquisas(id) ON DELETE CASCADE,
+    predicado TEXT NOT NULL,
+    dados TEXT NOT NULL,
+    calculado_em TEXT NOT NULL,
+    PRIMARY KEY (pesquisa_id, predicado)
+);
+
+CREATE TABLE IF NOT EXISTS planos (
+    pesquisa_id INTEGER PRIMARY KEY REFERENCES pesquisas(id) ON DELETE CASCADE,
+    dados TEXT NOT NULL,
+    atualizado_em TEXT NOT NULL
+);
+"""
+
+_trava = threading.Lock()
+_pools = {}
+
+def _agora():
+    return datetime.now().isoformat(timespec='seconds')
+
+def _abrir(caminho):
+    conexao = sqlite3.connect(caminho, timeout=ESPERA_TRAVA_MS / 1000, check_same_thread=False)
+    conexao.row_factory = sqlite3.Row
+    conexao.execute("PRAGMA journal_mode=WAL")
+    conexao.execute("PRAGMA synchronous=NORMAL")
+    conexao.execute("PRAGMA foreign_keys=ON")
+    conexao.execute(f"PRAGMA busy_timeout={ESPERA_TRAVA_MS}")
+    return conexao
+
+def _pool(caminho):
+    with _trava:
+        pool = _pools.get(caminho)
+        if pool is None:
+            diretorio = os.path.dirname(caminho)
+            if diretorio:
+                os.makedirs(diretorio, exist_ok=True)
+            conexao = _abrir(caminho)
+            conexao.executescript(ESQUEMA)
+            conexao.commit()
+
+            pool = queue.LifoQueue(maxsize=TAMANHO_POOL)
+            pool.put(conexao)
+            _pools[caminho] = pool
+        return pool
+
+@contextmanager
+def conexao(caminho=CAMINHO_BANCO):
+    """
+    Conexão do pool, em uma transação: confirmada ao sair do bloco ou desfeita em
+    caso de exceção. O banco e as tabelas são criados no primeiro uso.
+    """
+    pool = _pool(caminho)
+    try:
+        con = pool.get_nowait()
+    except queue.Empty:
+        con = _abrir(caminho)
+
+    try:
+        with con:
+            yield con
+    finally:
+        try:
+            pool.put_nowait(con)
+        except queue.Full:
+            con.close()
+
+def fechar_conexoes(caminho=CAMINHO_BANCO):
+    """Fecha as conexões ociosas do pool (ex: ao encerrar o processo ou em testes)."""
+    with _trava:
+        pool = _pools.pop(caminho, None)
+    while pool is not None and not pool.empty():
+        pool.get_nowait().close()
+
+def _id_empresa(con, empresa):
+    con.execute("INSERT OR IGNORE INTO empresas (nome, criada_em) VALUES (?, ?)", (empresa, _agora()))
+    return con.execute("SELECT id FROM empresas WHERE nome = ?", (empresa,)).fetchone()["id"]
+
+# Usuários e licenças
+
+def _usuario(linha):
+    return {
+        "senha_hash": linha["senha_hash"],
+        "nome": linha["nome"],
+        "empresa": linha["empresa"],
+        "plano": linha["plano"],
+        "validade": linha["validade"]
+    }
+
+_CONSULTA_USUARIOS = """
+SELECT u.email, u.senha_hash, u.nome, e.nome AS empresa, u.plano, u.validade
+FROM usuarios u JOIN empresas e ON e.id = u.empresa_id
+"""
+
+def obter_usuario(email, caminho=CAMINHO_BANCO):
+    """Dados de um usuário ({senha_hash, nome, empresa, plano, validade}) ou None."""
+    with conexao(caminho) as con:
+        linha = con.execute(_CONSULTA_USUARIOS + " WHERE u.email = ?", (email,)).fetchone()
+    return _usuario(linha) if linha is not None else None
+
+def listar_usuarios(empresa=None, caminho=CAMINHO_BANCO):
+    """Usuários {email: dados}, de todas as empresas ou só da informada."""
+    with conexao(caminho) as con:
+        if empresa is None:
+            linhas = con.execute(_CONSULTA_USUARIOS + " ORDER BY u.email").fetchall()
+        else:
+            linhas = con.execute(_CONSULTA_USUARIOS + " WHERE e.nome = ? ORDER BY u.email", (empresa,)).fetchall()
+    return {linha["email"]: _usuario(linha) for linha in linhas}
+
+def salvar_usuario(email, dados, caminho=CAMINHO_BANCO):
+    """Cria ou atualiza um usuário; dados no formato de obter_usuario."""
+    with conexao(caminho) as con:
+        con.execute(
+            "INSERT OR REPLACE INTO usuarios (email, senha_hash, nome, empresa_id, plano, validade) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (email, dados["senha_hash"], dados["nome"], _id_empresa(con, dados["empresa"]),
+             dados["plano"], dados["validade"])
+        )
+
+def remover_usuario(email, caminho=CAMINHO_BANCO):
+    """Remove um usuário; retorna False se ele não estava cadastrado."""
+    with conexao(caminho) as con:
+        return con.execute("DELETE FROM usuarios WHERE email = ?", (email,)).rowcount > 0
+
+def contar_usuarios(caminho=CAMINHO_BANCO):
+    with conexao(caminho) as con:
+        return con.execute("SELECT COUNT(*) FROM usuarios").fetchone()[0]
+
+def importar_usuarios(usuarios, caminho=CAMINHO_BANCO):
+    """Importa usuários {email: dados} (ex: do antigo arquivo JSON) em uma única transação."""
+    with conexao(caminho) as con:
+        for email, dados in usuarios.items():
+            con.execute(
+                "INSERT OR IGNORE INTO usuarios (email, senha_hash, nome, empresa_id, plano, validade) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (email, dados["senha_hash"], dados["nome"], _id_empresa(con, dados["empresa"]),
+                 dados["plano"], dados["validade"])
+            )
+    return len(usuarios)
+
+# Pesquisas, resultados e planos de ação
+
+def salvar_pesquisa(empresa, conjunto, nome_arquivo, caminho=CAMINHO_BANCO):
+    """
+    Guarda os dados de uma pesquisa da empresa. O mesmo arquivo (mesma impressão
+    digital) enviado de novo pela empresa não é duplicado.
+
+    Returns:
+        Identificador da pesquisa
+    """
+    with conexao(caminho) as con:
+        id_empresa = _id_empresa(con, empresa)
+        linha = con.execute(
+            "SELECT id FROM pesquisas WHERE empresa_id = ? AND impressao = ?", (id_empresa, conjunto["impressao"])
+        ).fetchone()
+        if linha is not None:
+            return linha["id"]
+
+    # Parquet gerado fora da transação: não segura a trava de gravação enquanto serializa
+    buffer = io.BytesIO()
+    conjunto["df"].to_parquet(buffer, index=False)
+
+    with conexao(caminho) as con:
+        con.execute(
+            "INSERT OR IGNORE INTO pesquisas (empresa_id, impressao, nome_arquivo, num_respostas, "
+            "colunas_filtro, colunas_perguntas, dados, criada_em) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (id_empresa, conjunto["impressao"], nome_arquivo, conjunto["num_respostas"],
+             json.dumps(conjunto["colunas_filtro"]), json.dumps(conjunto["colunas_perguntas"]),
+             buffer.getvalue(), _agora())
+        )
+        return con.execute(
+            "SELECT id FROM pesquisas WHERE empresa_id = ? AND impressao = ?", (id_empresa, conjunto["impressao"])
+        ).fetchone()["id"]
+
+def listar_pesquisas(empresa, caminho=CAMINHO_BANCO):
+    """Pesquisas da empresa, da mais recente para a mais antiga (sem os dados)."""
+    with conexao(caminho) as con:
+        linhas = con.execute(
+            "SELECT p.id, p.nome_arquivo, p.num_respostas, p.criada_em, "
+            "EXISTS (SELECT 1 FROM planos WHERE pesquisa_id = p.id) AS tem_plano "
+            "FROM pesquisas p JOIN empresas e ON e.id = p.empresa_id "
+            "WHERE e.nome = ? ORDER BY p.criada_em DESC, p.id DESC",
+            (empresa,)
+        ).fetchall()
+    return [dict(linha) for linha in linhas]
+
+def carregar_pesquisa(empresa, pesquisa_id, caminho=CAMINHO_BANCO):
+    """
+    Reabre uma pesquisa da empresa como conjunto de dados (utils.conjunto).
+
+    Returns:
+        Conjunto de dados ou None se a pesquisa não existir ou for de outra empresa
+    """
+    with conexao(caminho) as con:
+        linha = con.execute(
+            "SELECT p.impressao, p.colunas_filtro, p.colunas_perguntas, p.dados "
+            "FROM pesquisas p JOIN empresas e ON e.id = p.empresa_id WHERE p.id = ? AND e.nome = ?",
+            (pesquisa_id, empresa)
+        ).fetchone()
+    if linha is None:
+        return None
+
+    import pandas as pd
+    from utils.conjunto import criar_conjunto
+    df = pd.read_parquet(io.BytesIO(linha["dados"]))
+    return criar_conjunto(
+        linha["impressao"], df, json.loads(linha["colunas_filtro"]), json.loads(linha["colunas_perguntas"])
+    )
+
+def remover_pesquisa(empresa, pesquisa_id, caminho=CAMINHO_BANCO):
+    """Remove uma pesquisa da empresa com seus resultados e plano."""
+    with conexao(caminho) as con:
+        return con.execute(
+            "DELETE FROM pesquisas WHERE id = ? AND empresa_id = (SELECT id FROM empresas WHERE nome = ?)",
+            (pesquisa_id, empresa)
+        ).rowcount > 0
+
+def _ler_tabela(linha):
+    if linha is None:
+        return None
+    import pandas as pd
+    return pd.read_json(io.StringIO(linha["dados"]), orient='records', dtype=False)
+
+def salvar_resultados(pesquisa_id, predicado, df_resultados, caminho=CAMINHO_BANCO):
+    """Guarda os resultados calculados da pesquisa para um predicado (() é a empresa toda)."""
+    with conexao(caminho) as con:
+        con.execute(
+            "INSERT OR REPLACE INTO resultados (pesquisa_id, predicado, dados, calculado_em) VALUES (?, ?, ?, ?)",
+            (pesquisa_id, repr(predicado), df_resultados.to_json(orient='records', force_ascii=False), _agora())
+        )
+
+def obter_resultados(pesquisa_id, predicado=(), caminho=CAMINHO_BANCO):
+    """Resultados guardados para o predicado, ou None."""
+    with conexao(caminho) as con:
+        linha = con.execute(
+            "SELECT dados FROM resultados WHERE pesquisa_id = ? AND predicado = ?", (pesquisa_id, repr(predicado))
+        ).fetchone()
+    return _ler_tabela(linha)
+
+def salvar_plano(pesquisa_id, df_plano, caminho=CAMINHO_BANCO):
+    """Guarda o plano de ação editado da pesquisa (substitui o anterior)."""
+    # Prazos editados como datas são gravados como texto AAAA-MM-DD
+    df_plano = df_plano.map(lambda valor: valor.isoformat() if isinstance(valor, date) else valor)
+    with conexao(caminho) as con:
+        con.execute(
+            "INSERT OR REPLACE INTO planos (pesquisa_id, dados, atualizado_em) VALUES (?, ?, ?)",
+            (pesquisa_id, df_plano.to_json(orient='records', force_ascii=False), _agora())
+        )
+
+def obter_plano(pesquisa_id, caminho=CAMINHO_BANCO):
+    """Plano de ação editado da pesquisa, ou None se nunca foi salvo."""
+    with conexao(caminho) as con:
+        linha = con.execute("SELECT dados FROM planos WHERE pesquisa_id = ?", (pesquisa_id,)).fetchone()
+    return _ler_tabela(linha)
@@ -0,0 +1,407 @@
+import io
+import os
+import gc
+import inspect
+import sys
+import json
+import time
+import platform
+import argparse
+import subprocess
+import tracemalloc
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from utils.gerador_dados import gerar_dados_sinteticos, LIMITE_LINHAS_XLSX
+from utils.leitura import carregar_arquivo
+from utils.cache_arquivos import hash_conteudo
+from utils.pontuacao import calcular_resultados_gerais, calcular_resultados_segmentos
+
+# Benchmarks de ingestão, pontuação e geração de relatórios.
+# Cada caso é executado sobre conjuntos sintéticos (utils.gerador_dados) de vários
+# tamanhos e cardinalidades demográficas; o tempo e o pico de memória de cada medição
+# são acrescentados a um histórico JSON Lines, para comparar versões. Uso:
+#
+#     python -m utils.benchmark --tamanhos 1000 10000 100000 --cardinalidades 10 100
+#
+# As funções com st.cache_data são chamadas sem o cache (pelo atributo __wrapped__),
+# então cada repetição mede o cálculo completo. Com --importacao, mede também o tempo
+# de importação dos módulos de cada tela em interpretadores novos (python -X importtime),
+# que antecede a primeira renderização da página.
+
+HISTORICO_PADRAO = "data/benchmarks/historico.jsonl"
+
+TAMANHOS_PADRAO = [1_000, 10_000, 100_000]
+CARDINALIDADES_PADRAO = [10, 100]
+
+# Acima deste tamanho o caso XLSX é omitido (gravar a planilha de teste é lento)
+LIMITE_XLSX_BENCHMARK = 100_000
+
+# Aumento de tempo, em relação à medição anterior, considerado regressão
+TOLERANCIA_REGRESSAO = 0.20
+
+# Módulo importado por cada tela: tela -> módulo
+MODULOS_IMPORTACAO = {
+    "login": "utils.autenticacao",
+    "analise": "utils.processamento",
+    "relatorios": "utils.relatorios"
+}
+
+# Pacotes mais lentos listados por módulo no relatório de importação
+PACOTES_IMPORTACAO = 8
+
+def sem_cache(funcao):
+    """
+    Função original por trás de um st.cache_data e da instrumentação (cada wrapper
+    guarda a função que envolve em __wrapped__).
+    """
+    return inspect.unwrap(funcao)
+
+def preparar_contexto(num_respondentes, cardinalidade, semente=42):
+    """
+    Gera o conjunto de dados de um cenário e os insumos de cada caso: arquivos em
+    memória, dados carregados, resultados e plano de ação.
+    """
+    from utils.processamento import gerar_sugestoes_acoes
+
+    df_gerado = gerar_dados_sinteticos(
+        num_respondentes, {"Setor": cardinalidade, "Cargo": cardinalidade}, semente=semente
+    )
+    contexto = {"csv": df_gerado.to_csv(index=False).encode('utf-8')}
+
+    if num_respondentes <= min(LIMITE_XLSX_BENCHMARK, LIMITE_LINHAS_XLSX):
+        try:
+            xlsx = io.BytesIO()
+            df_gerado.to_excel(xlsx, index=False, engine='xlsxwriter')
+            contexto["xlsx"] = xlsx.getvalue()
+        except ImportError:
+            pass
+
+    df, colunas_filtro, colunas_perguntas, _ = carregar_arquivo(io.BytesIO(contexto["csv"]), "dados.csv")
+    df_resultados = pd.DataFrame(calcular_resultados_gerais(df[colunas_perguntas], colunas_perguntas))
+
+    contexto.update({
+        "df": df,
+        "df_perguntas": df[colunas_perguntas],
+        "colunas_filtro": colunas_filtro,
+        "colunas_perguntas": colunas_perguntas,
+        "df_resultados": df_resultados,
+        "df_plano_acao": gerar_sugestoes_acoes(df_resultados)
+    })
+    return contexto
+
+def _carregar_dados(contexto, formato):
+    # Mesmo caminho de carregar_dados: hash do conteúdo, leitura, validação e cubo
+    arquivo = io.BytesIO(contexto[formato])
+    hash_conteudo(arquivo)
+    carregar_arquivo(arquivo, f"dados.{formato}")
+
+def _processar_dados_hse(contexto):
+    from utils.processamento import processar_dados_hse
+    processar_dados_hse(contexto["df_perguntas"], contexto["colunas_perguntas"])
+
+def _calcular_resultados_dimensoes(contexto):
+    from utils.processamento import calcular_resultados_dimensoes
+    sem_cache(calcular_resultados_dimensoes)(
+        contexto["df"], contexto["df_perguntas"], contexto["colunas_perguntas"]
+    )
+
+def _analise_demografica(contexto):
+    # Resultados de todos os grupos de cada coluna demográfica, como nas abas "Por ..."
+    for coluna in contexto["colunas_filtro"]:
+        if coluna not in contexto["colunas_perguntas"]:
+            calcular_resultados_segmentos(
+                contexto["df"], contexto["df_perguntas"], contexto["colunas_perguntas"], coluna
+            )
+
+def _gerar_excel_completo(contexto):
+    from utils.relatorios import gerar_excel_completo
+    gerar_excel_completo(
+        contexto["df"], contexto["df_perguntas"], contexto["colunas_filtro"], contexto["colunas_perguntas"],
+        contexto["df_resultados"], contexto["df_plano_acao"]
+    )
+
+def _gerar_pdf(contexto):
+    from utils.relatorios import gerar_pdf
+    gerar_pdf(contexto["df_resultados"])
+
+def _gerar_pdf_plano_acao(contexto):
+    from utils.relatorios import gerar_pdf_plano_acao
+    gerar_pdf_plano_acao(contexto["df_plano_acao"])
+
+# Casos disponíveis: nome -> (função, insumo obrigatório no contexto)
+CASOS = {
+    "carregar_dados_csv": (lambda contexto: _carregar_dados(contexto, "csv"), "csv"),
+    "carregar_dados_xlsx": (lambda contexto: _carregar_dados(contexto, "xlsx"), "xlsx"),
+    "processar_dados_hse": (_processar_dados_hse, None),
+    "calcular_resultados_dimensoes": (_calcular_resultados_dimensoes, None),
+    "analise_demografica": (_analise_demografica, None),
+    "gerar_excel_completo": (_gerar_excel_completo, None),
+    "gerar_pdf": (_gerar_pdf, None),
+    "gerar_pdf_plano_acao": (_gerar_pdf_plano_acao, None)
+}
+
+def medir(funcao, contexto, repeticoes=3):
+    """
+    Mede o tempo de parede (menor e mediana entre as repetições) e, em uma execução
+    separada com tracemalloc, o pico de memória alocada pela função.
+    """
+    tempos = []
+    for _ in range(repeticoes):
+        gc.collect()
+        inicio = time.perf_counter()
+        funcao(contexto)
+        tempos.append(time.perf_counter() - inicio)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        funcao(contexto)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "tempo_min_s": round(min(tempos), 6),
+        "tempo_mediana_s": round(float(np.median(tempos)), 6),
+        "memoria_pico_mb": round(pico / (1024 * 1024), 3)
+    }
+
+def ler_importtime(saida, modulo):
+    """
+    Interpreta a saída de python -X importtime, considerando só a importação do módulo
+    (as linhas aparecem depois das importações que cada módulo faz).
+
+    Returns:
+        Tupla (tempo acumulado da importação em segundos, {pacote: tempo próprio em segundos}),
+        com os pacotes do mais lento para o mais rápido
+    """
+    proprios = {}
+    for linha in saida.splitlines():
+        if not linha.startswith("import time:"):
+            continue
+        partes = linha[len("import time:"):].split("|")
+        try:
+            proprio, acumulado = int(partes[0]), int(partes[1])
+        except (IndexError, ValueError):
+            continue  # cabeçalho
+
+        nome = partes[2].rstrip()
+        profundidade = (len(nome) - len(nome.lstrip()) - 1) // 2
+        nome = nome.strip()
+        if profundidade == 0 and nome != modulo:
+            # Importação anterior ao módulo (inicialização do interpretador ou pacote pai)
+            proprios = {}
+            continue
+
+        pacote = nome.split(".")[0]
+        proprios[pacote] = proprios.get(pacote, 0) + proprio
+        if profundidade == 0:
+            pacotes = sorted(proprios.items(), key=lambda item: item[1], reverse=True)
+            return acumulado / 1e6, {pacote: round(tempo / 1e6, 6) for pacote, tempo in pacotes}
+
+    raise ValueError(f"Importação de {modulo} não encontrada na saída de -X importtime")
+
+def medir_importacao(modulo, repeticoes=3):
+    """
+    Importa o módulo em interpretadores novos com -X importtime (cache de bytecode já
+    gerado pela primeira execução, como em um servidor que acabou de subir).
+
+    Returns:
+        Dicionário com o tempo menor e mediano e os pacotes mais lentos da execução mais rápida
+    """
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    medicoes = []
+    for _ in range(repeticoes + 1):
+        execucao = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+            capture_output=True, text=True, timeout=300, cwd=raiz
+        )
+        if execucao.returncode != 0:
+            raise RuntimeError(execucao.stderr.strip().splitlines()[-1])
+        medicoes.append(ler_importtime(execucao.stderr, modulo))
+
+    # A primeira execução só gera o bytecode
+    medicoes = sorted(medicoes[1:], key=lambda medicao: medicao[0])
+    tempos = [tempo for tempo, _ in medicoes]
+    return {
+        "tempo_min_s": round(tempos[0], 6),
+        "tempo_mediana_s": round(float(np.median(tempos)), 6),
+        "memoria_pico_mb": None,
+        "pacotes": dict(list(medicoes[0][1].items())[:PACOTES_IMPORTACAO])
+    }
+
+def _versao_codigo():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, timeout=10,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def ler_historico(caminho=HISTORICO_PADRAO):
+    """Lê o histórico de medições (uma por linha) em um DataFrame."""
+    if not os.path.exists(caminho):
+        return pd.DataFrame()
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return pd.DataFrame([json.loads(linha) for linha in f if linha.strip()])
+
+def gravar_historico(registros, caminho=HISTORICO_PADRAO):
+    diretorio = os.path.dirname(caminho)
+    if diretorio:
+        os.makedirs(diretorio, exist_ok=True)
+    with open(caminho, 'a', encoding='utf-8') as f:
+        for registro in registros:
+            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+def _dados_execucao():
+    return {
+        "execucao": datetime.now().isoformat(timespec='seconds'),
+        "versao": _versao_codigo(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count()
+    }
+
+def executar_importacao(repeticoes=3, ao_medir=None):
+    """
+    Mede o tempo de importação do módulo de cada tela (MODULOS_IMPORTACAO).
+
+    Returns:
+        Lista de registros no formato de executar_benchmarks, com caso "importar_<tela>"
+    """
+    execucao = _dados_execucao()
+    registros = []
+    for tela, modulo in MODULOS_IMPORTACAO.items():
+        registro = {**execucao, "caso": f"importar_{tela}", "respondentes": 0, "cardinalidade": 0, "modulo": modulo}
+        try:
+            registro.update(medir_importacao(modulo, repeticoes))
+        except Exception as e:
+            registro["erro"] = f"{type(e).__name__}: {str(e)}"
+
+        registros.append(registro)
+        if ao_medir:
+            ao_medir(registro)
+    return registros
+
+def executar_benchmarks(tamanhos=TAMANHOS_PADRAO, cardinalidades=CARDINALIDADES_PADRAO,
+                        casos=None, repeticoes=3, ao_medir=None):
+    """
+    Executa os casos em todos os cenários (tamanho × cardinalidade).
+
+    Args:
+        casos: Nomes dos casos (chaves de CASOS); padrão são todos
+        ao_medir: Função opcional chamada com cada registro assim que ele é medido
+
+    Returns:
+        Lista de registros, um por caso e cenário; casos que falharem trazem "erro"
+    """
+    casos = casos or list(CASOS)
+    execucao = _dados_execucao()
+
+    registros = []
+    for num_respondentes in tamanhos:
+        for cardinalidade in cardinalidades:
+            contexto = preparar_contexto(num_respondentes, cardinalidade)
+
+            for nome in casos:
+                funcao, insumo = CASOS[nome]
+                if insumo and insumo not in contexto:
+                    continue
+
+                registro = {**execucao, "caso": nome, "respondentes": num_respondentes, "cardinalidade": cardinalidade}
+                try:
+                    registro.update(medir(funcao, contexto, repeticoes))
+                except Exception as e:
+                    registro["erro"] = f"{type(e).__name__}: {str(e)}"
+
+                registros.append(registro)
+                if ao_medir:
+                    ao_medir(registro)
+
+            del contexto
+            gc.collect()
+
+    return registros
+
+def comparar_com_historico(registros, historico, tolerancia=TOLERANCIA_REGRESSAO):
+    """
+    Compara cada medição com a última medição anterior do mesmo caso e cenário.
+
+    Returns:
+        DataFrame com tempo anterior, atual, variação e indicação de regressão
+    """
+    chave = ["caso", "respondentes", "cardinalidade"]
+    atual = pd.DataFrame([r for r in registros if "erro" not in r])
+    if atual.empty:
+        return pd.DataFrame()
+
+    comparacao = atual[chave + ["tempo_min_s", "memoria_pico_mb"]]
+    if historico.empty or "tempo_min_s" not in historico.columns:
+        return comparacao
+
+    anterior = (
+        historico.dropna(subset=["tempo_min_s"])
+        .groupby(chave, as_index=False).last()[chave + ["tempo_min_s"]]
+        .rename(columns={"tempo_min_s": "tempo_anterior_s"})
+    )
+    comparacao = comparacao.merge(anterior, on=chave, how="left")
+    comparacao["variacao"] = comparacao["tempo_min_s"] / comparacao["tempo_anterior_s"] - 1
+    comparacao["regressao"] = comparacao["variacao"] > tolerancia
+    return comparacao
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m utils.benchmark",
+        description="Mede tempo e memória da ingestão, pontuação e geração de relatórios."
+    )
+    parser.add_argument("--tamanhos", type=int, nargs='+', default=TAMANHOS_PADRAO, help="Números de respondentes")
+    parser.add_argument("--cardinalidades", type=int, nargs='+', default=CARDINALIDADES_PADRAO,
+                        help="Número de valores de Setor e Cargo")
+    parser.add_argument("--casos", nargs='+', choices=list(CASOS), default=None, help="Casos a executar (padrão: todos)")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Repetições por medição (padrão: 3)")
+    parser.add_argument("--historico", default=HISTORICO_PADRAO, help=f"Arquivo de histórico (padrão: {HISTORICO_PADRAO})")
+    parser.add_argument("--importacao", action="store_true",
+                        help="Medir também o tempo de importação dos módulos de cada tela")
+    parser.add_argument("--somente-importacao", action="store_true",
+                        help="Medir apenas o tempo de importação (sem gerar dados)")
+    parser.add_argument("--falhar-em-regressao", action="store_true",
+                        help=f"Sair com código 1 se algum caso ficar mais de {TOLERANCIA_REGRESSAO:.0%}% mais lento")
+    args = parser.parse_args(argv)
+
+    def mostrar(registro):
+        cenario = f"{registro['caso']} n={registro['respondentes']} k={registro['cardinalidade']}"
+        if "erro" in registro:
+            print(f"{cenario}: {registro['erro']}", flush=True)
+        elif "pacotes" in registro:
+            pacotes = ", ".join(f"{pacote} {tempo:.3f} s" for pacote, tempo in registro["pacotes"].items())
+            print(f"{registro['caso']} ({registro['modulo']}): {registro['tempo_min_s']:.3f} s [{pacotes}]", flush=True)
+        else:
+            print(f"{cenario}: {registro['tempo_min_s']:.4f} s, pico {registro['memoria_pico_mb']:.1f} MB", flush=True)
+
+    historico = ler_historico(args.historico)
+    registros = []
+    if args.importacao or args.somente_importacao:
+        registros += executar_importacao(args.repeticoes, mostrar)
+    if not args.somente_importacao:
+        registros += executar_benchmarks(args.tamanhos, args.cardinalidades, args.casos, args.repeticoes, mostrar)
+    gravar_historico(registros, args.historico)
+
+    comparacao = comparar_com_historico(registros, historico)
+    if "regressao" in comparacao.columns:
+        print()
+        print(comparacao.to_string(index=False))
+        regressoes = comparacao[comparacao["regressao"]]
+        if not regressoes.empty:
+            print(f"\n{len(regressoes)} caso(s) mais de {TOLERANCIA_REGRESSAO:.0%} mais lento(s) que a medição anterior.")
+            if args.falhar_em_regressao:
+                return 1
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+import os
+import json
+import threading
+import hashlib
+import pandas as pd
+
+# Cache em disco dos uploads já processados, endereçado pelo SHA-256 do conteúdo.
+# Cada entrada guarda o conjunto de dados normalizado em Parquet e um JSON com o
+# mapeamento de colunas; reenvios do mesmo arquivo (por qualquer usuário) evitam
+# uma nova leitura e conversão.
+
+DIRETORIO_CACHE = "data/cache_uploads"
+
+# Limite do espaço ocupado pelo cache; as entradas menos usadas saem primeiro
+LIMITE_CACHE_MB = 512
+
+# Incrementar quando o formato gravado mudar, para ignorar entradas antigas
+VERSAO_CACHE = 2
+
+def parquet_disponivel():
+    """Indica se há um mecanismo Parquet instalado (pyarrow ou fastparquet)."""
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        try:
+            import fastparquet  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+def hash_conteudo(arquivo, tamanho_bloco=1024 * 1024):
+    """Calcula o SHA-256 do arquivo lendo em blocos; a posição de leitura é restaurada."""
+    posicao = arquivo.tell()
+    arquivo.seek(0)
+
+    sha = hashlib.sha256()
+    while True:
+        bloco = arquivo.read(tamanho_bloco)
+        if not bloco:
+            break
+        sha.update(bloco)
+
+    arquivo.seek(posicao)
+    return sha.hexdigest()
+
+def _caminhos(chave):
+    base = os.path.join(DIRETORIO_CACHE, chave)
+    return base + ".parquet", base + ".json"
+
+def ler_cache(chave):
+    """
+    Busca um upload processado no cache.
+
+    Returns:
+        Tupla (df, colunas_filtro, colunas_perguntas) ou None se não houver entrada válida
+    """
+    caminho_dados, caminho_meta = _caminhos(chave)
+    if not (os.path.exists(caminho_dados) and os.path.exists(caminho_meta)) or not parquet_disponivel():
+        return None
+
+    try:
+        with open(caminho_meta, 'r') as f:
+            meta = json.load(f)
+        if meta.get("versao") != VERSAO_CACHE:
+            return None
+
+        df = pd.read_parquet(caminho_dados)
+
+        # Registrar o acesso para a política LRU
+        os.utime(caminho_dados)
+        os.utime(caminho_meta)
+
+        return df, meta["colunas_filtro"], meta["colunas_perguntas"]
+    except Exception as e:
+        print(f"Erro ao ler cache de upload {chave}: {str(e)}")
+        return None
+
+def gravar_cache(chave, df, colunas_filtro, colunas_perguntas):
+    """
+    Grava um upload processado no cache e aplica o limite de tamanho.
+    Falhas são apenas registradas: o cache nunca impede o carregamento dos dados.
+    """
+    if not parquet_disponivel():
+        return False
+
+    # Parquet exige nomes de coluna em texto
+    if not all(isinstance(col, str) for col in df.columns):
+        return False
+
+    caminho_dados, caminho_meta = _caminhos(chave)
+    # Temporários únicos por processo e thread: as sessões do Streamlit são threads
+    # do mesmo processo e podem gravar a mesma entrada ao mesmo tempo
+    sufixo = f"{os.getpid()}.{threading.get_ident()}.tmp"
+    temp_dados = f"{caminho_dados}.{sufixo}"
+    temp_meta = f"{caminho_meta}.{sufixo}"
+    try:
+        os.makedirs(DIRETORIO_CACHE, exist_ok=True)
+
+        # Gravar em arquivos temporários e renomear, para que leitores concorrentes
+        # nunca vejam uma entrada incompleta
+        # O DataFrame já chega com tipos compactos (Int8 e categóricas), preservados no Parquet
+        df.to_parquet(temp_dados, index=False)
+        os.replace(temp_dados, caminho_dados)
+
+        with open(temp_meta, 'w') as f:
+            json.dump({
+                "versao": VERSAO_CACHE,
+                "colunas_filtro": list(colunas_filtro),
+                "colunas_perguntas": list(colunas_perguntas)
+            }, f)
+        os.replace(temp_meta, caminho_meta)
+    except Exception as e:
+        print(f"Erro ao gravar cache de upload {chave}: {str(e)}")
+        return False
+    finally:
+        # Uma gravação que falhou não deixa temporários para trás
+        for temporario in (temp_dados, temp_meta):
+            if os.path.exists(temporario):
+                os.remove(temporario)
+
+    limitar_cache()
+    return True
+
+def limitar_cache(limite_mb=LIMITE_CACHE_MB):
+    """Remove as entradas usadas há mais tempo até o cache caber no limite."""
+    if not os.path.isdir(DIRETORIO_CACHE):
+        return
+
+    entradas = {}
+    for nome in os.listdir(DIRETORIO_CACHE):
+        if nome.endswith(".tmp"):
+            continue
+        caminho = os.path.join(DIRETORIO_CACHE, nome)
+        chave = os.path.splitext(nome)[0]
+        try:
+            info = os.stat(caminho)
+        except FileNotFoundError:
+            continue
+        tamanho, acesso = entradas.get(chave, (0, 0))
+        entradas[chave] = (tamanho + info.st_size, max(acesso, info.st_mtime))
+
+    total = sum(tamanho for tamanho, _ in entradas.values())
+    limite = limite_mb * 1024 * 1024
+
+    for chave, (tamanho, _) in sorted(entradas.items(), key=lambda item: item[1][1]):
+        if total <= limite:
+            break
+        for caminho in _caminhos(chave):
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                pass
+        total -= tamanho
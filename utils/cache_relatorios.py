@@ -0,0 +1,150 @@
+import io
+import os
+import hashlib
+import threading
+from datetime import date
+import pandas as pd
+from utils.instrumentacao import registrar_cache
+
+# Cache em disco dos relatórios gerados (Excel, PDFs e pacotes por segmento).
+# A chave reúne tudo de que o arquivo depende: a impressão digital do conjunto de
+# dados, o filtro aplicado, o hash do plano de ação exportado, o tipo de relatório e
+# a versão do seu modelo. O mesmo relatório pedido por qualquer sessão é servido do
+# disco; quando o plano muda a chave muda junto, e as entradas antigas deixam de ser
+# usadas até saírem pela política LRU.
+
+DIRETORIO_CACHE_RELATORIOS = "data/cache_relatorios"
+
+# Limite do espaço ocupado pelo cache; os relatórios usados há mais tempo saem primeiro
+LIMITE_CACHE_RELATORIOS_MB = 256
+
+# Versão do modelo de cada tipo de relatório: incrementar quando o layout gerado
+# por utils.relatorios ou utils.pacote mudar, para não servir arquivos antigos
+VERSOES_MODELOS = {
+    "excel_completo": 1,
+    "pdf_resultados": 1,
+    "pdf_plano_acao": 1,
+    "pacote_segmentos": 1,
+    "planilha_qualidade": 1
+}
+
+def hash_dataframe(df):
+    """SHA-256 do conteúdo de um DataFrame (valores, ordem das linhas e nomes das colunas)."""
+    if df is None:
+        return None
+    sha = hashlib.sha256()
+    sha.update(repr([str(col) for col in df.columns]).encode('utf-8'))
+    sha.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return sha.hexdigest()
+
+def chave_relatorio(tipo, impressao, filtro=(), hash_plano=None):
+    """
+    Chave do relatório no cache.
+
+    Args:
+        tipo: Tipo de relatório (chave de VERSOES_MODELOS)
+        impressao: Impressão digital do conjunto de dados
+        filtro: Predicado (utils.conjunto.criar_predicado) ou outra descrição imutável
+                do recorte, ex: ("segmentos", coluna)
+        hash_plano: hash_dataframe do plano de ação usado no relatório, se houver
+    """
+    # A data de geração é impressa nos relatórios: entradas de outros dias não são reaproveitadas
+    partes = (tipo, VERSOES_MODELOS[tipo], impressao, repr(filtro), hash_plano, date.today().isoformat())
+    return hashlib.sha256(repr(partes).encode('utf-8')).hexdigest()
+
+def _caminho(chave):
+    return os.path.join(DIRETORIO_CACHE_RELATORIOS, chave + ".bin")
+
+def ler_relatorio(chave):
+    """Bytes do relatório em cache, ou None se não houver entrada."""
+    caminho = _caminho(chave)
+    try:
+        with open(caminho, 'rb') as f:
+            conteudo = f.read()
+        # Registrar o acesso para a política LRU
+        os.utime(caminho)
+        registrar_cache("relatorios", True)
+        return conteudo
+    except FileNotFoundError:
+        registrar_cache("relatorios", False)
+        return None
+    except Exception as e:
+        print(f"Erro ao ler relatório em cache {chave}: {str(e)}")
+        return None
+
+def gravar_relatorio(chave, conteudo):
+    """
+    Grava o relatório no cache e aplica o limite de tamanho.
+    Falhas são apenas registradas: o cache nunca impede a entrega do relatório.
+    """
+    caminho = _caminho(chave)
+    # Temporário único por processo e thread (as sessões do Streamlit são threads)
+    temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(DIRETORIO_CACHE_RELATORIOS, exist_ok=True)
+
+        # Gravar em arquivo temporário e renomear, para que leitores concorrentes
+        # nunca vejam um relatório incompleto
+        with open(temporario, 'wb') as f:
+            f.write(conteudo)
+        os.replace(temporario, caminho)
+    except Exception as e:
+        print(f"Erro ao gravar relatório em cache {chave}: {str(e)}")
+        return False
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+    limitar_cache_relatorios()
+    return True
+
+def obter_relatorio(chave, gerar):
+    """
+    Relatório do cache ou, se não houver, gerado por gerar() e gravado.
+
+    Args:
+        gerar: Função sem argumentos que devolve BytesIO ou bytes (None em caso de erro,
+               que não é gravado)
+
+    Returns:
+        Tupla (BytesIO ou None, veio_do_cache)
+    """
+    conteudo = ler_relatorio(chave)
+    if conteudo is not None:
+        return io.BytesIO(conteudo), True
+
+    gerado = gerar()
+    if gerado is None:
+        return None, False
+
+    conteudo = gerado.getvalue() if isinstance(gerado, io.BytesIO) else bytes(gerado)
+    gravar_relatorio(chave, conteudo)
+    return io.BytesIO(conteudo), False
+
+def limitar_cache_relatorios(limite_mb=LIMITE_CACHE_RELATORIOS_MB):
+    """Remove os relatórios usados há mais tempo até o cache caber no limite."""
+    if not os.path.isdir(DIRETORIO_CACHE_RELATORIOS):
+        return
+
+    entradas = []
+    for nome in os.listdir(DIRETORIO_CACHE_RELATORIOS):
+        if nome.endswith(".tmp"):
+            continue
+        caminho = os.path.join(DIRETORIO_CACHE_RELATORIOS, nome)
+        try:
+            info = os.stat(caminho)
+        except FileNotFoundError:
+            continue
+        entradas.append((info.st_mtime, info.st_size, caminho))
+
+    total = sum(tamanho for _, tamanho, _ in entradas)
+    limite = limite_mb * 1024 * 1024
+
+    for _, tamanho, caminho in sorted(entradas):
+        if total <= limite:
+            break
+        try:
+            os.remove(caminho)
+        except FileNotFoundError:
+            pass
+        total -= tamanho
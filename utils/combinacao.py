@@ -0,0 +1,244 @@
+import io
+import os
+import hashlib
+import zipfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from utils.leitura import carregar_arquivo, unir_categoricas, unir_respostas, ErroCarregamento
+from utils.lote import EXTENSOES_ACEITAS
+from utils.pontuacao import NUM_QUESTOES, resolver_questoes
+from utils.cubo import construir_cubo
+
+# Combinação de vários arquivos de respostas em um único conjunto de dados.
+# Clientes costumam enviar uma exportação por filial ou por onda de coleta: cada
+# arquivo (ou cada arquivo dentro de um ZIP) é lido em um processo do pool pelo mesmo
+# caminho do upload individual, os cabeçalhos das perguntas são conciliados pelo número
+# da questão (utils.pontuacao.resolver_questoes) e as respostas são reunidas coluna a
+# coluna, sem alinhar cópias de cada arquivo, com a coluna demográfica do arquivo de origem.
+
+COLUNA_ARQUIVO_ORIGEM = "Arquivo de Origem"
+
+# Máximo de processos de leitura por envio: cada processo importa pandas e numpy de
+# novo, e envios de várias sessões ao mesmo tempo multiplicam os processos
+MAX_PROCESSOS_LEITURA = 4
+
+# Abaixo deste tamanho somado os arquivos são lidos no próprio processo: iniciar o
+# pool custaria mais do que a leitura
+LIMITE_LEITURA_LOCAL_MB = 5
+
+def expandir_arquivos(arquivos, limite_mb=None):
+    """
+    Substitui cada ZIP pelos arquivos de respostas que ele contém.
+
+    Args:
+        arquivos: Lista de (nome, bytes)
+        limite_mb: Tamanho máximo somado dos arquivos extraídos
+
+    Returns:
+        Lista de (nome, bytes) só com arquivos .csv, .xlsx e .xls
+
+    Raises:
+        ErroCarregamento: ZIP inválido ou conteúdo acima do limite
+    """
+    expandidos = []
+    total = 0
+    for nome, conteudo in arquivos:
+        if not nome.lower().endswith('.zip'):
+            expandidos.append((nome, conteudo))
+            continue
+
+        try:
+            with zipfile.ZipFile(io.BytesIO(conteudo)) as pacote:
+                for info in pacote.infolist():
+                    base = os.path.basename(info.filename)
+                    if (info.is_dir() or "__MACOSX" in info.filename
+                            or base.startswith(('.', '~$')) or not base.lower().endswith(EXTENSOES_ACEITAS)):
+                        continue
+
+                    # Tamanho declarado conferido antes de extrair
+                    total += info.file_size
+                    if limite_mb and total > limite_mb * 1024 * 1024:
+                        raise ErroCarregamento(
+                            f"O conteúdo de {nome} passa de {limite_mb} MB depois de extraído.",
+                            "Envie os arquivos em partes menores."
+                        )
+                    expandidos.append((base, pacote.read(info)))
+        except zipfile.BadZipFile as e:
+            raise ErroCarregamento(f"O arquivo {nome} não é um ZIP válido.") from e
+
+    return expandidos
+
+def nomes_origem(nomes):
+    """Nome de cada arquivo na coluna de origem, com sufixo quando dois arquivos tiverem o mesmo nome."""
+    unicos = []
+    for nome in nomes:
+        unico = nome
+        sufixo = 2
+        while unico in unicos:
+            unico = f"{nome} ({sufixo})"
+            sufixo += 1
+        unicos.append(unico)
+    return unicos
+
+def impressao_arquivos(arquivos):
+    """
+    Impressão digital do conjunto combinado: o SHA-256 de cada arquivo (o mesmo do
+    cache de uploads) e seu nome, na ordem de envio.
+
+    Returns:
+        Tupla (impressão do conjunto, lista com o SHA-256 de cada arquivo)
+    """
+    chaves = [hashlib.sha256(conteudo).hexdigest() for _, conteudo in arquivos]
+    sha = hashlib.sha256()
+    for (nome, _), chave in zip(arquivos, chaves):
+        sha.update(f"{nome}\0{chave}\n".encode('utf-8'))
+    return sha.hexdigest(), chaves
+
+def ler_arquivo(nome, conteudo, chave=None):
+    """
+    Lê um dos arquivos pelo caminho do upload individual. Executada nos processos do pool.
+
+    Returns:
+        Tupla (df, colunas_filtro, colunas_perguntas)
+    """
+    df, colunas_filtro, colunas_perguntas, _ = carregar_arquivo(io.BytesIO(conteudo), nome, chave)
+    return df, colunas_filtro, colunas_perguntas
+
+def conciliar_colunas(leituras):
+    """
+    Concilia os cabeçalhos dos arquivos. As perguntas são identificadas pelo número
+    da questão, então "1. Tenho clareza..." e "1 - Tenho clareza..." viram a mesma
+    coluna (com o cabeçalho do primeiro arquivo em que a questão aparece); as colunas
+    demográficas são unidas pelo nome.
+
+    Args:
+        leituras: Lista de (df, colunas_filtro, colunas_perguntas)
+
+    Returns:
+        Tupla (colunas demográficas, colunas de perguntas, mapas), em que mapas[i]
+        associa cada coluna final à coluna correspondente do arquivo i
+    """
+    demograficas = []
+    cabecalhos = {}
+    mapas = []
+    for _, colunas_filtro, colunas_perguntas in leituras:
+        mapa = {}
+        for col in colunas_filtro:
+            if col not in colunas_perguntas and col != COLUNA_ARQUIVO_ORIGEM:
+                if col not in demograficas:
+                    demograficas.append(col)
+                mapa[col] = col
+
+        indices = resolver_questoes(colunas_perguntas)["indices"]
+        for questao in range(NUM_QUESTOES):
+            if indices[questao] >= 0:
+                coluna = colunas_perguntas[indices[questao]]
+                mapa[cabecalhos.setdefault(questao, coluna)] = coluna
+        mapas.append(mapa)
+
+    colunas_perguntas = [cabecalhos[questao] for questao in sorted(cabecalhos)]
+    return demograficas, colunas_perguntas, mapas
+
+def combinar_leituras(nomes, leituras):
+    """
+    Reúne as leituras em um único DataFrame, montado coluna a coluna: cada coluna
+    final é concatenada diretamente das colunas dos arquivos, sem reindexar nem
+    copiar os DataFrames de cada arquivo.
+
+    Returns:
+        Tupla (df, colunas_filtro, colunas_perguntas, cubo); a coluna de origem é a
+        primeira coluna demográfica
+    """
+    demograficas, colunas_perguntas, mapas = conciliar_colunas(leituras)
+    tamanhos = [len(df) for df, _, _ in leituras]
+
+    colunas = {
+        COLUNA_ARQUIVO_ORIGEM: pd.Categorical.from_codes(
+            np.repeat(np.arange(len(nomes), dtype=np.int32), tamanhos), categories=nomes_origem(nomes)
+        )
+    }
+    for col in demograficas:
+        partes = [df[mapa[col]] if col in mapa else None for (df, _, _), mapa in zip(leituras, mapas)]
+        colunas[col] = unir_categoricas(partes, tamanhos)
+    for col in colunas_perguntas:
+        partes = [df[mapa[col]] if col in mapa else None for (df, _, _), mapa in zip(leituras, mapas)]
+        colunas[col] = unir_respostas(partes, tamanhos)
+
+    df = pd.DataFrame(colunas, copy=False)
+    colunas_filtro = [COLUNA_ARQUIVO_ORIGEM] + demograficas
+    cubo = construir_cubo(df, df, colunas_filtro, colunas_perguntas) if colunas_perguntas else None
+    return df, colunas_filtro, colunas_perguntas, cubo
+
+def carregar_arquivos(arquivos, chaves=None, processos=None, ao_concluir=None):
+    """
+    Lê vários arquivos de respostas em paralelo e combina os que forem válidos.
+
+    Args:
+        arquivos: Lista de (nome, bytes), já sem ZIPs (expandir_arquivos)
+        chaves: SHA-256 de cada arquivo, para o cache de uploads (impressao_arquivos)
+        processos: Número de processos, limitado a MAX_PROCESSOS_LEITURA; padrão é o
+                   número de CPUs, ou 1 se os arquivos somarem menos de
+                   LIMITE_LEITURA_LOCAL_MB. Com 1 (ou um só arquivo), tudo roda no
+                   processo atual
+        ao_concluir: Função opcional chamada com (concluidos, total, nome) a cada arquivo
+
+    Returns:
+        Tupla (df, colunas_filtro, colunas_perguntas, cubo, origens, erros): origens
+        lista (nome, respostas) dos arquivos combinados e erros lista (nome, mensagem)
+        dos que não puderam ser lidos
+
+    Raises:
+        ErroCarregamento: se nenhum arquivo puder ser lido
+    """
+    chaves = chaves or [None] * len(arquivos)
+    if processos is None and sum(len(conteudo) for _, conteudo in arquivos) < LIMITE_LEITURA_LOCAL_MB * 1024 * 1024:
+        processos = 1
+    processos = min(processos or os.cpu_count() or 1, MAX_PROCESSOS_LEITURA, max(len(arquivos), 1))
+    leituras = [None] * len(arquivos)
+    erros = []
+    concluidos = 0
+
+    def registrar(i, leitura=None, erro=None):
+        nonlocal concluidos
+        if erro is not None:
+            erros.append((arquivos[i][0], erro))
+        leituras[i] = leitura
+        concluidos += 1
+        if ao_concluir:
+            ao_concluir(concluidos, len(arquivos), arquivos[i][0])
+
+    if processos == 1:
+        for i, ((nome, conteudo), chave) in enumerate(zip(arquivos, chaves)):
+            try:
+                registrar(i, ler_arquivo(nome, conteudo, chave))
+            except Exception as e:
+                registrar(i, erro=str(e))
+    else:
+        # "spawn": o servidor do Streamlit tem várias threads, e fork copiaria o processo inteiro
+        with ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context("spawn")) as executor:
+            futuros = {
+                executor.submit(ler_arquivo, nome, conteudo, chave): i
+                for i, ((nome, conteudo), chave) in enumerate(zip(arquivos, chaves))
+            }
+            for futuro in as_completed(futuros):
+                i = futuros[futuro]
+                try:
+                    registrar(i, futuro.result())
+                except Exception as e:
+                    # Arquivo inválido não impede a combinação dos demais
+                    registrar(i, erro=str(e))
+
+    validos = [i for i, leitura in enumerate(leituras) if leitura is not None]
+    if not validos:
+        raise ErroCarregamento(
+            "Nenhum dos arquivos enviados pôde ser lido.",
+            "Verifique se os arquivos seguem o template do HSE-IT."
+        )
+
+    nomes = [arquivos[i][0] for i in validos]
+    leituras = [leituras[i] for i in validos]
+    origens = list(zip(nomes_origem(nomes), [len(df) for df, _, _ in leituras]))
+    df, colunas_filtro, colunas_perguntas, cubo = combinar_leituras(nomes, leituras)
+    return df, colunas_filtro, colunas_perguntas, cubo, origens, erros
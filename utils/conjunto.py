@@ -0,0 +1,69 @@
+from utils.cubo import construir_cubo
+from utils.qualidade import perfilar_respostas
+
+# Conjunto de dados carregado e predicados de filtro.
+# O conjunto reúne os dados de um upload e uma impressão digital estável (o SHA-256
+# do arquivo, calculado uma única vez no upload). Filtros são representados por
+# predicados pequenos e imutáveis; (impressão, predicado) forma a chave de cache dos
+# resultados, sem precisar percorrer os DataFrames a cada consulta.
+
+def criar_conjunto(impressao, df, colunas_filtro, colunas_perguntas, cubo=None):
+    """
+    Monta o conjunto de dados de um upload.
+
+    Args:
+        impressao: Identificador estável do conteúdo (ex: hash do arquivo enviado)
+        df: DataFrame completo, já normalizado
+        colunas_filtro: Colunas demográficas
+        colunas_perguntas: Colunas das perguntas
+        cubo: Cubo de agregados; construído aqui se não for informado
+
+    Returns:
+        Dicionário com a impressão, os dados, as colunas, o cubo e o relatório de
+        qualidade das respostas (utils.qualidade)
+    """
+    df_perguntas = df[colunas_perguntas]
+    if cubo is None:
+        cubo = construir_cubo(df, df_perguntas, colunas_filtro, colunas_perguntas)
+
+    return {
+        "impressao": impressao,
+        "df": df,
+        "df_perguntas": df_perguntas,
+        "colunas_filtro": list(colunas_filtro),
+        "colunas_perguntas": list(colunas_perguntas),
+        "cubo": cubo,
+        "qualidade": perfilar_respostas(df_perguntas),
+        "num_respostas": len(df)
+    }
+
+def criar_predicado(filtros=None):
+    """
+    Converte filtros {coluna: valor} ou {coluna: [valores]} em um predicado canônico e
+    hashable: tupla ordenada de (coluna, tupla de valores). Colunas diferentes são
+    combinadas com E, valores de uma mesma coluna com OU. () representa a empresa toda.
+    """
+    predicado = []
+    for coluna, valor in (filtros or {}).items():
+        valores = valor if isinstance(valor, (list, tuple, set)) else [valor]
+        predicado.append((coluna, tuple(sorted(set(valores), key=str))))
+    return tuple(sorted(predicado, key=lambda item: str(item[0])))
+
+def filtros_do_predicado(predicado):
+    """Filtros no formato aceito por utils.cubo.consultar_cubo."""
+    return {coluna: list(valores) for coluna, valores in predicado}
+
+def descrever_predicado(predicado):
+    """
+    Descrição do predicado para exibição.
+
+    Returns:
+        Tupla (opcao, valor), ex: ("Setor e Cargo", "TI e Analista"), ou
+        ("Empresa Toda", "Geral") para o predicado vazio
+    """
+    if not predicado:
+        return "Empresa Toda", "Geral"
+
+    opcao = " e ".join(str(coluna) for coluna, _ in predicado)
+    valor = " e ".join(" ou ".join(str(v) for v in valores) for _, valores in predicado)
+    return opcao, valor
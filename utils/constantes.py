@@ -22,3 +22,72 @@ DESCRICOES_DIMENSOES = {
     "Função": "Se as pessoas entendem seu papel na organização e se a organização garante que não tenham papéis conflitantes.",
     "Mudança": "Como as mudanças organizacionais são gerenciadas e comunicadas."
 }
+
+# Colunas demográficas do template de aplicação do questionário
+COLUNAS_DEMOGRAFICAS_TEMPLATE = [
+    "Setor", "Cargo", "Tempo_Empresa", "Genero", "Faixa_Etaria", "Escolaridade", "Regime_Trabalho"
+]
+
+# Cabeçalhos das 35 questões do HSE-IT, como no template
+QUESTOES_HSE = [
+    "1. Sei claramente o que é esperado de mim no trabalho",
+    "2. Posso decidir quando fazer uma pausa",
+    "3. Grupos de trabalho diferentes pedem-me coisas difíceis de conjugar",
+    "4. Sei do que necessito para fazer o meu trabalho",
+    "5. Sou sujeito a assédio pessoal sob a forma de palavras ou comportamentos incorretos",
+    "6. Tenho prazos impossíveis de cumprir",
+    "7. Se o trabalho se torna difícil, os colegas ajudam-me",
+    "8. Recebo feedback de apoio sobre o trabalho que faço",
+    "9. Tenho que trabalhar muito intensivamente",
+    "10. Tenho capacidade de decisão sobre a minha rapidez de trabalho",
+    "11. Sei claramente os meus deveres e responsabilidades",
+    "12. Tenho que negligenciar tarefas porque tenho uma carga elevada para cumprir",
+    "13. Sei claramente as metas e objetivos do meu departamento",
+    "14. Há fricção ou animosidade entre os colegas",
+    "15. Posso decidir como fazer o meu trabalho",
+    "16. Não consigo fazer pausas suficientes",
+    "17. Compreendo como o meu trabalho se integra no objetivo geral da organização",
+    "18. Sou pressionado a trabalhar durante horários longos",
+    "19. Tenho poder de escolha para decidir o que faço no trabalho",
+    "20. Tenho que trabalhar muito depressa",
+    "21. Sou sujeito a intimidação/perseguição no trabalho",
+    "22. Tenho pressões de tempo irrealistas",
+    "23. Posso estar seguro de que o meu chefe imediato me ajuda num problema de trabalho",
+    "24. Tenho ajuda e apoio necessários dos colegas",
+    "25. Tenho algum poder de decisão sobre a minha forma de trabalho",
+    "26. Tenho oportunidades suficientes para questionar os chefes sobre mudanças no trabalho",
+    "27. Sou respeitado como mereço pelos colegas de trabalho",
+    "28. O pessoal é sempre consultado sobre mudança no trabalho",
+    "29. Posso falar com o meu chefe imediato sobre algo no trabalho que me transtornou ou irritou",
+    "30. O meu horário pode ser flexível",
+    "31. Os meus colegas estão dispostos a ouvir os meus problemas relacionados com o trabalho",
+    "32. Quando são efetuadas mudanças no trabalho, sei claramente como resultarão na prática",
+    "33. Recebo apoio durante trabalho que pode ser emocionalmente exigente",
+    "34. Os relacionamentos no trabalho estão sob pressão",
+    "35. O meu chefe imediato encoraja-me no trabalho"
+]
+
+# Níveis de risco, do mais alto ao mais baixo. A média cai no nível i quando
+# LIMITES_RISCO[i-1] < média <= LIMITES_RISCO[i]; acima do último limite é "Muito Baixo"
+LIMITES_RISCO = [1, 2, 3, 4]
+
+NIVEIS_RISCO = [
+    {"nome": "Risco Muito Alto", "rotulo": "Risco Muito Alto 🔴", "cor": "red",
+     "cor_hex": "#FF6B6B", "cor_texto": "white", "rgb": (255, 107, 107), "prioridade": "Imediata"},
+    {"nome": "Risco Alto", "rotulo": "Risco Alto 🟠", "cor": "orange",
+     "cor_hex": "#FFA500", "cor_texto": "black", "rgb": (255, 165, 0), "prioridade": "Alta"},
+    {"nome": "Risco Moderado", "rotulo": "Risco Moderado 🟡", "cor": "yellow",
+     "cor_hex": "#FFFF00", "cor_texto": "black", "rgb": (255, 255, 0), "prioridade": "Média"},
+    {"nome": "Risco Baixo", "rotulo": "Risco Baixo 🟢", "cor": "green",
+     "cor_hex": "#90EE90", "cor_texto": "black", "rgb": (144, 238, 144), "prioridade": "Baixa"},
+    {"nome": "Risco Muito Baixo", "rotulo": "Risco Muito Baixo 🟣", "cor": "purple",
+     "cor_hex": "#BB8FCE", "cor_texto": "black", "rgb": (187, 143, 206), "prioridade": "Manutenção"}
+]
+
+# Classificação usada quando não há média (dimensão sem respostas válidas)
+NIVEL_SEM_DADOS = {"nome": "Sem dados suficientes", "rotulo": "Sem dados suficientes", "cor": "gray",
+                   "cor_hex": "#FFFFFF", "cor_texto": "black", "rgb": (255, 255, 255), "prioridade": "Não definida"}
+
+# Tamanho máximo aceito no upload (MB). CSVs são lidos em blocos, então o limite
+# acompanha o padrão do Streamlit (server.maxUploadSize)
+TAMANHO_MAXIMO_UPLOAD_MB = 200
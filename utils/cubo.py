@@ -0,0 +1,166 @@
+import numpy as np
+import pandas as pd
+from utils.pontuacao import NUM_QUESTOES, matriz_respostas, somas_por_grupo, dimensoes_presentes
+
+# Cubo de agregados do HSE-IT.
+# Cada célula é uma combinação observada dos valores das colunas demográficas e guarda,
+# por questão, soma, contagem e soma dos quadrados das respostas. Qualquer conjunção de
+# filtros (ex: Setor=X E Cargo=Y) é resolvida somando as células compatíveis, sem
+# voltar às respostas individuais.
+
+def construir_cubo(df, df_perguntas, colunas_filtro, colunas_perguntas):
+    """
+    Constrói o cubo de agregados a partir dos dados carregados.
+
+    Args:
+        df: DataFrame completo (fonte das colunas demográficas)
+        df_perguntas: Respostas numéricas, alinhadas linha a linha com df
+        colunas_filtro: Colunas demográficas disponíveis para filtro
+        colunas_perguntas: Colunas das perguntas
+
+    Returns:
+        Dicionário com as células do cubo e seus agregados
+    """
+    # Colunas de perguntas que caem entre as 7 primeiras não são dimensões do cubo
+    colunas = [
+        col for col in colunas_filtro
+        if col != "Carimbo de data/hora" and col not in colunas_perguntas
+    ]
+    matriz = matriz_respostas(df_perguntas, colunas_perguntas)
+
+    # Codificar cada coluna demográfica (valores ausentes recebem -1)
+    codigos = []
+    categorias = {}
+    for col in colunas:
+        codigos_col, valores = pd.factorize(df[col])
+        codigos.append(codigos_col)
+        categorias[col] = list(valores)
+
+    # Uma célula por combinação observada de códigos
+    if colunas:
+        chaves = np.column_stack(codigos)
+        celulas, codigo_celula = np.unique(chaves, axis=0, return_inverse=True)
+        codigo_celula = codigo_celula.reshape(-1)
+    else:
+        celulas = np.zeros((1, 0), dtype=np.intp)
+        codigo_celula = np.zeros(len(matriz), dtype=np.intp)
+
+    somas, contagens, tamanhos = somas_por_grupo(matriz, codigo_celula, len(celulas))
+    quadrados, _, _ = somas_por_grupo(matriz ** 2, codigo_celula, len(celulas))
+
+    return {
+        "colunas": colunas,
+        "categorias": categorias,
+        "indices": {col: {valor: i for i, valor in enumerate(valores)} for col, valores in categorias.items()},
+        "celulas": celulas,
+        "somas": somas,
+        "contagens": contagens,
+        "quadrados": quadrados,
+        "tamanhos": tamanhos,
+        "presentes": dimensoes_presentes(colunas_perguntas)
+    }
+
+# Linhas por fatia em construir_cubo_em_blocos
+TAMANHO_BLOCO_CUBO = 50_000
+
+def construir_cubo_em_blocos(df, colunas_filtro, colunas_perguntas, tamanho_bloco=TAMANHO_BLOCO_CUBO):
+    """
+    Constrói o cubo do DataFrame em fatias de linhas, somadas com combinar_cubos, para
+    que a matriz de respostas nunca seja montada para o arquivo inteiro de uma vez.
+    Todas as fatias compartilham as categorias finais do DataFrame, então o cubo é o
+    mesmo de construir_cubo, inclusive quando os blocos da leitura tinham tipos
+    diferentes e as categorias foram unificadas como texto.
+    """
+    cubo = None
+    for inicio in range(0, max(len(df), 1), tamanho_bloco):
+        fatia = df.iloc[inicio:inicio + tamanho_bloco]
+        cubo = combinar_cubos(cubo, construir_cubo(fatia, fatia, colunas_filtro, colunas_perguntas))
+    return cubo
+
+def consultar_cubo(cubo, filtros=None):
+    """
+    Agrega as células do cubo que atendem a todos os filtros.
+
+    Args:
+        cubo: Cubo gerado por construir_cubo
+        filtros: Dicionário {coluna: valor} ou {coluna: [valores]}; colunas diferentes
+                 são combinadas com E, valores de uma mesma coluna com OU
+
+    Returns:
+        Dicionário com somas, contagens e quadrados por questão (vetores de tamanho 35)
+        e o número de respondentes selecionados
+    """
+    selecionadas = np.ones(len(cubo["celulas"]), dtype=bool)
+
+    for col, valor in (filtros or {}).items():
+        if col not in cubo["indices"]:
+            raise KeyError(f"Coluna '{col}' não está disponível no cubo de agregados.")
+
+        valores = valor if isinstance(valor, (list, tuple, set)) else [valor]
+        codigos = [cubo["indices"][col][v] for v in valores if v in cubo["indices"][col]]
+        j = cubo["colunas"].index(col)
+        selecionadas &= np.isin(cubo["celulas"][:, j], codigos)
+
+    if not selecionadas.any():
+        return {
+            "somas": np.zeros(NUM_QUESTOES),
+            "contagens": np.zeros(NUM_QUESTOES),
+            "quadrados": np.zeros(NUM_QUESTOES),
+            "tamanho": 0
+        }
+
+    return {
+        "somas": cubo["somas"][selecionadas].sum(axis=0),
+        "contagens": cubo["contagens"][selecionadas].sum(axis=0),
+        "quadrados": cubo["quadrados"][selecionadas].sum(axis=0),
+        "tamanho": int(cubo["tamanhos"][selecionadas].sum())
+    }
+
+def combinar_cubos(cubo_a, cubo_b):
+    """
+    Soma dois cubos construídos sobre as mesmas colunas (ex: blocos de um mesmo
+    arquivo lidos em sequência), unificando as categorias de cada coluna.
+    """
+    if cubo_a is None:
+        return cubo_b
+
+    categorias = {}
+    indices = {}
+    colunas_b = []
+    for j, col in enumerate(cubo_a["colunas"]):
+        categorias[col] = list(cubo_a["categorias"][col])
+        indices[col] = dict(cubo_a["indices"][col])
+
+        # Traduzir os códigos do cubo B para o dicionário de valores do cubo A
+        # (a última posição do mapa preserva o código -1 dos valores ausentes)
+        mapa = np.full(len(cubo_b["categorias"][col]) + 1, -1, dtype=np.intp)
+        for i, valor in enumerate(cubo_b["categorias"][col]):
+            if valor not in indices[col]:
+                indices[col][valor] = len(categorias[col])
+                categorias[col].append(valor)
+            mapa[i] = indices[col][valor]
+
+        colunas_b.append(mapa[cubo_b["celulas"][:, j]])
+
+    celulas_b = np.column_stack(colunas_b) if colunas_b else cubo_b["celulas"]
+    todas = np.concatenate([cubo_a["celulas"], celulas_b])
+    celulas, codigo_celula = np.unique(todas, axis=0, return_inverse=True)
+    codigo_celula = codigo_celula.reshape(-1)
+
+    def somar(chave):
+        valores = np.concatenate([cubo_a[chave], cubo_b[chave]])
+        total = np.zeros((len(celulas),) + valores.shape[1:], dtype=valores.dtype)
+        np.add.at(total, codigo_celula, valores)
+        return total
+
+    return {
+        "colunas": cubo_a["colunas"],
+        "categorias": categorias,
+        "indices": indices,
+        "celulas": celulas,
+        "somas": somar("somas"),
+        "contagens": somar("contagens"),
+        "quadrados": somar("quadrados"),
+        "tamanhos": somar("tamanhos"),
+        "presentes": cubo_a["presentes"]
+    }
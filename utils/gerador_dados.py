@@ -0,0 +1,206 @@
+import os
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+from utils.constantes import DIMENSOES_HSE, QUESTOES_INVERTIDAS, QUESTOES_HSE, COLUNAS_DEMOGRAFICAS_TEMPLATE
+
+# Gerador de conjuntos de respostas sintéticos do HSE-IT, para testes de carga.
+# Os arquivos têm o mesmo layout do template (7 colunas demográficas + 35 questões)
+# e uma estrutura realista: as dimensões são correlacionadas entre si por um fator
+# geral de bem-estar, cada setor desloca as médias das dimensões e as questões
+# invertidas são respondidas na escala original (o inverso da pontuação).
+# Com a mesma semente e os mesmos parâmetros o resultado é sempre idêntico. Uso:
+#
+#     python -m utils.gerador_dados respostas.csv --respondentes 100000 --ausentes 0.05
+
+NUM_RESPONDENTES_MIN = 100
+NUM_RESPONDENTES_MAX = 1_000_000
+
+# Limite de linhas de uma planilha do Excel (descontando o cabeçalho)
+LIMITE_LINHAS_XLSX = 1_048_575
+
+# Respondentes gerados por vez, para limitar a memória das matrizes intermediárias
+TAMANHO_BLOCO_GERACAO = 100_000
+
+# Número de valores distintos de cada coluna demográfica
+CARDINALIDADES_PADRAO = {
+    "Setor": 12,
+    "Cargo": 25,
+    "Tempo_Empresa": 5,
+    "Genero": 3,
+    "Faixa_Etaria": 6,
+    "Escolaridade": 6,
+    "Regime_Trabalho": 4
+}
+
+# Média esperada de cada dimensão na escala de pontuação (1 = pior, 5 = melhor),
+# escolhida para que os resultados caiam em níveis de risco variados
+MEDIAS_DIMENSOES_PADRAO = {
+    "Demanda": 2.6,
+    "Controle": 3.3,
+    "Apoio da Chefia": 3.5,
+    "Apoio dos Colegas": 3.9,
+    "Relacionamentos": 3.7,
+    "Função": 4.2,
+    "Mudança": 3.0
+}
+
+# Desvios da parte individual, do efeito de setor e do ruído de cada questão
+DESVIO_RESPONDENTE = 0.7
+DESVIO_SETOR = 0.35
+DESVIO_QUESTAO = 0.6
+
+def _dimensao_de_cada_questao():
+    dimensoes = list(DIMENSOES_HSE.keys())
+    indices = np.zeros(len(QUESTOES_HSE), dtype=np.intp)
+    for j, questoes in enumerate(DIMENSOES_HSE.values()):
+        indices[np.asarray(questoes) - 1] = j
+    return dimensoes, indices
+
+def _probabilidades_categorias(cardinalidade, assimetria=0.8):
+    # Distribuição assimétrica (tipo Zipf): poucos valores concentram a maioria das respostas
+    pesos = 1.0 / np.arange(1, cardinalidade + 1) ** assimetria
+    return pesos / pesos.sum()
+
+def _valores_categoria(coluna, cardinalidade):
+    largura = len(str(cardinalidade))
+    return [f"{coluna} {i:0{largura}d}" for i in range(1, cardinalidade + 1)]
+
+def gerar_dados_sinteticos(num_respondentes, cardinalidades=None, taxa_ausentes=0.05,
+                           correlacao=0.5, medias_dimensoes=None, semente=42):
+    """
+    Gera um conjunto de respostas do HSE-IT no layout do template.
+
+    Args:
+        num_respondentes: Número de linhas (de 100 a 1.000.000)
+        cardinalidades: Dicionário {coluna demográfica: número de valores}; colunas
+                        omitidas usam CARDINALIDADES_PADRAO
+        taxa_ausentes: Fração das respostas deixadas em branco (0 a 1)
+        correlacao: Correlação entre as dimensões de um mesmo respondente (0 a 1)
+        medias_dimensoes: Médias esperadas por dimensão; padrão MEDIAS_DIMENSOES_PADRAO
+        semente: Semente do gerador aleatório
+
+    Returns:
+        DataFrame com as colunas demográficas (categóricas) e as 35 questões (Int8)
+    """
+    if not NUM_RESPONDENTES_MIN <= num_respondentes <= NUM_RESPONDENTES_MAX:
+        raise ValueError(
+            f"O número de respondentes deve estar entre {NUM_RESPONDENTES_MIN} e {NUM_RESPONDENTES_MAX}."
+        )
+    if not 0 <= taxa_ausentes < 1:
+        raise ValueError("A taxa de respostas ausentes deve estar entre 0 e 1.")
+    if not 0 <= correlacao <= 1:
+        raise ValueError("A correlação entre dimensões deve estar entre 0 e 1.")
+
+    cardinalidades = {**CARDINALIDADES_PADRAO, **(cardinalidades or {})}
+    medias_dimensoes = {**MEDIAS_DIMENSOES_PADRAO, **(medias_dimensoes or {})}
+    dimensoes, dimensao_questao = _dimensao_de_cada_questao()
+    medias = np.array([medias_dimensoes[d] for d in dimensoes])
+    invertidas = np.asarray(QUESTOES_INVERTIDAS) - 1
+
+    rng = np.random.default_rng(semente)
+
+    # Deslocamento das médias das dimensões em cada setor, sorteado uma única vez
+    efeito_setor = rng.normal(0, DESVIO_SETOR, (cardinalidades["Setor"], len(dimensoes)))
+
+    codigos = {col: [] for col in COLUNAS_DEMOGRAFICAS_TEMPLATE}
+    blocos_respostas = []
+
+    for inicio in range(0, num_respondentes, TAMANHO_BLOCO_GERACAO):
+        n = min(TAMANHO_BLOCO_GERACAO, num_respondentes - inicio)
+
+        for col in COLUNAS_DEMOGRAFICAS_TEMPLATE:
+            k = cardinalidades[col]
+            codigos[col].append(rng.choice(k, n, p=_probabilidades_categorias(k)).astype(np.int32))
+
+        # Nível de cada dimensão por respondente: fator geral + fator próprio da dimensão
+        geral = rng.standard_normal((n, 1))
+        proprio = rng.standard_normal((n, len(dimensoes)))
+        niveis = (
+            medias
+            + efeito_setor[codigos["Setor"][-1]]
+            + DESVIO_RESPONDENTE * (np.sqrt(correlacao) * geral + np.sqrt(1 - correlacao) * proprio)
+        )
+
+        # Pontuação de cada questão na escala 1-5; as invertidas são gravadas como respondidas
+        pontuacao = niveis[:, dimensao_questao] + rng.normal(0, DESVIO_QUESTAO, (n, len(QUESTOES_HSE)))
+        respostas = np.clip(np.rint(pontuacao), 1, 5).astype(np.int8)
+        respostas[:, invertidas] = 6 - respostas[:, invertidas]
+
+        ausentes = rng.random(respostas.shape) < taxa_ausentes
+        blocos_respostas.append((respostas, ausentes))
+
+    respostas = np.concatenate([r for r, _ in blocos_respostas])
+    ausentes = np.concatenate([a for _, a in blocos_respostas])
+
+    dados = {
+        col: pd.Categorical.from_codes(
+            np.concatenate(codigos[col]), _valores_categoria(col, cardinalidades[col])
+        )
+        for col in COLUNAS_DEMOGRAFICAS_TEMPLATE
+    }
+    for q, cabecalho in enumerate(QUESTOES_HSE):
+        dados[cabecalho] = pd.arrays.IntegerArray(respostas[:, q].copy(), ausentes[:, q].copy())
+
+    return pd.DataFrame(dados)
+
+def salvar_dados(df, caminho, separador=','):
+    """
+    Grava o conjunto de dados no formato indicado pela extensão (.csv, .xlsx ou .parquet).
+    """
+    extensao = os.path.splitext(caminho)[1].lower()
+    diretorio = os.path.dirname(caminho)
+    if diretorio:
+        os.makedirs(diretorio, exist_ok=True)
+
+    if extensao == '.csv':
+        df.to_csv(caminho, index=False, sep=separador)
+    elif extensao == '.xlsx':
+        if len(df) > LIMITE_LINHAS_XLSX:
+            raise ValueError(f"Arquivos Excel comportam no máximo {LIMITE_LINHAS_XLSX} respondentes.")
+        df.to_excel(caminho, index=False, engine='xlsxwriter')
+    elif extensao == '.parquet':
+        df.to_parquet(caminho, index=False)
+    else:
+        raise ValueError(f"Formato não suportado: '{extensao}'. Use .csv, .xlsx ou .parquet.")
+
+    return caminho
+
+def _ler_cardinalidade(texto):
+    coluna, _, valor = texto.partition('=')
+    if coluna not in CARDINALIDADES_PADRAO or not valor.isdigit() or int(valor) < 1:
+        raise argparse.ArgumentTypeError(
+            f"Use COLUNA=N com uma das colunas {', '.join(CARDINALIDADES_PADRAO)} e N >= 1."
+        )
+    return coluna, int(valor)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m utils.gerador_dados",
+        description="Gera respostas sintéticas do HSE-IT no layout do template."
+    )
+    parser.add_argument("saida", nargs='+', help="Arquivo(s) de saída: .csv, .xlsx ou .parquet")
+    parser.add_argument("-n", "--respondentes", type=int, default=1000, help="Número de respondentes (100 a 1.000.000)")
+    parser.add_argument("--ausentes", type=float, default=0.05, help="Fração de respostas em branco (padrão: 0.05)")
+    parser.add_argument("--correlacao", type=float, default=0.5, help="Correlação entre dimensões (padrão: 0.5)")
+    parser.add_argument("--cardinalidade", type=_ler_cardinalidade, action='append', default=[],
+                        metavar="COLUNA=N", help="Número de valores de uma coluna demográfica (ex: Setor=50)")
+    parser.add_argument("--separador", default=',', help="Separador dos arquivos CSV (padrão: ',')")
+    parser.add_argument("--semente", type=int, default=42, help="Semente do gerador aleatório")
+    args = parser.parse_args(argv)
+
+    try:
+        df = gerar_dados_sinteticos(
+            args.respondentes, dict(args.cardinalidade), args.ausentes, args.correlacao, semente=args.semente
+        )
+        for caminho in args.saida:
+            salvar_dados(df, caminho, args.separador)
+            print(f"{caminho}: {len(df)} respondentes")
+    except ValueError as e:
+        parser.error(str(e))
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+import os
+import sys
+import json
+import time
+import logging
+import threading
+from functools import wraps
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Instrumentação das execuções (reruns) das páginas.
+# As etapas medidas (carregamento, cálculo, gráficos, relatórios) somam seu tempo às
+# estatísticas do processo e à execução de página em andamento na thread; as consultas
+# aos caches contam acertos e falhas do mesmo modo. Cada etapa de uma execução de
+# página vai para um log rotativo em JSON Lines, e o resumo da execução (tempo, caches
+# e memória) é gravado quando a sessão inicia a execução seguinte. Etapas fora de uma
+# execução de página (pré-cálculo, processos do pacote de relatórios, lote) só entram
+# nas estatísticas do processo.
+
+CAMINHO_LOG_INSTRUMENTACAO = "data/logs/instrumentacao.log"
+
+# Tamanho de cada arquivo do log e número de arquivos antigos mantidos
+TAMANHO_LOG_MB = 5
+ARQUIVOS_LOG = 3
+
+_trava = threading.Lock()
+_trava_log = threading.Lock()
+_local = threading.local()
+_etapas = {}
+_caches = {}
+_logger = None
+
+def _log():
+    global _logger
+    with _trava_log:
+        if _logger is None:
+            logger = logging.getLogger("escutaris.instrumentacao")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            try:
+                diretorio = os.path.dirname(CAMINHO_LOG_INSTRUMENTACAO)
+                if diretorio:
+                    os.makedirs(diretorio, exist_ok=True)
+                manipulador = RotatingFileHandler(
+                    CAMINHO_LOG_INSTRUMENTACAO, maxBytes=TAMANHO_LOG_MB * 1024 * 1024,
+                    backupCount=ARQUIVOS_LOG, encoding='utf-8'
+                )
+                manipulador.setFormatter(logging.Formatter("%(message)s"))
+            except OSError as e:
+                print(f"Erro ao abrir o log de instrumentação: {str(e)}")
+                manipulador = logging.NullHandler()
+            logger.addHandler(manipulador)
+            _logger = logger
+        return _logger
+
+def _gravar(evento):
+    evento = {"momento": datetime.now().isoformat(timespec='milliseconds'), **evento}
+    _log().info(json.dumps(evento, ensure_ascii=False, default=str))
+
+def iniciar_execucao(sessao, pagina):
+    """
+    Inicia o registro de uma execução de página na thread atual.
+
+    Returns:
+        Dicionário da execução, a ser passado para finalizar_execucao
+    """
+    execucao = {
+        "sessao": sessao,
+        "pagina": pagina,
+        "inicio": time.perf_counter(),
+        "fim": time.perf_counter(),
+        "etapas": {},
+        "caches": {}
+    }
+    _local.execucao = execucao
+    return execucao
+
+def finalizar_execucao(execucao, memoria_sessao_mb=None):
+    """
+    Grava no log o resumo de uma execução de página. A duração vai até o fim da
+    última etapa medida.
+
+    Returns:
+        Resumo gravado
+    """
+    if getattr(_local, "execucao", None) is execucao:
+        _local.execucao = None
+
+    resumo = {
+        "evento": "execucao",
+        "sessao": execucao["sessao"],
+        "pagina": execucao["pagina"],
+        "duracao_s": round(execucao["fim"] - execucao["inicio"], 6),
+        "etapas": execucao["etapas"],
+        "caches": execucao["caches"],
+        "memoria_sessao_mb": memoria_sessao_mb,
+        "memoria_processo_mb": memoria_processo_mb()
+    }
+    try:
+        _gravar(resumo)
+    except Exception as e:
+        print(f"Erro ao gravar log de instrumentação: {str(e)}")
+    return resumo
+
+def _registrar_etapa(etapa, tempo):
+    with _trava:
+        total = _etapas.setdefault(etapa, {"chamadas": 0, "total_s": 0.0, "max_s": 0.0})
+        total["chamadas"] += 1
+        total["total_s"] += tempo
+        total["max_s"] = max(total["max_s"], tempo)
+
+    execucao = getattr(_local, "execucao", None)
+    if execucao is None:
+        return
+
+    registro = execucao["etapas"].setdefault(etapa, {"chamadas": 0, "total_s": 0.0})
+    registro["chamadas"] += 1
+    registro["total_s"] = round(registro["total_s"] + tempo, 6)
+    execucao["fim"] = time.perf_counter()
+    try:
+        _gravar({
+            "evento": "etapa", "sessao": execucao["sessao"], "pagina": execucao["pagina"],
+            "etapa": etapa, "tempo_s": round(tempo, 6)
+        })
+    except Exception as e:
+        print(f"Erro ao gravar log de instrumentação: {str(e)}")
+
+@contextmanager
+def medir(etapa):
+    """Mede o tempo do bloco como uma execução da etapa."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        _registrar_etapa(etapa, time.perf_counter() - inicio)
+
+def cronometrar(etapa):
+    """Decorador que mede cada chamada da função como uma execução da etapa."""
+    def decorador(funcao):
+        @wraps(funcao)
+        def medida(*args, **kwargs):
+            with medir(etapa):
+                return funcao(*args, **kwargs)
+        return medida
+    return decorador
+
+def registrar_cache(nome, acerto):
+    """Conta uma consulta ao cache nome como acerto ou falha."""
+    chave = "acertos" if acerto else "falhas"
+    with _trava:
+        _caches.setdefault(nome, {"acertos": 0, "falhas": 0})[chave] += 1
+
+    execucao = getattr(_local, "execucao", None)
+    if execucao is not None:
+        execucao["caches"].setdefault(nome, {"acertos": 0, "falhas": 0})[chave] += 1
+
+@contextmanager
+def consulta_cache(nome):
+    """
+    Conta uma chamada a uma função com st.cache_data: é um acerto, a menos que a
+    função chame marcar_falha_cache (ou seja, seja executada) dentro do bloco.
+    """
+    anterior = getattr(_local, "falha_cache", None)
+    _local.falha_cache = False
+    try:
+        yield
+    finally:
+        falhou = _local.falha_cache
+        _local.falha_cache = anterior
+        registrar_cache(nome, not falhou)
+
+def marcar_falha_cache():
+    """Chamada no corpo de uma função em cache: indica que o cache não tinha o resultado."""
+    _local.falha_cache = True
+
+def estatisticas():
+    """
+    Returns:
+        Dicionário com os totais do processo: {"etapas": {etapa: {chamadas, total_s,
+        media_s, max_s}}, "caches": {nome: {acertos, falhas, taxa_acertos}}}
+    """
+    with _trava:
+        etapas = {etapa: dict(total) for etapa, total in _etapas.items()}
+        caches = {nome: dict(total) for nome, total in _caches.items()}
+
+    for total in etapas.values():
+        total["media_s"] = total["total_s"] / total["chamadas"]
+    for total in caches.values():
+        consultas = total["acertos"] + total["falhas"]
+        total["taxa_acertos"] = total["acertos"] / consultas if consultas else None
+    return {"etapas": etapas, "caches": caches}
+
+def tamanho_mb(valor):
+    """Memória aproximada de um valor (DataFrames, arquivos em memória e demais objetos), em MB."""
+    if hasattr(valor, "memory_usage") and hasattr(valor, "columns"):
+        tamanho = int(valor.memory_usage(index=True, deep=True).sum())
+    elif hasattr(valor, "getbuffer"):
+        tamanho = valor.getbuffer().nbytes
+    else:
+        tamanho = sys.getsizeof(valor)
+    return tamanho / (1024 * 1024)
+
+def memoria_processo_mb():
+    """Memória residente atual do processo (pico, se a atual não estiver disponível), em MB."""
+    try:
+        with open("/proc/self/statm", 'r') as f:
+            paginas = int(f.read().split()[1])
+        return round(paginas * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 1)
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss é medido em bytes no macOS e em KB nos demais sistemas
+    return round(pico / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
@@ -0,0 +1,398 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from utils.cubo import construir_cubo, construir_cubo_em_blocos
+from utils.cache_arquivos import ler_cache, gravar_cache
+from utils.instrumentacao import registrar_cache
+
+# Leitura dos arquivos de respostas do HSE-IT, sem dependência do Streamlit.
+
+# Bytes lidos do início do arquivo para detectar cabeçalho e separador
+TAMANHO_AMOSTRA = 64 * 1024
+
+# Linhas por bloco na leitura incremental de CSV
+TAMANHO_BLOCO = 50_000
+
+# Linhas por bloco na leitura de planilhas .xlsx: menor que o de CSV, porque a
+# leitura da planilha é bem mais lenta e o andamento é mostrado a cada bloco
+TAMANHO_BLOCO_EXCEL = 5_000
+
+class ErroCarregamento(ValueError):
+    """Arquivo de respostas inválido; `dica` traz uma orientação opcional ao usuário."""
+
+    def __init__(self, mensagem, dica=None):
+        super().__init__(mensagem)
+        self.dica = dica
+
+def detectar_separador(arquivo, tamanho_amostra=TAMANHO_AMOSTRA):
+    """
+    Detecta o separador (vírgula ou ponto-e-vírgula) lendo apenas os primeiros bytes
+    do arquivo. A posição de leitura é restaurada ao final.
+    """
+    posicao = arquivo.tell()
+    amostra = arquivo.read(tamanho_amostra)
+    arquivo.seek(posicao)
+
+    if isinstance(amostra, bytes):
+        amostra = amostra.decode('utf-8', errors='replace')
+
+    cabecalho = amostra.splitlines()[0] if amostra else ""
+    return ';' if ';' in cabecalho else ','
+
+def identificar_colunas(colunas):
+    """
+    Separa as colunas demográficas (até as 7 primeiras, sem o carimbo de data/hora)
+    das colunas de perguntas (cabeçalhos que começam com número).
+    """
+    colunas_filtro = list(colunas[:7])
+    if "Carimbo de data/hora" in colunas_filtro:
+        colunas_filtro.remove("Carimbo de data/hora")
+
+    colunas_perguntas = [col for col in colunas if str(col).strip() and str(col).strip()[0].isdigit()]
+    return colunas_filtro, colunas_perguntas
+
+# Faixa em que respostas inteiras são guardadas como Int8; a margem garante que a
+# inversão (6 - x) também caiba no tipo
+FAIXA_INT8 = (-100, 100)
+
+def converter_respostas(df, colunas_perguntas):
+    """
+    Converte as colunas de perguntas para numérico no próprio DataFrame, no tipo
+    mais compacto possível: Int8 anulável para respostas inteiras (escala Likert)
+    e float32 quando houver valores fracionários ou fora da faixa.
+    """
+    for col in colunas_perguntas:
+        valores = pd.to_numeric(df[col], errors='coerce')
+        validos = valores.dropna()
+        inteiros = (
+            validos.empty
+            or ((validos % 1 == 0).all()
+                and validos.min() >= FAIXA_INT8[0] and validos.max() <= FAIXA_INT8[1])
+        )
+        df[col] = valores.astype("Int8" if inteiros else "float32")
+    return df
+
+def categorizar_demograficas(df, colunas_filtro, colunas_perguntas):
+    """Converte as colunas demográficas de texto em categóricas no próprio DataFrame."""
+    for col in colunas_filtro:
+        if col not in colunas_perguntas and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+    return df
+
+def normalizar_dados(df, colunas_filtro, colunas_perguntas):
+    """Aplica os tipos compactos a um DataFrame recém-lido."""
+    converter_respostas(df, colunas_perguntas)
+    categorizar_demograficas(df, colunas_filtro, colunas_perguntas)
+    return df
+
+def _categorias_como_texto(categorica):
+    # Valores que viram o mesmo texto (ex: 1 e "1" em um bloco de planilha) passam a
+    # ser uma única categoria
+    textos = pd.Index([str(valor) for valor in categorica.categories])
+    categorias = textos.unique()
+    mapa = np.append(categorias.get_indexer(textos), -1)
+    return pd.Categorical.from_codes(mapa[categorica.codes], categories=categorias)
+
+def unir_categoricas(partes, tamanhos):
+    """
+    Une as partes de uma coluna categórica (blocos de um arquivo ou arquivos combinados).
+    Partes ausentes (None) ou sem nenhum valor entram como valores ausentes; se as
+    categorias tiverem tipos diferentes entre as partes (ex: números em um bloco,
+    números e textos em outro), todas são unificadas como texto.
+
+    Args:
+        partes: Séries (ou None) de cada parte, na ordem
+        tamanhos: Número de linhas de cada parte
+    """
+    categoricas = [pd.Categorical(parte) if parte is not None else None for parte in partes]
+    tipos = {categorica.categories.dtype for categorica in categoricas if categorica is not None and len(categorica.categories)}
+    if len(tipos) > 1:
+        categoricas = [
+            _categorias_como_texto(categorica)
+            if categorica is not None and len(categorica.categories) else None
+            for categorica in categoricas
+        ]
+    tipo = next(
+        (categorica.categories.dtype for categorica in categoricas if categorica is not None and len(categorica.categories)),
+        np.dtype(object)
+    )
+
+    categoricas = [
+        categorica if categorica is not None and len(categorica.categories)
+        else pd.Categorical.from_codes(np.full(tamanho, -1, dtype=np.int8), categories=pd.Index([], dtype=tipo))
+        for categorica, tamanho in zip(categoricas, tamanhos)
+    ]
+    return union_categoricals(categoricas, ignore_order=True)
+
+def unir_respostas(partes, tamanhos):
+    """
+    Une as partes de uma coluna de respostas com um único tipo para a coluna inteira:
+    Int8 se todas as partes tiverem respostas inteiras, senão float32, como em
+    converter_respostas. Partes ausentes (None) entram como valores ausentes.
+    """
+    inteiras = all(parte is None or parte.dtype == "Int8" for parte in partes)
+    tipo = "Int8" if inteiras else "float32"
+    series = [
+        parte.astype(tipo) if parte is not None
+        else pd.Series(pd.array([pd.NA] * tamanho, dtype="Int8")) if inteiras
+        else pd.Series(np.full(tamanho, np.nan, dtype=np.float32))
+        for parte, tamanho in zip(partes, tamanhos)
+    ]
+    return pd.concat(series, ignore_index=True)
+
+def concatenar_blocos(blocos, colunas_perguntas=()):
+    """
+    Concatena blocos já normalizados coluna a coluna. As categorias de cada coluna
+    categórica são unificadas sem passar por colunas de texto intermediárias, e cada
+    coluna de respostas recebe um único tipo para o arquivo inteiro (um bloco com
+    valores fracionários leva a coluna toda para float32).
+
+    A lista de blocos é consumida: as colunas de cada bloco são liberadas assim que
+    a coluna final correspondente é montada, de modo que o pico de memória fica em
+    torno do DataFrame final mais uma coluna, e não o dobro do DataFrame.
+    """
+    if len(blocos) == 1:
+        return blocos.pop()
+
+    colunas = list(blocos[0].columns)
+    tamanhos = [len(bloco) for bloco in blocos]
+    partes_blocos = [dict(bloco.items()) for bloco in blocos]
+    blocos.clear()
+
+    perguntas = set(colunas_perguntas)
+    df_colunas = {}
+    for col in colunas:
+        partes = [partes_bloco.pop(col) for partes_bloco in partes_blocos]
+        if col in perguntas:
+            df_colunas[col] = unir_respostas(partes, tamanhos)
+        elif all(isinstance(parte.dtype, pd.CategoricalDtype) for parte in partes):
+            df_colunas[col] = unir_categoricas(partes, tamanhos)
+        else:
+            df_colunas[col] = pd.concat(partes, ignore_index=True)
+        # Liberar as partes antes de montar a próxima coluna
+        del partes
+
+    return pd.DataFrame(df_colunas, copy=False)
+
+def ler_csv_em_blocos(arquivo, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Lê um CSV em blocos de linhas, já com os tipos compactos aplicados, e monta o
+    cubo de agregados a partir do DataFrame concatenado.
+
+    O texto bruto de um bloco é descartado assim que o bloco é convertido: o pico de
+    memória fica em torno de um bloco bruto mais o DataFrame compacto (e uma coluna
+    durante a concatenação), e não do arquivo inteiro como texto. O DataFrame
+    completo continua sendo montado, porque as telas de análise precisam das linhas.
+
+    O cubo não é somado bloco a bloco durante a leitura: se o tipo de uma coluna
+    demográfica mudar entre blocos, as categorias só são unificadas na concatenação,
+    e o cubo precisa usar as mesmas categorias do DataFrame (e do cache Parquet).
+
+    Returns:
+        Tupla (df, colunas_filtro, colunas_perguntas, cubo); df é None se o arquivo
+        estiver vazio
+    """
+    arquivo.seek(0)
+    separador = detectar_separador(arquivo)
+
+    blocos = []
+    colunas_filtro, colunas_perguntas = [], []
+
+    for bloco in pd.read_csv(arquivo, sep=separador, chunksize=tamanho_bloco):
+        if not blocos:
+            colunas_filtro, colunas_perguntas = identificar_colunas(list(bloco.columns))
+            if not colunas_perguntas:
+                # Sem perguntas identificadas: devolver apenas o primeiro bloco para diagnóstico
+                return bloco, colunas_filtro, colunas_perguntas, None
+
+        normalizar_dados(bloco, colunas_filtro, colunas_perguntas)
+        blocos.append(bloco)
+
+    if not blocos:
+        return None, colunas_filtro, colunas_perguntas, None
+
+    df = concatenar_blocos(blocos, colunas_perguntas)
+    return df, colunas_filtro, colunas_perguntas, construir_cubo_em_blocos(df, colunas_filtro, colunas_perguntas)
+
+def _nomes_colunas(cabecalho):
+    # Mesmos nomes que o pandas daria: "Unnamed: i" para células vazias e sufixo
+    # ".1", ".2"... para cabeçalhos repetidos
+    nomes = []
+    for i, valor in enumerate(cabecalho):
+        nome = f"Unnamed: {i}" if valor is None or str(valor).strip() == "" else valor
+        base, sufixo = nome, 1
+        while nome in nomes:
+            nome = f"{base}.{sufixo}"
+            sufixo += 1
+        nomes.append(nome)
+    return nomes
+
+def ler_excel_em_blocos(arquivo, tamanho_bloco=TAMANHO_BLOCO_EXCEL, ao_progredir=None):
+    """
+    Lê a primeira planilha de um arquivo .xlsx em modo somente leitura, linha a
+    linha, sem montar a planilha inteira na memória. A cada bloco de linhas os
+    valores são transpostos em colunas e convertidos para os tipos compactos; o cubo
+    de agregados é montado do DataFrame concatenado, como em ler_csv_em_blocos. Como
+    os blocos são pequenos, é comum uma coluna demográfica vir vazia ou com tipos
+    diferentes em alguns deles: categorias e tipos das respostas são unificados na
+    concatenação (concatenar_blocos).
+
+    Args:
+        ao_progredir: Função opcional chamada com (linhas lidas, total de linhas ou
+                      None se a planilha não informar suas dimensões) a cada bloco
+
+    Returns:
+        Tupla (df, colunas_filtro, colunas_perguntas, cubo); df é None se a planilha
+        estiver vazia
+    """
+    from openpyxl import load_workbook
+
+    arquivo.seek(0)
+    pasta = load_workbook(arquivo, read_only=True, data_only=True, keep_links=False)
+    try:
+        planilha = pasta.worksheets[0]
+        total = planilha.max_row - 1 if planilha.max_row else None
+        linhas = planilha.iter_rows(values_only=True)
+
+        # Cabeçalho sem as células vazias à direita
+        cabecalho = list(next(linhas, ()))
+        while cabecalho and cabecalho[-1] is None:
+            cabecalho.pop()
+        if not cabecalho:
+            return None, [], [], None
+
+        colunas = _nomes_colunas(cabecalho)
+        colunas_filtro, colunas_perguntas = identificar_colunas(colunas)
+        num_colunas = len(colunas)
+
+        blocos = []
+        lidas = 0
+        buffer = []
+
+        def fechar_bloco():
+            # Transpor as linhas do bloco em uma lista de valores por coluna
+            bloco = pd.DataFrame(dict(zip(colunas, map(list, zip(*buffer)))), columns=colunas)
+            buffer.clear()
+            if colunas_perguntas:
+                normalizar_dados(bloco, colunas_filtro, colunas_perguntas)
+            blocos.append(bloco)
+            if ao_progredir:
+                ao_progredir(lidas, total)
+
+        for linha in linhas:
+            # Linhas totalmente vazias não são respostas
+            if not any(valor is not None for valor in linha):
+                continue
+            if len(linha) != num_colunas:
+                linha = (tuple(linha) + (None,) * num_colunas)[:num_colunas]
+            buffer.append(linha)
+            lidas += 1
+            if len(buffer) >= tamanho_bloco:
+                fechar_bloco()
+                if not colunas_perguntas:
+                    # Sem perguntas identificadas: devolver apenas o primeiro bloco para diagnóstico
+                    return blocos[0], colunas_filtro, colunas_perguntas, None
+
+        if buffer:
+            fechar_bloco()
+    finally:
+        pasta.close()
+
+    if not blocos:
+        return None, colunas_filtro, colunas_perguntas, None
+    if not colunas_perguntas:
+        return blocos[0], colunas_filtro, colunas_perguntas, None
+
+    df = concatenar_blocos(blocos, colunas_perguntas)
+    return df, colunas_filtro, colunas_perguntas, construir_cubo_em_blocos(df, colunas_filtro, colunas_perguntas)
+
+def carregar_arquivo(arquivo, nome_arquivo, chave=None, ao_progredir=None):
+    """
+    Lê e valida um arquivo de respostas (CSV ou Excel) e monta o cubo de agregados.
+    Usada tanto pela página de upload quanto pelo processamento em lote.
+
+    Args:
+        arquivo: Caminho ou objeto de arquivo binário
+        nome_arquivo: Nome original, usado para identificar o formato
+        chave: Hash do conteúdo; quando informado, o cache Parquet em disco é consultado
+               e atualizado
+        ao_progredir: Função opcional chamada com (linhas lidas, total ou None) durante
+                      a leitura de planilhas .xlsx
+
+    Returns:
+        Tupla (df, colunas_filtro, colunas_perguntas, cubo)
+
+    Raises:
+        ErroCarregamento: se o arquivo não puder ser lido ou não tiver o formato esperado
+    """
+    em_cache = ler_cache(chave) if chave else None
+    if chave:
+        registrar_cache("uploads", em_cache is not None)
+
+    if em_cache is not None:
+        df, colunas_filtro, colunas_perguntas = em_cache
+        cubo = construir_cubo_em_blocos(df, colunas_filtro, colunas_perguntas)
+    elif nome_arquivo.lower().endswith('.csv'):
+        # Separador detectado a partir dos primeiros bytes; conteúdo lido em blocos
+        try:
+            if isinstance(arquivo, str):
+                with open(arquivo, 'rb') as f:
+                    df, colunas_filtro, colunas_perguntas, cubo = ler_csv_em_blocos(f)
+            else:
+                df, colunas_filtro, colunas_perguntas, cubo = ler_csv_em_blocos(arquivo)
+        except Exception as e:
+            raise ErroCarregamento(
+                f"Erro ao carregar arquivo CSV: {str(e)}",
+                "Certifique-se de que o arquivo está no formato .csv correto, separado por vírgula ou ponto-e-vírgula."
+            ) from e
+    elif nome_arquivo.lower().endswith(('.xlsx', '.xlsm')):
+        # Planilha lida em modo somente leitura, em blocos de linhas
+        try:
+            if isinstance(arquivo, str):
+                with open(arquivo, 'rb') as f:
+                    df, colunas_filtro, colunas_perguntas, cubo = ler_excel_em_blocos(f, ao_progredir=ao_progredir)
+            else:
+                df, colunas_filtro, colunas_perguntas, cubo = ler_excel_em_blocos(arquivo, ao_progredir=ao_progredir)
+        except Exception as e:
+            raise ErroCarregamento(
+                f"Erro ao carregar arquivo Excel: {str(e)}",
+                "Certifique-se de que o arquivo está no formato .xlsx ou .xls correto."
+            ) from e
+    else:
+        # Formato .xls (xlrd), lido de uma vez
+        try:
+            df = pd.read_excel(arquivo)
+        except Exception as e:
+            raise ErroCarregamento(
+                f"Erro ao carregar arquivo Excel: {str(e)}",
+                "Certifique-se de que o arquivo está no formato .xlsx ou .xls correto."
+            ) from e
+
+        colunas_filtro, colunas_perguntas = identificar_colunas(list(df.columns))
+        cubo = None
+        if len(df) > 0 and colunas_perguntas:
+            normalizar_dados(df, colunas_filtro, colunas_perguntas)
+            cubo = construir_cubo(df, df, colunas_filtro, colunas_perguntas)
+
+    # Verificar se o DataFrame foi carregado corretamente
+    if df is None or len(df) == 0:
+        raise ErroCarregamento("Não foi possível carregar dados do arquivo ou o arquivo está vazio.")
+
+    # Verificar se foram encontradas colunas de perguntas
+    if len(colunas_perguntas) == 0:
+        raise ErroCarregamento(
+            "Não foram encontradas colunas de perguntas no formato correto (começando com números).",
+            "O arquivo deve conter perguntas do HSE-IT no formato '1. Pergunta...'"
+        )
+
+    # Guardar o resultado normalizado para próximos envios do mesmo arquivo
+    if chave and em_cache is None:
+        gravar_cache(chave, df, colunas_filtro, colunas_perguntas)
+
+    return df, colunas_filtro, colunas_perguntas, cubo
+
+def percentual_respostas_ausentes(df_perguntas):
+    """Percentual de respostas em branco ou inválidas entre todas as células de perguntas."""
+    if df_perguntas.size == 0:
+        return 0.0
+    return df_perguntas.isna().sum().sum() / df_perguntas.size * 100
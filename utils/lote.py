@@ -0,0 +1,208 @@
+import os
+import sys
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from utils.leitura import carregar_arquivo, percentual_respostas_ausentes, ErroCarregamento
+from utils.cache_arquivos import hash_conteudo
+from utils.pontuacao import NOMES_DIMENSOES, calcular_resultados_gerais, classificar_riscos
+
+# Processamento em lote do HSE-IT, sem Streamlit.
+# Pontua todos os arquivos de respostas de um diretório (um arquivo por empresa)
+# distribuindo-os entre processos, grava os resultados de cada empresa e um resumo
+# consolidado. Uso:
+#
+#     python -m utils.lote <diretorio> [--saida DIR] [--processos N] [--formato csv|xlsx]
+
+EXTENSOES_ACEITAS = ('.csv', '.xlsx', '.xls')
+
+# Colunas gravadas no arquivo de resultados de cada empresa
+COLUNAS_RESULTADO = ["Dimensão", "Descrição", "Média", "Risco", "Número de Respostas"]
+
+# Ordem das colunas do resumo consolidado (uma linha por empresa)
+COLUNAS_RESUMO = (
+    ["Empresa", "Arquivo", "Respostas", "% Ausente"] + NOMES_DIMENSOES
+    + ["Média Geral", "Risco Geral", "Status", "Tempo (s)"]
+)
+
+def listar_arquivos(diretorio):
+    """Lista os arquivos de respostas do diretório, ignorando ocultos e temporários do Excel."""
+    return sorted(
+        os.path.join(diretorio, nome)
+        for nome in os.listdir(diretorio)
+        if nome.lower().endswith(EXTENSOES_ACEITAS)
+        and not nome.startswith(('.', '~$'))
+        and os.path.isfile(os.path.join(diretorio, nome))
+    )
+
+def nomes_empresas(caminhos):
+    """
+    Nome de saída de cada arquivo: o nome sem extensão, ou com a extensão quando
+    dois arquivos tiverem o mesmo nome (ex: empresa.csv e empresa.xlsx).
+    """
+    bases = [os.path.splitext(os.path.basename(caminho))[0] for caminho in caminhos]
+    return [
+        base if bases.count(base) == 1 else os.path.basename(caminho).replace('.', '_')
+        for base, caminho in zip(bases, caminhos)
+    ]
+
+def gravar_tabela(df, caminho_base, formato):
+    """Grava a tabela em CSV (separador ';', legível pelo Excel) ou XLSX e devolve o caminho."""
+    if formato == 'xlsx':
+        caminho = caminho_base + ".xlsx"
+        df.to_excel(caminho, index=False, engine='xlsxwriter')
+    else:
+        caminho = caminho_base + ".csv"
+        df.to_csv(caminho, index=False, sep=';', encoding='utf-8-sig')
+    return caminho
+
+def pontuar_arquivo(caminho, empresa, diretorio_saida, formato='csv', usar_cache=False):
+    """
+    Pontua um arquivo de respostas e grava os resultados por dimensão da empresa.
+    Executada nos processos do pool: recebe e devolve apenas tipos simples.
+
+    Returns:
+        Dicionário com a linha do resumo consolidado (Status "OK" ou a mensagem de erro)
+    """
+    inicio = time.perf_counter()
+    nome_arquivo = os.path.basename(caminho)
+    resumo = {"Empresa": empresa, "Arquivo": nome_arquivo}
+
+    try:
+        chave = None
+        if usar_cache:
+            with open(caminho, 'rb') as f:
+                chave = hash_conteudo(f)
+
+        df, _, colunas_perguntas, _ = carregar_arquivo(caminho, nome_arquivo, chave)
+    except ErroCarregamento as e:
+        resumo["Status"] = f"Erro: {str(e)}"
+        return resumo
+
+    df_perguntas = df[colunas_perguntas]
+    resultados = calcular_resultados_gerais(df_perguntas, colunas_perguntas)
+
+    df_resultados = pd.DataFrame(resultados)[COLUNAS_RESULTADO]
+    gravar_tabela(df_resultados, os.path.join(diretorio_saida, f"{empresa}_resultados"), formato)
+
+    # Linha do resumo: uma coluna por dimensão, mais a média geral e seu risco
+    media_geral = df_resultados["Média"].astype(float).mean()
+    resumo["Respostas"] = len(df)
+    resumo["% Ausente"] = round(percentual_respostas_ausentes(df_perguntas), 1)
+    for res in resultados:
+        resumo[res["Dimensão"]] = res["Média"]
+    resumo["Média Geral"] = round(media_geral, 2)
+    resumo["Risco Geral"] = classificar_riscos([media_geral])["rotulo"][0]
+    resumo["Status"] = "OK"
+    resumo["Tempo (s)"] = round(time.perf_counter() - inicio, 2)
+    return resumo
+
+def processar_lote(caminhos, diretorio_saida, processos=None, formato='csv', usar_cache=False, ao_concluir=None):
+    """
+    Pontua vários arquivos em paralelo e grava o resumo consolidado.
+
+    Args:
+        caminhos: Arquivos de respostas (um por empresa)
+        diretorio_saida: Diretório dos resultados (criado se necessário)
+        processos: Número de processos; padrão é o número de CPUs. Com 1, tudo roda
+                   no processo atual
+        formato: 'csv' ou 'xlsx'
+        usar_cache: Reaproveitar o cache Parquet de uploads (utils.cache_arquivos)
+        ao_concluir: Função opcional chamada com (concluidos, total, resumo) a cada arquivo
+
+    Returns:
+        DataFrame do resumo consolidado, na ordem dos arquivos
+    """
+    os.makedirs(diretorio_saida, exist_ok=True)
+    empresas = nomes_empresas(caminhos)
+    processos = processos or os.cpu_count() or 1
+
+    resumos = [None] * len(caminhos)
+    concluidos = 0
+
+    def registrar(i, resumo):
+        nonlocal concluidos
+        resumos[i] = resumo
+        concluidos += 1
+        if ao_concluir:
+            ao_concluir(concluidos, len(caminhos), resumo)
+
+    def resumo_erro(i, erro):
+        # Falha inesperada em um arquivo não interrompe o restante do lote
+        return {
+            "Empresa": empresas[i],
+            "Arquivo": os.path.basename(caminhos[i]),
+            "Status": f"Erro: {str(erro)}"
+        }
+
+    if processos == 1 or len(caminhos) <= 1:
+        for i, (caminho, empresa) in enumerate(zip(caminhos, empresas)):
+            try:
+                resumo = pontuar_arquivo(caminho, empresa, diretorio_saida, formato, usar_cache)
+            except Exception as e:
+                resumo = resumo_erro(i, e)
+            registrar(i, resumo)
+    else:
+        # "spawn", como em utils.pacote e utils.combinacao: fork copiaria as threads do
+        # processo (pré-cálculo, conexões SQLite) quando o lote é chamado a partir do app
+        contexto = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(processos, len(caminhos)), mp_context=contexto) as executor:
+            futuros = {
+                executor.submit(pontuar_arquivo, caminho, empresa, diretorio_saida, formato, usar_cache): i
+                for i, (caminho, empresa) in enumerate(zip(caminhos, empresas))
+            }
+            for futuro in as_completed(futuros):
+                i = futuros[futuro]
+                try:
+                    resumo = futuro.result()
+                except Exception as e:
+                    resumo = resumo_erro(i, e)
+                registrar(i, resumo)
+
+    # Linhas com erro não têm métricas: manter a ordem fixa e a contagem como inteiro
+    df_resumo = pd.DataFrame(resumos)
+    df_resumo = df_resumo[[col for col in COLUNAS_RESUMO if col in df_resumo.columns]]
+    if "Respostas" in df_resumo.columns:
+        df_resumo["Respostas"] = df_resumo["Respostas"].astype("Int64")
+    gravar_tabela(df_resumo, os.path.join(diretorio_saida, "resumo_consolidado"), formato)
+    return df_resumo
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m utils.lote",
+        description="Pontua em lote os arquivos de respostas do HSE-IT de um diretório."
+    )
+    parser.add_argument("diretorio", help="Diretório com os arquivos .csv/.xlsx (um por empresa)")
+    parser.add_argument("--saida", default="resultados_lote", help="Diretório dos resultados (padrão: resultados_lote)")
+    parser.add_argument("--processos", type=int, default=None, help="Número de processos (padrão: número de CPUs)")
+    parser.add_argument("--formato", choices=["csv", "xlsx"], default="csv", help="Formato dos arquivos gerados")
+    parser.add_argument("--cache", action="store_true", help="Reaproveitar o cache Parquet de uploads")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.diretorio):
+        parser.error(f"Diretório não encontrado: {args.diretorio}")
+
+    caminhos = listar_arquivos(args.diretorio)
+    if not caminhos:
+        print(f"Nenhum arquivo {', '.join(EXTENSOES_ACEITAS)} encontrado em {args.diretorio}.")
+        return 1
+
+    def mostrar_progresso(concluidos, total, resumo):
+        print(f"[{concluidos}/{total}] {resumo['Arquivo']}: {resumo['Status']}", flush=True)
+
+    inicio = time.perf_counter()
+    df_resumo = processar_lote(
+        caminhos, args.saida, args.processos, args.formato, args.cache, mostrar_progresso
+    )
+
+    falhas = int((df_resumo["Status"] != "OK").sum())
+    print(
+        f"{len(caminhos) - falhas} de {len(caminhos)} arquivos pontuados em "
+        f"{time.perf_counter() - inicio:.1f} s. Resultados em {args.saida}"
+    )
+    return 1 if falhas else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+import io
+import os
+import re
+import zipfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from utils.relatorios import gerar_pdf, gerar_pdf_plano_acao
+from utils.instrumentacao import cronometrar
+
+# Pacote de relatórios por segmento.
+# Gera o PDF de resultados e o PDF do plano de ação de cada valor de uma coluna
+# demográfica (ex: um par de relatórios por Setor) em processos paralelos e grava
+# cada relatório em um único ZIP assim que fica pronto. Os resultados de todos os
+# segmentos vêm de uma única redução agrupada (calcular_resultados_segmentos ou o
+# pré-cálculo), então os processos recebem apenas tabelas pequenas e só renderizam.
+
+def nome_arquivo_seguro(texto):
+    """Texto utilizável como nome de arquivo (letras, números, '-' e '_')."""
+    return re.sub(r'[^\w\-]+', '_', str(texto)).strip('_') or "sem_nome"
+
+def nomes_segmentos(valores):
+    """Nome de diretório de cada segmento, com sufixo quando dois valores resultarem no mesmo nome."""
+    nomes = []
+    for valor in valores:
+        base = nome = nome_arquivo_seguro(valor)
+        sufixo = 2
+        while nome in nomes:
+            nome = f"{base}_{sufixo}"
+            sufixo += 1
+        nomes.append(nome)
+    return nomes
+
+def gerar_relatorios_segmento(coluna, valor, df_resultados, df_plano_acao=None, base=None):
+    """
+    Gera os relatórios de um segmento. Executada nos processos do pool.
+
+    Returns:
+        Lista de (nome do arquivo no ZIP, bytes do PDF)
+    """
+    subtitulo = f"{coluna}: {valor}"
+    base = base or nome_arquivo_seguro(valor)
+    arquivos = [(f"{base}/resultados_hse_it_{base}.pdf", gerar_pdf(df_resultados, subtitulo).getvalue())]
+    if df_plano_acao is not None:
+        arquivos.append((f"{base}/plano_acao_hse_it_{base}.pdf", gerar_pdf_plano_acao(df_plano_acao, subtitulo).getvalue()))
+    return arquivos
+
+def separar_segmentos(df_segmentos, coluna, gerar_plano=None):
+    """
+    Separa os resultados por segmento (saída de calcular_resultados_segmentos) em uma
+    tabela de resultados por valor da coluna, no formato de calcular_resultados.
+
+    Args:
+        gerar_plano: Função opcional df_resultados -> plano de ação (ex:
+                     utils.processamento.gerar_sugestoes_acoes), executada aqui
+
+    Returns:
+        Lista de (valor, df_resultados, df_plano_acao ou None), na ordem dos valores
+    """
+    segmentos = []
+    for valor, df_valor in df_segmentos.groupby(coluna, sort=False, observed=True):
+        df_resultados = df_valor.drop(columns=[coluna]).reset_index(drop=True)
+        df_plano = gerar_plano(df_resultados) if gerar_plano else None
+        segmentos.append((valor, df_resultados, df_plano))
+    return segmentos
+
+@cronometrar("gerar_pacote_segmentos")
+def gerar_pacote_segmentos(df_segmentos, coluna, gerar_plano=None, processos=None, ao_concluir=None):
+    """
+    Gera o ZIP com os relatórios de todos os segmentos de uma coluna.
+
+    Args:
+        df_segmentos: Resultados por segmento (calcular_resultados_segmentos)
+        coluna: Coluna demográfica dos segmentos
+        gerar_plano: Função df_resultados -> plano de ação; sem ela só os PDFs de
+                     resultados são gerados
+        processos: Número de processos; padrão é o número de CPUs. Com 1, tudo roda
+                   no processo atual
+        ao_concluir: Função opcional chamada com (concluidos, total, valor) a cada segmento
+
+    Returns:
+        Tupla (BytesIO com o ZIP, lista de (valor, mensagem) dos segmentos que falharam)
+    """
+    segmentos = separar_segmentos(df_segmentos, coluna, gerar_plano)
+    bases = nomes_segmentos([valor for valor, _, _ in segmentos])
+    processos = min(processos or os.cpu_count() or 1, max(len(segmentos), 1))
+
+    output = io.BytesIO()
+    erros = []
+    concluidos = 0
+
+    # Os PDFs já são comprimidos: gravados no ZIP sem nova compressão
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_STORED) as pacote:
+        def registrar(valor, arquivos=None, erro=None):
+            nonlocal concluidos
+            if erro is not None:
+                erros.append((valor, erro))
+            for nome, conteudo in arquivos or []:
+                pacote.writestr(nome, conteudo)
+            concluidos += 1
+            if ao_concluir:
+                ao_concluir(concluidos, len(segmentos), valor)
+
+        if processos == 1:
+            for (valor, df_resultados, df_plano), base in zip(segmentos, bases):
+                try:
+                    registrar(valor, gerar_relatorios_segmento(coluna, valor, df_resultados, df_plano, base))
+                except Exception as e:
+                    registrar(valor, erro=str(e))
+        else:
+            # "spawn": o servidor do Streamlit tem várias threads, e fork copiaria o processo inteiro
+            with ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context("spawn")) as executor:
+                futuros = {
+                    executor.submit(gerar_relatorios_segmento, coluna, valor, df_resultados, df_plano, base): valor
+                    for (valor, df_resultados, df_plano), base in zip(segmentos, bases)
+                }
+                for futuro in as_completed(futuros):
+                    valor = futuros[futuro]
+                    try:
+                        registrar(valor, futuro.result())
+                    except Exception as e:
+                        # Falha em um segmento não interrompe o restante do pacote
+                        registrar(valor, erro=str(e))
+
+        if erros:
+            pacote.writestr("erros.txt", "\n".join(f"{valor}: {erro}" for valor, erro in erros))
+
+    output.seek(0)
+    return output, erros
@@ -0,0 +1,295 @@
+import re
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from utils.constantes import (
+    QUESTOES_INVERTIDAS, DIMENSOES_HSE, DESCRICOES_DIMENSOES, LIMITES_RISCO, NIVEIS_RISCO, NIVEL_SEM_DADOS
+)
+
+# Motor de pontuação vetorizado do HSE-IT.
+# As respostas são convertidas uma única vez em uma matriz n × 35 (uma coluna por
+# questão canônica) e todas as médias por dimensão saem de uma redução matricial.
+
+NUM_QUESTOES = 35
+NOMES_DIMENSOES = list(DIMENSOES_HSE.keys())
+
+# Matriz de pertencimento questão × dimensão (35 × 7)
+MATRIZ_DIMENSOES = np.zeros((NUM_QUESTOES, len(NOMES_DIMENSOES)))
+for _j, _questoes in enumerate(DIMENSOES_HSE.values()):
+    MATRIZ_DIMENSOES[np.asarray(_questoes) - 1, _j] = 1
+
+# Máscara das questões invertidas no espaço canônico (posição q-1)
+MASCARA_INVERTIDAS = np.zeros(NUM_QUESTOES, dtype=bool)
+MASCARA_INVERTIDAS[np.asarray(QUESTOES_INVERTIDAS) - 1] = True
+
+# Função auxiliar para extrair número da questão de forma robusta
+def extrair_numero_questao(coluna):
+    try:
+        coluna_str = str(coluna).strip()
+
+        # Padrão 1: "Número. Texto" (ex: "1. Pergunta")
+        if '.' in coluna_str and coluna_str[0].isdigit():
+            return int(coluna_str.split('.')[0])
+
+        # Padrão 2: "Número - Texto" (ex: "1 - Pergunta")
+        elif '-' in coluna_str and coluna_str[0].isdigit():
+            return int(coluna_str.split('-')[0].strip())
+
+        # Padrão 3: "Número Texto" (ex: "1 Pergunta")
+        elif ' ' in coluna_str and coluna_str[0].isdigit():
+            return int(coluna_str.split(' ')[0])
+
+        # Padrão 4: Apenas os dígitos iniciais (ex: "1Pergunta")
+        elif coluna_str[0].isdigit():
+            digits = ''
+            for char in coluna_str:
+                if char.isdigit():
+                    digits += char
+                else:
+                    break
+            if digits:
+                return int(digits)
+
+        # Padrão 5: "Questão Número" (ex: "Questão 1")
+        elif "questão" in coluna_str.lower() or "questao" in coluna_str.lower():
+            # Extrair números após "questão"
+            match = re.search(r'quest[ãa]o\s*(\d+)', coluna_str.lower())
+            if match:
+                return int(match.group(1))
+
+        # Se nenhum padrão for encontrado, retornar None
+        return None
+
+    except Exception as e:
+        print(f"Erro ao extrair número da questão '{coluna}': {str(e)}")
+        return None
+
+@lru_cache(maxsize=256)
+def _resolver_cabecalhos(cabecalhos):
+    numeros = tuple(extrair_numero_questao(col) for col in cabecalhos)
+
+    # Primeira coluna encontrada para cada questão canônica 1-35
+    indices = np.full(NUM_QUESTOES, -1, dtype=np.intp)
+    for i, numero in enumerate(numeros):
+        if numero is not None and 1 <= numero <= NUM_QUESTOES and indices[numero - 1] < 0:
+            indices[numero - 1] = i
+
+    presentes = indices >= 0
+    dimensoes = (presentes.astype(float) @ MATRIZ_DIMENSOES) > 0
+
+    # Resultado compartilhado entre chamadas: proteger contra alterações acidentais
+    for array in (indices, presentes, dimensoes):
+        array.setflags(write=False)
+
+    return {
+        "numeros": numeros,
+        "indices": indices,
+        "presentes": presentes,
+        "dimensoes_presentes": dimensoes
+    }
+
+def resolver_questoes(colunas_perguntas):
+    """
+    Mapeia os cabeçalhos das perguntas para as questões canônicas 1-35.
+    O resultado é guardado em cache pela tupla de cabeçalhos, então arquivos com o
+    mesmo layout (ex: exportações do mesmo Google Forms) não são analisados de novo.
+
+    Returns:
+        Dicionário com "numeros" (número da questão de cada coluna ou None),
+        "indices" (posição da coluna de cada questão 1-35, -1 se ausente),
+        "presentes" (máscara das questões encontradas) e
+        "dimensoes_presentes" (máscara das dimensões com ao menos uma questão)
+    """
+    return _resolver_cabecalhos(tuple(str(col) for col in colunas_perguntas))
+
+def matriz_respostas(df_perguntas, colunas_perguntas):
+    """
+    Converte as respostas em uma matriz float n × 35, com as questões invertidas
+    já corrigidas (6 - x). Questões ausentes no arquivo ficam como colunas NaN.
+    """
+    colunas_perguntas = list(colunas_perguntas)
+    resolucao = resolver_questoes(colunas_perguntas)
+    indices, presentes = resolucao["indices"], resolucao["presentes"]
+
+    # Ler apenas as colunas mapeadas, já na ordem canônica
+    colunas_mapeadas = [colunas_perguntas[i] for i in indices[presentes]]
+    matriz = np.full((len(df_perguntas), NUM_QUESTOES), np.nan)
+    matriz[:, presentes] = df_perguntas[colunas_mapeadas].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    matriz[:, MASCARA_INVERTIDAS] = 6 - matriz[:, MASCARA_INVERTIDAS]
+    return matriz
+
+def somas_por_questao(matriz):
+    """Soma e contagem de respostas válidas por questão (vetores de tamanho 35)."""
+    validas = ~np.isnan(matriz)
+    somas = np.where(validas, matriz, 0.0).sum(axis=0)
+    contagens = validas.sum(axis=0)
+    return somas, contagens
+
+def medias_dimensoes(somas, contagens):
+    """
+    Reduz somas e contagens por questão às 7 dimensões.
+    Aceita vetores (35,) ou matrizes (grupos × 35). Dimensões sem respostas ficam NaN.
+    """
+    somas_dim = somas @ MATRIZ_DIMENSOES
+    contagens_dim = contagens @ MATRIZ_DIMENSOES
+    with np.errstate(invalid='ignore', divide='ignore'):
+        medias = somas_dim / contagens_dim
+    return medias, contagens_dim
+
+def dimensoes_presentes(colunas_perguntas):
+    """Indica quais dimensões têm pelo menos uma questão identificada no arquivo."""
+    return resolver_questoes(colunas_perguntas)["dimensoes_presentes"]
+
+def somas_por_grupo(matriz, codigos, num_grupos):
+    """
+    Soma e contagem de respostas válidas por questão para cada grupo, em uma única
+    redução agrupada sobre a matriz n × 35.
+
+    Args:
+        matriz: Matriz de respostas (n × 35) gerada por matriz_respostas
+        codigos: Código do grupo de cada respondente (0..num_grupos-1; -1 é ignorado)
+        num_grupos: Quantidade de grupos
+
+    Returns:
+        Tupla (somas, contagens, tamanhos) com matrizes grupos × 35 e o número de
+        respondentes de cada grupo
+    """
+    codigos = np.asarray(codigos)
+    mantidos = codigos >= 0
+    validas = ~np.isnan(matriz[mantidos])
+
+    # Índice linear grupo × questão para acumular tudo com um único bincount
+    indice = (codigos[mantidos, None] * NUM_QUESTOES + np.arange(NUM_QUESTOES)).ravel()
+    tamanho = num_grupos * NUM_QUESTOES
+
+    somas = np.bincount(
+        indice, weights=np.where(validas, matriz[mantidos], 0.0).ravel(), minlength=tamanho
+    ).reshape(num_grupos, NUM_QUESTOES)
+    contagens = np.bincount(
+        indice, weights=validas.ravel(), minlength=tamanho
+    ).reshape(num_grupos, NUM_QUESTOES)
+    tamanhos = np.bincount(codigos[mantidos], minlength=num_grupos)
+
+    return somas, contagens, tamanhos
+
+# Tabelas de consulta por código de risco; a última posição (código -1) é "sem dados"
+_NIVEIS_CONSULTA = NIVEIS_RISCO + [NIVEL_SEM_DADOS]
+_TABELAS_RISCO = {}
+for _campo in ("nome", "rotulo", "cor", "cor_hex", "cor_texto", "rgb", "prioridade"):
+    # Preenchido elemento a elemento para manter as tuplas RGB como valores únicos
+    _TABELAS_RISCO[_campo] = np.empty(len(_NIVEIS_CONSULTA), dtype=object)
+    _TABELAS_RISCO[_campo][:] = [nivel[_campo] for nivel in _NIVEIS_CONSULTA]
+
+def classificar_riscos(medias):
+    """
+    Classifica um conjunto de médias em níveis de risco de uma só vez.
+
+    Args:
+        medias: Sequência ou array de médias (None/NaN indicam ausência de dados)
+
+    Returns:
+        Dicionário com "codigos" (0 = Risco Muito Alto ... 4 = Risco Muito Baixo,
+        -1 = sem dados) e arrays com os campos de NIVEIS_RISCO para cada média
+        ("nome", "rotulo", "cor", "cor_hex", "cor_texto", "rgb", "prioridade")
+    """
+    # None vira NaN na conversão para float
+    medias = np.asarray(medias, dtype=np.float64).ravel()
+
+    codigos = np.searchsorted(LIMITES_RISCO, medias, side='left')
+    codigos[np.isnan(medias)] = -1
+
+    classificacao = {campo: tabela[codigos] for campo, tabela in _TABELAS_RISCO.items()}
+    classificacao["codigos"] = codigos
+    return classificacao
+
+# Função para montar a lista de resultados a partir das somas por questão
+def montar_resultados_dimensoes(somas, contagens, num_respostas, presentes):
+    """
+    Monta a lista de resultados por dimensão no formato usado pelas páginas.
+
+    Args:
+        somas, contagens: Vetores (35,) com soma e contagem de respostas válidas por questão
+        num_respostas: Número de respondentes considerados
+        presentes: Máscara das dimensões com ao menos uma questão no arquivo
+    """
+    medias, contagens_dim = medias_dimensoes(somas, contagens)
+    riscos = classificar_riscos(medias)["rotulo"]
+
+    resultados = []
+    for j, dimensao in enumerate(NOMES_DIMENSOES):
+        if not presentes[j]:
+            continue
+
+        numeros_questoes = DIMENSOES_HSE[dimensao]
+        if contagens_dim[j] > 0:
+            resultados.append({
+                "Dimensão": dimensao,
+                "Descrição": DESCRICOES_DIMENSOES[dimensao],
+                "Média": round(medias[j], 2),
+                "Risco": riscos[j],
+                "Número de Respostas": num_respostas,
+                "Questões": numeros_questoes
+            })
+        else:
+            # Adicionar um registro mesmo se não houver dados válidos
+            resultados.append({
+                "Dimensão": dimensao,
+                "Descrição": DESCRICOES_DIMENSOES[dimensao],
+                "Média": None,
+                "Risco": "Sem dados suficientes",
+                "Número de Respostas": 0,
+                "Questões": numeros_questoes
+            })
+
+    return resultados
+
+# Função para calcular os resultados por dimensão de um conjunto de respostas
+def calcular_resultados_gerais(df_perguntas, colunas_perguntas):
+    """
+    Calcula os resultados por dimensão de todas as respostas recebidas, sem cache.
+    É o cálculo por trás de calcular_resultados_dimensoes, usado também fora do Streamlit.
+    """
+    # Matriz n × 35 com as questões invertidas já corrigidas
+    matriz = matriz_respostas(df_perguntas, colunas_perguntas)
+    somas, contagens = somas_por_questao(matriz)
+
+    return montar_resultados_dimensoes(
+        somas, contagens, len(matriz), dimensoes_presentes(colunas_perguntas)
+    )
+
+# Função para calcular resultados de todos os grupos de uma coluna demográfica
+def calcular_resultados_segmentos(df, df_perguntas, colunas_perguntas, coluna, matriz=None):
+    """
+    Calcula os resultados por dimensão para cada valor de uma coluna demográfica
+    com uma única redução agrupada, em vez de filtrar o DataFrame grupo a grupo.
+
+    Args:
+        df: DataFrame completo (fonte da coluna demográfica)
+        df_perguntas: Respostas numéricas, alinhadas linha a linha com df
+        colunas_perguntas: Colunas das perguntas
+        coluna: Coluna demográfica usada para segmentar
+        matriz: Matriz de respostas já calculada (matriz_respostas), para reaproveitá-la
+                ao segmentar o mesmo conjunto por várias colunas
+
+    Returns:
+        DataFrame com uma linha por grupo × dimensão (mesmas colunas de
+        calcular_resultados_dimensoes, mais a coluna demográfica) ou None se não houver grupos
+    """
+    # Códigos na ordem de aparição; valores ausentes recebem -1 e são ignorados
+    codigos, valores = pd.factorize(df[coluna])
+    if len(valores) == 0:
+        return None
+
+    if matriz is None:
+        matriz = matriz_respostas(df_perguntas, colunas_perguntas)
+    somas, contagens, tamanhos = somas_por_grupo(matriz, codigos, len(valores))
+    presentes = dimensoes_presentes(colunas_perguntas)
+
+    resultados = []
+    for g, valor in enumerate(valores):
+        for res in montar_resultados_dimensoes(somas[g], contagens[g], tamanhos[g], presentes):
+            res[coluna] = valor
+            resultados.append(res)
+
+    return pd.DataFrame(resultados) if resultados else None
@@ -0,0 +1,111 @@
+import threading
+from collections import OrderedDict
+from utils.pontuacao import matriz_respostas, calcular_resultados_segmentos
+
+# Pré-cálculo em segundo plano dos resultados por segmento.
+# Logo após o upload, uma thread calcula os resultados de todos os valores de cada
+# coluna demográfica e publica cada coluna em um repositório compartilhado pelo
+# processo do servidor, indexado pela impressão digital do conjunto de dados. As
+# páginas consultam o repositório antes de calcular: quando o usuário chega à análise
+# demográfica ou aos relatórios, os resultados normalmente já estão prontos.
+
+# Número de conjuntos de dados mantidos no repositório (os usados há mais tempo saem primeiro)
+LIMITE_CONJUNTOS = 8
+
+_trava = threading.Lock()
+_repositorio = OrderedDict()
+
+def colunas_segmentaveis(conjunto):
+    """Colunas demográficas pré-calculadas (sem o carimbo de data/hora e sem perguntas)."""
+    return [
+        col for col in conjunto["colunas_filtro"]
+        if col != "Carimbo de data/hora" and col not in conjunto["colunas_perguntas"]
+    ]
+
+def _entrada(impressao):
+    # Chamada com a trava adquirida; marca a entrada como usada recentemente
+    entrada = _repositorio.get(impressao)
+    if entrada is not None:
+        _repositorio.move_to_end(impressao)
+    return entrada
+
+def _executar(conjunto, colunas):
+    impressao = conjunto["impressao"]
+
+    # A matriz de respostas é a mesma para todas as colunas: montada uma única vez
+    # (em caso de erro cada coluna tenta montá-la e é publicada mesmo sem resultado)
+    try:
+        matriz = matriz_respostas(conjunto["df_perguntas"], conjunto["colunas_perguntas"])
+    except Exception as e:
+        print(f"Erro ao montar a matriz de respostas para o pré-cálculo: {str(e)}")
+        matriz = None
+
+    for coluna in colunas:
+        try:
+            resultado = calcular_resultados_segmentos(
+                conjunto["df"], conjunto["df_perguntas"], conjunto["colunas_perguntas"], coluna, matriz
+            )
+        except Exception as e:
+            print(f"Erro ao pré-calcular resultados por {coluna}: {str(e)}")
+            resultado = None
+
+        with _trava:
+            entrada = _repositorio.get(impressao)
+            if entrada is None:
+                # Conjunto removido do repositório enquanto era calculado
+                return
+            entrada["segmentos"][coluna] = resultado
+            entrada["concluidas"] += 1
+
+def iniciar_precomputacao(conjunto):
+    """
+    Inicia o pré-cálculo dos segmentos do conjunto em uma thread, se ainda não tiver
+    sido iniciado para a mesma impressão digital. Retorna imediatamente.
+    """
+    impressao = conjunto["impressao"]
+    colunas = colunas_segmentaveis(conjunto)
+
+    with _trava:
+        if _entrada(impressao) is not None:
+            return
+
+        _repositorio[impressao] = {"segmentos": {}, "concluidas": 0, "total": len(colunas)}
+        while len(_repositorio) > LIMITE_CONJUNTOS:
+            _repositorio.popitem(last=False)
+
+    thread = threading.Thread(
+        target=_executar, args=(conjunto, colunas),
+        name=f"precomputacao-{impressao[:12]}", daemon=True
+    )
+    thread.start()
+
+def obter_segmentos(impressao, coluna):
+    """
+    Resultados pré-calculados de uma coluna.
+
+    Returns:
+        Tupla (pronto, resultado): pronto indica se a coluna já foi publicada; o
+        resultado pode ser None se a coluna não tiver valores
+    """
+    with _trava:
+        entrada = _entrada(impressao)
+        if entrada is None or coluna not in entrada["segmentos"]:
+            return False, None
+        return True, entrada["segmentos"][coluna]
+
+def segmentos_publicados(impressao):
+    """Dicionário {coluna: resultados} com todas as colunas já publicadas do conjunto."""
+    with _trava:
+        entrada = _entrada(impressao)
+        return dict(entrada["segmentos"]) if entrada is not None else {}
+
+def progresso_precomputacao(impressao):
+    """
+    Returns:
+        Tupla (concluidas, total) ou None se não houver pré-cálculo para o conjunto
+    """
+    with _trava:
+        entrada = _repositorio.get(impressao)
+        if entrada is None:
+            return None
+        return entrada["concluidas"], entrada["total"]
@@ -1,71 +1,214 @@
 import pandas as pd
+import uuid
 import streamlit as st
 from datetime import datetime
-from utils.constantes import QUESTOES_INVERTIDAS, DIMENSOES_HSE, DESCRICOES_DIMENSOES
+from utils.constantes import QUESTOES_INVERTIDAS, TAMANHO_MAXIMO_UPLOAD_MB
+from utils.pontuacao import (
+    resolver_questoes, classificar_riscos, montar_resultados_dimensoes,
+    calcular_resultados_gerais, calcular_resultados_segmentos
+)
+from utils.cubo import consultar_cubo
+from utils.cache_arquivos import hash_conteudo
+from utils.conjunto import criar_conjunto, filtros_do_predicado
+from utils.precomputacao import obter_segmentos, progresso_precomputacao
+from utils.registro import RegistroConjuntos
+from utils.instrumentacao import (
+    cronometrar, medir, consulta_cache, marcar_falha_cache, registrar_cache, iniciar_execucao, finalizar_execucao,
+    estatisticas, tamanho_mb, memoria_processo_mb, CAMINHO_LOG_INSTRUMENTACAO
+)
+
+# Execuções de página entre medições da memória da sessão (fora do painel dos administradores)
+AMOSTRA_MEMORIA_SESSAO = 20
 
 # Função para classificar os riscos com base na pontuação média
-@st.cache_data
 def classificar_risco(media):
-    if media <= 1:
-        return "Risco Muito Alto 🔴", "red"
-    elif media > 1 and media <= 2:
-        return "Risco Alto 🟠", "orange"
-    elif media > 2 and media <= 3:
-        return "Risco Moderado 🟡", "yellow"
-    elif media > 3 and media <= 4:
-        return "Risco Baixo 🟢", "green"
-    else:  # media > 4 (implícito no else)
-        return "Risco Muito Baixo 🟣", "purple"
+    """Classifica uma única média; para várias médias use classificar_riscos."""
+    classificacao = classificar_riscos([media])
+    return classificacao["rotulo"][0], classificacao["cor"][0]
 
 # Função para carregar e processar dados
-@st.cache_data
 def carregar_dados(uploaded_file):
-    # Determinar o tipo de arquivo e carregá-lo adequadamente
-    if uploaded_file.name.endswith('.csv'):
-        # Tentar detectar o separador (vírgula ou ponto-e-vírgula)
-        df = pd.read_csv(uploaded_file, sep=';' if ';' in uploaded_file.getvalue().decode('utf-8', errors='replace')[:1000] else ',')
-    else:
-        # Para arquivos Excel
-        try:
-            df = pd.read_excel(uploaded_file)
-        except Exception as e:
-            st.error(f"Erro ao carregar arquivo Excel: {str(e)}")
-            st.info("Certifique-se de que o arquivo está no formato .xlsx ou .xls correto.")
-            return None, None, None, None
-    
-    # Verificar se o DataFrame foi carregado corretamente
-    if df is None or len(df) == 0:
-        st.error("Não foi possível carregar dados do arquivo ou o arquivo está vazio.")
-        return None, None, None, None
-    
-    # Separar os dados de filtro e as perguntas
-    colunas_filtro = list(df.columns[:7])
-    if "Carimbo de data/hora" in colunas_filtro:
-        colunas_filtro.remove("Carimbo de data/hora")
-    
-    # Garantir que as colunas das perguntas são corretamente identificadas
-    colunas_perguntas = [col for col in df.columns if str(col).strip() and str(col).strip()[0].isdigit()]
+    """
+    Carrega o arquivo de respostas e monta o cubo de agregados.
+    O conteúdo é identificado pelo SHA-256 dos bytes: reenvios do mesmo arquivo
+    reaproveitam o cache Parquet em disco.
+
+    Returns:
+        Tupla (df, df_perguntas, colunas_filtro, colunas_perguntas, cubo) ou
+        cinco None em caso de erro
+    """
+    chave = hash_conteudo(uploaded_file)
+    return _carregar_dados_por_conteudo(chave, uploaded_file.name, uploaded_file)
+
+# Função para carregar o arquivo como conjunto de dados com impressão digital
+def carregar_conjunto(uploaded_file, ao_progredir=None):
+    """
+    Carrega o arquivo como em carregar_dados e devolve o conjunto de dados
+    (utils.conjunto), cuja impressão digital é o hash do conteúdo já calculado.
+    Se outra sessão já tiver carregado o mesmo arquivo, devolve o conjunto registrado,
+    sem ler o arquivo novamente.
+
+    Args:
+        ao_progredir: Função opcional chamada com (linhas lidas, total ou None) durante
+                      a leitura de planilhas .xlsx
+
+    Returns:
+        Dicionário do conjunto de dados ou None em caso de erro
+    """
+    chave = hash_conteudo(uploaded_file)
+    conjunto = registro_conjuntos().obter(chave)
+    registrar_cache("conjuntos", conjunto is not None)
+    if conjunto is not None:
+        return conjunto
     
-    # Verificar se foram encontradas colunas de perguntas
-    if len(colunas_perguntas) == 0:
-        st.error("Não foram encontradas colunas de perguntas no formato correto (começando com números).")
-        st.info("O arquivo deve conter perguntas do HSE-IT no formato '1. Pergunta...'")
-        return None, None, None, None
+    df, _, colunas_filtro, colunas_perguntas, cubo = _carregar_dados_por_conteudo(
+        chave, uploaded_file.name, uploaded_file, ao_progredir
+    )
+    if df is None:
+        return None
+    return criar_conjunto(chave, df, colunas_filtro, colunas_perguntas, cubo)
+
+# Função para carregar vários arquivos (ou ZIPs) como um único conjunto de dados
+def carregar_conjunto_arquivos(uploaded_files, ao_concluir=None):
+    """
+    Carrega vários arquivos de respostas, lidos em paralelo, como um único conjunto
+    de dados com a coluna do arquivo de origem (ver utils.combinacao). Se outra sessão
+    já tiver carregado os mesmos arquivos, devolve o conjunto registrado.
+
+    Args:
+        ao_concluir: Função opcional chamada com (concluidos, total, nome) a cada arquivo lido
+
+    Returns:
+        Tupla (conjunto ou None em caso de erro, lista de (nome, mensagem) dos arquivos
+        que não puderam ser lidos)
+    """
+    from utils.leitura import ErroCarregamento
+    from utils.combinacao import expandir_arquivos, impressao_arquivos, carregar_arquivos
+
+    try:
+        arquivos = expandir_arquivos(
+            [(arquivo.name, arquivo.getvalue()) for arquivo in uploaded_files], TAMANHO_MAXIMO_UPLOAD_MB
+        )
+        impressao, chaves = impressao_arquivos(arquivos)
+
+        conjunto = registro_conjuntos().obter(impressao)
+        registrar_cache("conjuntos", conjunto is not None)
+        if conjunto is not None:
+            return conjunto, st.session_state.get("erros_arquivos", {}).get(impressao, [])
+
+        with medir("carregar_dados"):
+            df, colunas_filtro, colunas_perguntas, cubo, _, erros = carregar_arquivos(
+                arquivos, chaves, ao_concluir=ao_concluir
+            )
+    except ErroCarregamento as e:
+        st.error(str(e))
+        if e.dica:
+            st.info(e.dica)
+        return None, []
+
+    # Os avisos dos arquivos ignorados continuam visíveis nas próximas execuções da página
+    st.session_state["erros_arquivos"] = {impressao: erros}
+    return criar_conjunto(impressao, df, colunas_filtro, colunas_perguntas, cubo), erros
+
+# Sem st.cache_data: cada chamada devolveria uma cópia própria dos DataFrames; os
+# dados em memória são compartilhados pelo registro de conjuntos
+@cronometrar("carregar_dados")
+def _carregar_dados_por_conteudo(chave, nome_arquivo, uploaded_file, ao_progredir=None):
+    from utils.leitura import carregar_arquivo, ErroCarregamento
+
+    try:
+        df, colunas_filtro, colunas_perguntas, cubo = carregar_arquivo(
+            uploaded_file, nome_arquivo, chave, ao_progredir
+        )
+    except ErroCarregamento as e:
+        st.error(str(e))
+        if e.dica:
+            st.info(e.dica)
+        return None, None, None, None, None
     
-    # Converter valores para numéricos, tratando erros
+    # Respostas já convertidas para tipos numéricos compactos durante a leitura; valores
+    # ausentes e fora da faixa são avaliados pelo relatório de qualidade do conjunto
     df_perguntas = df[colunas_perguntas]
-    for col in df_perguntas.columns:
-        df_perguntas[col] = pd.to_numeric(df_perguntas[col], errors='coerce')
-    
-    # Verificar se há muitos valores ausentes
-    valores_ausentes = df_perguntas.isna().sum().sum()
-    total_valores = df_perguntas.size
-    percentual_ausente = (valores_ausentes / total_valores) * 100
-    
-    if percentual_ausente > 30:  # Se mais de 30% dos dados estão ausentes
-        st.warning(f"Atenção: {percentual_ausente:.1f}% dos valores das respostas estão ausentes. Isso pode afetar a qualidade dos resultados.")
     
-    return df, df_perguntas, colunas_filtro, colunas_perguntas
+    return df, df_perguntas, colunas_filtro, colunas_perguntas, cubo
+
+# Registro de conjuntos de dados compartilhado por todas as sessões do servidor
+@st.cache_resource
+def registro_conjuntos():
+    return RegistroConjuntos()
+
+# Função para guardar o conjunto de dados na sessão
+def registrar_conjunto_sessao(conjunto):
+    """
+    Guarda na sessão apenas uma alça para o conjunto do registro compartilhado. A
+    alça anterior da sessão, se houver, é substituída e sua referência liberada.
+
+    Returns:
+        O conjunto registrado (o de outra sessão, se o mesmo arquivo já estava registrado)
+    """
+    alca = registro_conjuntos().registrar(conjunto)
+    st.session_state["alca_conjunto"] = alca
+    return alca.conjunto
+
+# Função para obter o conjunto de dados da sessão
+def conjunto_da_sessao():
+    """Conjunto de dados referenciado pela sessão, ou None se nenhum arquivo foi carregado."""
+    alca = st.session_state.get("alca_conjunto")
+    return alca.conjunto if alca is not None else None
+
+# Função para obter a empresa do usuário autenticado
+def empresa_da_sessao():
+    """Empresa do usuário autenticado, ou None se não houver usuário na sessão."""
+    return st.session_state.get("user_info", {}).get("empresa")
+
+# Função para guardar a análise da empresa no banco local
+def persistir_analise(conjunto, nome_arquivo, df_resultados):
+    """
+    Guarda a pesquisa e os resultados da empresa toda no banco (utils.banco) e
+    recupera o plano de ação já salvo para ela, se houver. Falhas do banco são apenas
+    registradas: a análise continua disponível na sessão.
+
+    Returns:
+        Tupla (id da pesquisa ou None, plano de ação salvo ou None)
+    """
+    from utils import banco
+
+    empresa = empresa_da_sessao()
+    if not empresa:
+        return None, None
+
+    try:
+        pesquisa_id = banco.salvar_pesquisa(empresa, conjunto, nome_arquivo)
+        banco.salvar_resultados(pesquisa_id, (), df_resultados)
+        return pesquisa_id, banco.obter_plano(pesquisa_id)
+    except Exception as e:
+        print(f"Erro ao salvar análise no banco: {str(e)}")
+        return None, None
+
+# Função para reabrir uma análise salva
+def reabrir_analise(pesquisa_id):
+    """
+    Reabre uma pesquisa salva da empresa da sessão com os resultados guardados (ou
+    recalculados, se não houver) e o plano de ação salvo.
+
+    Returns:
+        Tupla (conjunto, df_resultados, plano de ação salvo ou None), ou None se a
+        pesquisa não existir para a empresa
+    """
+    from utils import banco
+
+    empresa = empresa_da_sessao()
+    if not empresa:
+        return None
+
+    conjunto = banco.carregar_pesquisa(empresa, pesquisa_id)
+    if conjunto is None:
+        return None
+
+    df_resultados = banco.obter_resultados(pesquisa_id)
+    if df_resultados is None:
+        df_resultados = pd.DataFrame(calcular_resultados(conjunto))
+    return conjunto, df_resultados, banco.obter_plano(pesquisa_id)
 
 # Função para processar os dados (incluindo inversão de questões) - ATUALIZADA
 def processar_dados_hse(df_perguntas, colunas_perguntas):
@@ -76,53 +219,11 @@ def processar_dados_hse(df_perguntas, colunas_perguntas):
     # Copiar o dataframe para não modificar o original
     df_processado = df_perguntas.copy()
     
-    # Função auxiliar para extrair número da questão de forma robusta
-    def extrair_numero_questao(coluna):
-        try:
-            coluna_str = str(coluna).strip()
-            
-            # Padrão 1: "Número. Texto" (ex: "1. Pergunta")
-            if '.' in coluna_str and coluna_str[0].isdigit():
-                return int(coluna_str.split('.')[0])
-                
-            # Padrão 2: "Número - Texto" (ex: "1 - Pergunta")
-            elif '-' in coluna_str and coluna_str[0].isdigit():
-                return int(coluna_str.split('-')[0].strip())
-                
-            # Padrão 3: "Número Texto" (ex: "1 Pergunta")
-            elif ' ' in coluna_str and coluna_str[0].isdigit():
-                return int(coluna_str.split(' ')[0])
-                
-            # Padrão 4: Apenas os dígitos iniciais (ex: "1Pergunta")
-            elif coluna_str[0].isdigit():
-                digits = ''
-                for char in coluna_str:
-                    if char.isdigit():
-                        digits += char
-                    else:
-                        break
-                if digits:
-                    return int(digits)
-                    
-            # Padrão 5: "Questão Número" (ex: "Questão 1")
-            elif "questão" in coluna_str.lower() or "questao" in coluna_str.lower():
-                # Extrair números após "questão"
-                import re
-                match = re.search(r'quest[ãa]o\s*(\d+)', coluna_str.lower())
-                if match:
-                    return int(match.group(1))
-                    
-            # Se nenhum padrão for encontrado, retornar None
-            return None
-            
-        except Exception as e:
-            print(f"Erro ao extrair número da questão '{coluna}': {str(e)}")
-            return None
+    # Número de cada questão, resolvido uma vez por layout de cabeçalhos
+    numeros_questoes = resolver_questoes(colunas_perguntas)["numeros"]
     
     # Inverter a pontuação das questões invertidas
-    for col in colunas_perguntas:
-        numero_questao = extrair_numero_questao(col)
-        
+    for col, numero_questao in zip(colunas_perguntas, numeros_questoes):
         if numero_questao in QUESTOES_INVERTIDAS:
             # Verificar se a coluna contém valores numéricos
             if pd.api.types.is_numeric_dtype(df_processado[col]):
@@ -141,62 +242,163 @@ def processar_dados_hse(df_perguntas, colunas_perguntas):
     return df_processado
 
 # Função para calcular resultados por dimensão
-@st.cache_data
+@cronometrar("calcular_resultados_dimensoes")
 def calcular_resultados_dimensoes(df, df_perguntas_filtradas, colunas_perguntas):
-    # Processar dados (inverter questões necessárias)
-    df_processado = processar_dados_hse(df_perguntas_filtradas, colunas_perguntas)
-    
-    resultados = []
-    cores = []
-    
-    # Número total de respostas após filtragem
-    num_total_respostas = len(df_processado)
-    
-    # Calcular resultados para cada dimensão
-    for dimensao, numeros_questoes in DIMENSOES_HSE.items():
-        # Converter números de pergunta para índices de coluna
-        indices_validos = []
-        for q in numeros_questoes:
-            for col in colunas_perguntas:
-                # Melhorar a detecção de questões - considerar vários formatos
-                col_texto = str(col).strip()
-                if (col_texto.startswith(str(q) + ".") or 
-                    col_texto.startswith(str(q) + " ") or 
-                    col_texto.startswith(str(q) + "-")):
-                    indices_validos.append(col)
-                    break
-        
-        if indices_validos:
-            # Calcular média para esta dimensão
-            valores = df_processado[indices_validos].values.flatten()
-            valores = valores[~pd.isna(valores)]  # Remove NaN
-            
-            if len(valores) > 0:
-                media = valores.mean()
-                risco, cor = classificar_risco(media)
-                
-                resultados.append({
-                    "Dimensão": dimensao,
-                    "Descrição": DESCRICOES_DIMENSOES[dimensao],
-                    "Média": round(media, 2),
-                    "Risco": risco,
-                    "Número de Respostas": num_total_respostas,
-                    "Questões": numeros_questoes
-                })
-                cores.append(cor)
-            else:
-                # Adicionar um registro mesmo se não houver dados válidos
-                resultados.append({
-                    "Dimensão": dimensao,
-                    "Descrição": DESCRICOES_DIMENSOES[dimensao],
-                    "Média": None,
-                    "Risco": "Sem dados suficientes",
-                    "Número de Respostas": 0,
-                    "Questões": numeros_questoes
-                })
-                cores.append("gray")
-    
-    return resultados
+    """
+    Calcula os resultados por dimensão das respostas informadas, sem cache (o hash
+    dos DataFrames a cada chamada custava mais que o cálculo). Para resultados
+    reaproveitados entre chamadas, use calcular_resultados com o conjunto de dados.
+    """
+    return calcular_resultados_gerais(df_perguntas_filtradas, colunas_perguntas)
+
+# Função para calcular resultados de um conjunto de dados, com cache
+def calcular_resultados(conjunto, predicado=()):
+    """
+    Calcula os resultados por dimensão das respostas que atendem ao predicado.
+    O cache é indexado por (impressão do conjunto, predicado): consultas repetidas
+    não percorrem nem hasheiam os dados.
+
+    Args:
+        conjunto: Conjunto de dados (utils.conjunto.criar_conjunto)
+        predicado: Predicado de utils.conjunto.criar_predicado; () é a empresa toda
+
+    Returns:
+        Lista de resultados (vazia se nenhuma resposta atender ao predicado)
+    """
+    with consulta_cache("resultados"):
+        return _resultados_em_cache(conjunto["impressao"], predicado, conjunto)
+
+@st.cache_data(max_entries=256)
+def _resultados_em_cache(impressao, predicado, _conjunto):
+    marcar_falha_cache()
+    return calcular_resultados_cubo(_conjunto["cubo"], filtros_do_predicado(predicado))
+
+# Função para calcular resultados de todos os grupos de uma coluna, com cache
+def calcular_resultados_por_coluna(conjunto, coluna):
+    """
+    Resultados de cada valor de uma coluna demográfica (ver calcular_resultados_segmentos),
+    com cache indexado por (impressão do conjunto, coluna). Usa o resultado do
+    pré-cálculo em segundo plano quando a coluna já tiver sido publicada.
+    """
+    pronto, resultado = obter_segmentos(conjunto["impressao"], coluna)
+    if pronto:
+        registrar_cache("segmentos", True)
+        return resultado
+    with consulta_cache("segmentos"):
+        return _segmentos_em_cache(conjunto["impressao"], coluna, conjunto)
+
+@st.cache_data(max_entries=64)
+def _segmentos_em_cache(impressao, coluna, _conjunto):
+    marcar_falha_cache()
+    return calcular_resultados_segmentos(
+        _conjunto["df"], _conjunto["df_perguntas"], _conjunto["colunas_perguntas"], coluna
+    )
+
+# Função para exibir o andamento do pré-cálculo dos segmentos
+def mostrar_progresso_precomputacao(conjunto):
+    """
+    Exibe o andamento atual do pré-cálculo em segundo plano do conjunto, sem esperar
+    por ele: a página segue normalmente e a próxima execução mostra o novo estado
+    (nada é exibido se o cálculo já terminou).
+    """
+    progresso = progresso_precomputacao(conjunto["impressao"])
+    if progresso is None or progresso[0] >= progresso[1]:
+        return
+
+    concluidas, total = progresso
+    st.progress(
+        concluidas / total,
+        text=f"Preparando análises por característica demográfica em segundo plano ({concluidas} de {total})..."
+    )
+
+# Função para instrumentar a execução de uma página
+def instrumentar_pagina(pagina):
+    """
+    Inicia a medição da execução atual da página e grava no log o resumo da execução
+    anterior da sessão. Para administradores, exibe o painel de instrumentação na
+    barra lateral. Deve ser chamada no início de cada página.
+    """
+    id_sessao = st.session_state.setdefault("id_sessao_instrumentacao", uuid.uuid4().hex[:12])
+    administrador = st.session_state.get("user_info", {}).get("plano") == "admin"
+
+    anterior = st.session_state.pop("execucao_instrumentada", None)
+    if anterior is not None:
+        # Medir a sessão percorre todos os DataFrames guardados nela: só para o painel
+        # dos administradores e, nas demais sessões, a cada AMOSTRA_MEMORIA_SESSAO execuções
+        execucoes = st.session_state.get("execucoes_instrumentadas", 0) + 1
+        st.session_state["execucoes_instrumentadas"] = execucoes
+        memoria_sessao = None
+        if administrador or execucoes % AMOSTRA_MEMORIA_SESSAO == 0:
+            memoria_sessao = round(sum(
+                tamanho_mb(valor) for chave, valor in st.session_state.items()
+                if chave not in ("ultima_execucao_instrumentada", "id_sessao_instrumentacao")
+            ), 3)
+        st.session_state["ultima_execucao_instrumentada"] = finalizar_execucao(anterior, memoria_sessao)
+
+    st.session_state["execucao_instrumentada"] = iniciar_execucao(id_sessao, pagina)
+
+    if administrador:
+        mostrar_painel_instrumentacao()
+
+# Função para exibir o painel de instrumentação
+def mostrar_painel_instrumentacao():
+    """Painel na barra lateral com a última execução da sessão e os totais do processo."""
+    with st.sidebar.expander("🔧 Instrumentação", expanded=False):
+        ultima = st.session_state.get("ultima_execucao_instrumentada")
+        if ultima is not None:
+            st.markdown(f"**Última execução:** {ultima['pagina']} ({ultima['duracao_s']:.3f} s)")
+            if ultima["etapas"]:
+                st.dataframe(
+                    pd.DataFrame.from_dict(ultima["etapas"], orient="index").sort_values("total_s", ascending=False),
+                    use_container_width=True
+                )
+            if ultima["caches"]:
+                st.dataframe(pd.DataFrame.from_dict(ultima["caches"], orient="index"), use_container_width=True)
+            if ultima["memoria_sessao_mb"] is not None:
+                st.caption(f"Memória da sessão: {ultima['memoria_sessao_mb']:.2f} MB")
+
+        memoria_processo = memoria_processo_mb()
+        registro = registro_conjuntos().estatisticas()
+        st.markdown("**Processo**")
+        if memoria_processo is not None:
+            st.caption(f"Memória do processo: {memoria_processo:.0f} MB")
+        st.caption(
+            f"Conjuntos em memória: {registro['conjuntos']} ({registro['respostas']} respostas, "
+            f"{registro['referencias']} sessões)"
+        )
+
+        totais = estatisticas()
+        if totais["etapas"]:
+            st.dataframe(
+                pd.DataFrame.from_dict(totais["etapas"], orient="index")
+                [["chamadas", "total_s", "media_s", "max_s"]].sort_values("total_s", ascending=False),
+                use_container_width=True
+            )
+        if totais["caches"]:
+            st.dataframe(pd.DataFrame.from_dict(totais["caches"], orient="index"), use_container_width=True)
+        st.caption(f"Log: {CAMINHO_LOG_INSTRUMENTACAO}")
+
+# Função para calcular resultados a partir do cubo de agregados
+def calcular_resultados_cubo(cubo, filtros=None):
+    """
+    Calcula os resultados por dimensão para uma combinação de filtros usando apenas
+    o cubo de agregados montado no upload.
+
+    Args:
+        cubo: Cubo gerado por utils.cubo.construir_cubo
+        filtros: Dicionário {coluna: valor}; as condições são combinadas com E
+
+    Returns:
+        Lista de resultados no formato de calcular_resultados_dimensoes (vazia se
+        nenhuma resposta atender aos filtros)
+    """
+    agregado = consultar_cubo(cubo, filtros)
+    if agregado["tamanho"] == 0:
+        return []
+
+    return montar_resultados_dimensoes(
+        agregado["somas"], agregado["contagens"], agregado["tamanho"], cubo["presentes"]
+    )
 
 # Adicionar função gerar_sugestoes_acoes
 def gerar_sugestoes_acoes(df_resultados):
@@ -264,6 +466,45 @@ def gerar_sugestoes_acoes(df_resultados):
     df_plano_acao = pd.DataFrame(plano_acao)
     return df_plano_acao
 
+def plano_para_relatorio(df_plano):
+    """
+    Converte o plano de ação editado na página de Plano de Ação (uma linha por
+    dimensão, com as ações em lista) para o formato dos relatórios: uma linha por
+    ação, como em gerar_sugestoes_acoes. As ações sugeridas e as "Outras Soluções"
+    viram linhas próprias, com o responsável e o prazo da dimensão.
+    """
+    def texto(valor):
+        if valor is None or (not isinstance(valor, str) and pd.isna(valor)):
+            return ""
+        return str(valor).strip()
+
+    plano_acao = []
+    for _, row in df_plano.iterrows():
+        risco = texto(row.get("Nível de Risco"))
+        nivel_risco = " ".join(risco.split()[:2])  # Ex: "Risco Alto", sem o emoji
+
+        acoes = []
+        for coluna in ("Sugestões de Ações Mitigantes", "Outras Soluções"):
+            for linha in texto(row.get(coluna)).splitlines():
+                acao = linha.strip().lstrip("•-").strip()
+                if acao:
+                    acoes.append(acao)
+
+        for acao in acoes:
+            plano_acao.append({
+                "Dimensão": texto(row.get("Dimensão")),
+                "Nível de Risco": nivel_risco,
+                "Média": row.get("Média"),
+                "Sugestão de Ação": acao,
+                "Responsável": texto(row.get("Responsável")),
+                "Prazo": padronizar_formato_data(texto(row.get("Prazo"))) or texto(row.get("Prazo")),
+                "Status": "Não iniciada"
+            })
+
+    return pd.DataFrame(plano_acao, columns=[
+        "Dimensão", "Nível de Risco", "Média", "Sugestão de Ação", "Responsável", "Prazo", "Status"
+    ])
+
 # Função aprimorada para padronizar o formato de data
 def padronizar_formato_data(data_input):
     """
@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+
+# Perfil de qualidade das respostas, calculado uma única vez no upload.
+# As respostas são convertidas em uma matriz numérica e todas as contagens saem dela:
+# valores ausentes e fora da faixa por pergunta e por respondente, histograma dos
+# valores de cada pergunta, menor e maior valor, e respondentes que marcaram a mesma
+# resposta em todas as perguntas ("linha reta"; como o HSE-IT tem questões invertidas,
+# esse padrão indica respostas dadas sem ler as perguntas). O relatório resultante
+# alimenta as verificações da página de upload e a planilha de qualidade exportada.
+
+# Faixa de respostas válidas da escala Likert do HSE-IT
+FAIXA_RESPOSTAS = (1, 5)
+
+# Perguntas respondidas a partir das quais uma linha reta é sinalizada: com poucas
+# respostas, repetir o mesmo valor não diz muito sobre o respondente
+MINIMO_LINHA_RETA = 10
+
+def perfilar_respostas(df_perguntas, faixa=FAIXA_RESPOSTAS, minimo_linha_reta=MINIMO_LINHA_RETA):
+    """
+    Calcula o perfil de qualidade das respostas.
+
+    Args:
+        df_perguntas: DataFrame só com as colunas das perguntas, já convertidas para
+                      números (utils.leitura.converter_respostas)
+        faixa: Menor e maior resposta válida
+        minimo_linha_reta: Perguntas respondidas para sinalizar uma linha reta
+
+    Returns:
+        Dicionário do relatório de qualidade: totais ("respostas", "celulas",
+        "ausentes", "percentual_ausente", "fora_faixa", "minimo", "maximo",
+        "linha_reta", "sem_respostas"), "por_pergunta" (vetores "ausentes",
+        "fora_faixa" e a matriz "histograma", com uma coluna por valor da faixa) e
+        "por_respondente" (vetores "respondidas", "ausentes", "fora_faixa" e "linha_reta")
+    """
+    perguntas = list(df_perguntas.columns)
+    menor, maior = faixa
+    matriz = df_perguntas.to_numpy(dtype=np.float32, na_value=np.nan)
+    num_respostas, num_perguntas = matriz.shape
+
+    validas = ~np.isnan(matriz)
+    na_faixa = validas & (matriz >= menor) & (matriz <= maior)
+    fora_faixa = validas & ~na_faixa
+
+    # Histograma de todas as perguntas em uma única contagem: cada célula vira o código
+    # pergunta × (valores + 1) + (valor - menor), com um código extra por pergunta para
+    # as células ausentes ou fora da faixa; valores não inteiros são arredondados
+    num_valores = maior - menor + 1
+    codigos = np.where(na_faixa, np.rint(matriz) - menor, num_valores).astype(np.int64)
+    codigos += np.arange(num_perguntas) * (num_valores + 1)
+    histograma = np.bincount(codigos.ravel(), minlength=num_perguntas * (num_valores + 1))
+    histograma = histograma.reshape(num_perguntas, num_valores + 1)[:, :num_valores]
+
+    # Linha reta: a menor e a maior resposta dadas pelo respondente são iguais
+    # (fmin/fmax ignoram os valores ausentes; linhas sem resposta ficam NaN)
+    respondidas = validas.sum(axis=1)
+    menores = np.fmin.reduce(matriz, axis=1) if num_perguntas else np.full(num_respostas, np.nan)
+    maiores = np.fmax.reduce(matriz, axis=1) if num_perguntas else np.full(num_respostas, np.nan)
+    linha_reta = (respondidas >= minimo_linha_reta) & (menores == maiores)
+
+    ausentes_pergunta = num_respostas - validas.sum(axis=0)
+    total_ausentes = int(ausentes_pergunta.sum())
+    celulas = matriz.size
+    alguma = respondidas > 0
+
+    return {
+        "perguntas": perguntas,
+        "faixa": (menor, maior),
+        "respostas": num_respostas,
+        "celulas": celulas,
+        "ausentes": total_ausentes,
+        "percentual_ausente": total_ausentes / celulas * 100 if celulas else 0.0,
+        "fora_faixa": int(fora_faixa.sum()),
+        "minimo": float(menores[alguma].min()) if alguma.any() else None,
+        "maximo": float(maiores[alguma].max()) if alguma.any() else None,
+        "linha_reta": int(linha_reta.sum()),
+        "sem_respostas": int((~alguma).sum()),
+        "por_pergunta": {
+            "ausentes": ausentes_pergunta,
+            "fora_faixa": fora_faixa.sum(axis=0),
+            "histograma": histograma
+        },
+        "por_respondente": {
+            "respondidas": respondidas,
+            "ausentes": num_perguntas - respondidas,
+            "fora_faixa": fora_faixa.sum(axis=1),
+            "linha_reta": linha_reta
+        }
+    }
+
+def tabela_perguntas(relatorio):
+    """Uma linha por pergunta: respostas, ausentes, fora da faixa e contagem de cada valor."""
+    por_pergunta = relatorio["por_pergunta"]
+    menor, maior = relatorio["faixa"]
+    respostas = relatorio["respostas"]
+
+    tabela = pd.DataFrame({
+        "Pergunta": relatorio["perguntas"],
+        "Respostas": respostas - por_pergunta["ausentes"],
+        "Ausentes": por_pergunta["ausentes"],
+        "% Ausente": np.round(por_pergunta["ausentes"] / respostas * 100, 1) if respostas else 0.0,
+        "Fora da Faixa": por_pergunta["fora_faixa"]
+    })
+    for i, valor in enumerate(range(menor, maior + 1)):
+        tabela[str(valor)] = por_pergunta["histograma"][:, i]
+    return tabela
+
+def tabela_respondentes(relatorio, apenas_alertas=True):
+    """
+    Uma linha por respondente (posição no arquivo, a partir de 1): perguntas
+    respondidas, ausentes, fora da faixa e linha reta.
+
+    Args:
+        apenas_alertas: Manter só os respondentes com linha reta, valores fora da
+                        faixa ou nenhuma resposta
+    """
+    por_respondente = relatorio["por_respondente"]
+    tabela = pd.DataFrame({
+        "Respondente": np.arange(1, relatorio["respostas"] + 1),
+        "Respondidas": por_respondente["respondidas"],
+        "Ausentes": por_respondente["ausentes"],
+        "Fora da Faixa": por_respondente["fora_faixa"],
+        "Linha Reta": np.where(por_respondente["linha_reta"], "Sim", "Não")
+    })
+    if apenas_alertas:
+        alertas = (
+            por_respondente["linha_reta"] | (por_respondente["fora_faixa"] > 0)
+            | (por_respondente["respondidas"] == 0)
+        )
+        tabela = tabela[alertas].reset_index(drop=True)
+    return tabela
+
+def resumo_qualidade(relatorio):
+    """Totais do relatório como lista de (indicador, valor), para exibição e exportação."""
+    menor, maior = relatorio["faixa"]
+    return [
+        ("Respostas", relatorio["respostas"]),
+        ("Perguntas", len(relatorio["perguntas"])),
+        ("Valores ausentes", relatorio["ausentes"]),
+        ("% de valores ausentes", round(relatorio["percentual_ausente"], 1)),
+        (f"Valores fora da faixa ({menor}-{maior})", relatorio["fora_faixa"]),
+        ("Menor valor", relatorio["minimo"]),
+        ("Maior valor", relatorio["maximo"]),
+        ("Respondentes em linha reta", relatorio["linha_reta"]),
+        ("Respondentes sem nenhuma resposta", relatorio["sem_respostas"])
+    ]
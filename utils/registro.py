@@ -0,0 +1,72 @@
+import threading
+import weakref
+
+# Registro de conjuntos de dados compartilhado pelas sessões.
+# Cada conjunto (utils.conjunto) fica uma única vez na memória do processo,
+# indexado pela impressão digital do conteúdo; as sessões guardam apenas uma alça.
+# Sessões que enviam o mesmo arquivo recebem alças para o mesmo conjunto. Cada alça
+# conta como uma referência, liberada quando a alça é coletada (ao substituir o
+# conjunto da sessão ou quando a sessão expira); o conjunto sai do registro junto
+# com a última referência.
+
+class AlcaConjunto:
+    """Referência de uma sessão a um conjunto do registro."""
+
+    def __init__(self, registro, impressao):
+        self.impressao = impressao
+        self._registro = registro
+
+    @property
+    def conjunto(self):
+        """Conjunto de dados referenciado (None se tiver sido removido do registro)."""
+        return self._registro.obter(self.impressao)
+
+class RegistroConjuntos:
+    """Conjuntos de dados do processo, com contagem de referências por impressão digital."""
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._entradas = {}
+
+    def registrar(self, conjunto):
+        """
+        Registra o conjunto (ou reaproveita o já registrado com a mesma impressão) e
+        devolve uma nova alça para ele.
+        """
+        impressao = conjunto["impressao"]
+        with self._trava:
+            entrada = self._entradas.setdefault(impressao, {"conjunto": conjunto, "referencias": 0})
+            entrada["referencias"] += 1
+
+        alca = AlcaConjunto(self, impressao)
+        # O finalizador não guarda a alça: a referência é liberada quando ela é coletada
+        weakref.finalize(alca, self._liberar, impressao)
+        return alca
+
+    def obter(self, impressao):
+        """Conjunto registrado com a impressão, ou None."""
+        with self._trava:
+            entrada = self._entradas.get(impressao)
+            return entrada["conjunto"] if entrada is not None else None
+
+    def _liberar(self, impressao):
+        with self._trava:
+            entrada = self._entradas.get(impressao)
+            if entrada is None:
+                return
+            entrada["referencias"] -= 1
+            if entrada["referencias"] <= 0:
+                del self._entradas[impressao]
+
+    def estatisticas(self):
+        """
+        Returns:
+            Dicionário com o número de conjuntos, de referências e de respostas registradas
+        """
+        with self._trava:
+            entradas = list(self._entradas.values())
+        return {
+            "conjuntos": len(entradas),
+            "referencias": sum(entrada["referencias"] for entrada in entradas),
+            "respostas": sum(entrada["conjunto"]["num_respostas"] for entrada in entradas)
+        }
@@ -0,0 +1,628 @@
+import io
+from datetime import datetime
+from functools import lru_cache
+from xml.sax.saxutils import escape
+import pandas as pd
+import xlsxwriter
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import mm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, KeepTogether
+from utils.constantes import DIMENSOES_HSE, DESCRICOES_DIMENSOES, NIVEIS_RISCO, LIMITES_RISCO
+from utils.pontuacao import classificar_riscos, calcular_resultados_segmentos
+from utils.instrumentacao import cronometrar
+
+# Geração dos relatórios de download (Excel completo e PDFs), sem dependência do
+# Streamlit: recebem os dados explicitamente e levantam exceção em caso de erro,
+# para que possam ser usados pela página de relatórios, em lote e nos benchmarks.
+# Os PDFs são gerados com o ReportLab diretamente em memória, com fontes TrueType
+# embutidas para que os textos em português saiam com acentos.
+
+# Fontes TrueType dos PDFs, na ordem de preferência: (normal, negrito, itálico).
+# Caminhos relativos são procurados nas fontes que acompanham o ReportLab; se
+# nenhuma for encontrada é usada a Helvetica padrão (apenas caracteres Latin-1)
+FONTES_PDF = [
+    ("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+     "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+     "/usr/share/fonts/truetype/dejavu/DejaVuSans-Oblique.ttf"),
+    ("Vera.ttf", "VeraBd.ttf", "VeraIt.ttf")
+]
+
+@lru_cache(maxsize=None)
+def _fontes_pdf():
+    # Registra a primeira família disponível uma única vez por processo
+    for arquivos in FONTES_PDF:
+        nomes = ("RelatorioHSE", "RelatorioHSE-Negrito", "RelatorioHSE-Italico")
+        try:
+            fontes = [TTFont(nome, arquivo) for nome, arquivo in zip(nomes, arquivos)]
+        except Exception:
+            continue
+        for fonte in fontes:
+            pdfmetrics.registerFont(fonte)
+        glifos = frozenset(fontes[0].face.charToGlyph)
+        return nomes, glifos.__contains__
+
+    def latin1(codigo):
+        return codigo < 256
+    return ("Helvetica", "Helvetica-Bold", "Helvetica-Oblique"), latin1
+
+def _texto_pdf(texto, paragrafo=True):
+    """
+    Texto sem os caracteres que a fonte não desenha (ex: emojis dos rótulos de risco),
+    com o XML escapado quando for usado em um Paragraph.
+    """
+    if texto is None or (not isinstance(texto, str) and pd.isna(texto)):
+        return ""
+    _, suportado = _fontes_pdf()
+    texto = "".join(c for c in str(texto) if c.isspace() or suportado(ord(c))).strip()
+    return escape(texto) if paragrafo else texto
+
+def _estilos_pdf():
+    (normal, negrito, italico), _ = _fontes_pdf()
+    return {
+        "titulo": ParagraphStyle("titulo", fontName=negrito, fontSize=15, leading=19, alignment=TA_CENTER, spaceAfter=8 * mm),
+        "secao": ParagraphStyle("secao", fontName=negrito, fontSize=12, leading=15, spaceBefore=6 * mm, spaceAfter=2 * mm),
+        "subtitulo": ParagraphStyle("subtitulo", fontName=negrito, fontSize=11, leading=14, spaceBefore=3 * mm, spaceAfter=1 * mm),
+        "destaque": ParagraphStyle("destaque", fontName=italico, fontSize=10, leading=13, spaceAfter=2 * mm),
+        "texto": ParagraphStyle("texto", fontName=normal, fontSize=10, leading=13),
+        "item": ParagraphStyle("item", fontName=normal, fontSize=10, leading=13, leftIndent=5 * mm),
+        "celula": ParagraphStyle("celula", fontName=normal, fontSize=8, leading=10),
+        "celula_negrito": ParagraphStyle("celula_negrito", fontName=negrito, fontSize=8, leading=10)
+    }
+
+def _legenda_riscos(estilos):
+    linhas = [Paragraph("Legenda de Classificação de Riscos:", estilos["secao"])]
+    anterior = None
+    for nivel, limite in zip(NIVEIS_RISCO, LIMITES_RISCO + [None]):
+        if limite is None:
+            faixa = f"Média &gt; {anterior}"
+        elif anterior is None:
+            faixa = f"Média ≤ {limite}"
+        else:
+            faixa = f"{anterior} &lt; Média ≤ {limite}"
+        linhas.append(Paragraph(f"{nivel['nome']}: {faixa}", estilos["texto"]))
+        anterior = limite
+    return linhas
+
+def _montar_pdf(elementos, titulo):
+    # Renderiza direto em memória, sem arquivo temporário
+    output = io.BytesIO()
+    documento = SimpleDocTemplate(
+        output, pagesize=A4, title=titulo, author="Escutaris",
+        leftMargin=15 * mm, rightMargin=15 * mm, topMargin=15 * mm, bottomMargin=15 * mm
+    )
+    documento.build(elementos)
+    output.seek(0)
+    return output
+
+# Function to generate the Action Plan PDF
+@cronometrar("gerar_pdf_plano_acao")
+def gerar_pdf_plano_acao(df_plano_acao, subtitulo=None):
+    """
+    Gera o PDF do plano de ação, com as ações sugeridas por dimensão; o subtítulo
+    opcional identifica o recorte (ex: "Setor: Financeiro"). Returns: BytesIO.
+    """
+    estilos = _estilos_pdf()
+    elementos = [Paragraph("Plano de Ação - HSE-IT: Fatores Psicossociais", estilos["titulo"])]
+    if subtitulo:
+        elementos.append(Paragraph(_texto_pdf(subtitulo), estilos["subtitulo"]))
+    elementos.append(Paragraph(f"Data do relatório: {datetime.now().strftime('%d/%m/%Y')}", estilos["texto"]))
+    
+    # Group by dimension
+    for dimensao, df_dimensao in df_plano_acao.groupby("Dimensão", sort=False):
+        nivel_risco = df_dimensao["Nível de Risco"].iloc[0]
+        media = df_dimensao["Média"].iloc[0]
+        sugestoes = [_texto_pdf(sugestao) for sugestao in df_dimensao["Sugestão de Ação"]]
+        # Responsável e prazo preenchidos no plano editado; vazios no plano sugerido
+        responsaveis = [_texto_pdf(valor) for valor in df_dimensao.get("Responsável", [""] * len(sugestoes))]
+        prazos = [_texto_pdf(valor) for valor in df_dimensao.get("Prazo", [""] * len(sugestoes))]
+        
+        # Dimension title, risk information and suggested actions
+        elementos.append(KeepTogether([
+            Paragraph(_texto_pdf(dimensao), estilos["secao"]),
+            Paragraph(f"Média: {_texto_pdf(media)} - Nível de Risco: {_texto_pdf(nivel_risco)}", estilos["destaque"]),
+            Paragraph("Ações Sugeridas:", estilos["texto"])
+        ]))
+        elementos.extend(Paragraph(f"- {sugestao}", estilos["item"]) for sugestao in sugestoes)
+        
+        # Implementation table (long actions wrap inside the cell)
+        tabela = Table(
+            [[Paragraph(cabecalho, estilos["celula_negrito"]) for cabecalho in ("Ação", "Responsável", "Prazo")]]
+            + [
+                [Paragraph(sugestao, estilos["celula"]), Paragraph(responsavel, estilos["celula"]), Paragraph(prazo, estilos["celula"])]
+                for sugestao, responsavel, prazo in zip(sugestoes, responsaveis, prazos)
+            ],
+            colWidths=[100 * mm, 40 * mm, 40 * mm], repeatRows=1
+        )
+        tabela.setStyle(TableStyle([
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP')
+        ]))
+        elementos.extend([Spacer(0, 3 * mm), Paragraph("Implementação:", estilos["texto"]), Spacer(0, 1 * mm), tabela])
+    
+    # Add risk interpretation information
+    elementos.extend(_legenda_riscos(estilos))
+    
+    # Add observations about the action plan
+    elementos.extend([
+        Paragraph("Observações:", estilos["secao"]),
+        Paragraph(
+            "Este plano de ação foi gerado automaticamente com base nos resultados da avaliação HSE-IT. "
+            "As ações sugeridas devem ser analisadas e adaptadas ao contexto específico da organização. "
+            "Recomenda-se definir responsáveis, prazos e indicadores de monitoramento para cada ação implementada.",
+            estilos["texto"]
+        )
+    ])
+    
+    return _montar_pdf(elementos, "Plano de Ação - HSE-IT")
+
+# Function to generate results PDF report
+@cronometrar("gerar_pdf")
+def gerar_pdf(df_resultados, subtitulo=None):
+    """
+    Gera o PDF de resultados por dimensão; o subtítulo opcional identifica o recorte
+    (ex: "Setor: Financeiro"). Returns: BytesIO.
+    """
+    estilos = _estilos_pdf()
+    elementos = [Paragraph("Relatório de Fatores Psicossociais - HSE-IT", estilos["titulo"])]
+    if subtitulo:
+        elementos.append(Paragraph(_texto_pdf(subtitulo), estilos["subtitulo"]))
+    elementos += [
+        Paragraph(
+            "O questionário HSE-IT avalia 7 dimensões de fatores psicossociais no trabalho. "
+            "Os resultados são apresentados em uma escala de 1 a 5, onde valores mais altos indicam melhores resultados.",
+            estilos["destaque"]
+        ),
+        Spacer(0, 3 * mm)
+    ]
+    
+    # Results table, each row colored by its risk level (all dimensions classified at once)
+    riscos = classificar_riscos(df_resultados['Média'])
+    dados = [[Paragraph(cabecalho, estilos["subtitulo"]) for cabecalho in ("Dimensão", "Média", "Nível de Risco")]]
+    estilo_tabela = [
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+        ('ALIGN', (1, 1), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('FONTNAME', (0, 1), (-1, -1), estilos["texto"].fontName),
+        ('FONTSIZE', (0, 1), (-1, -1), 10)
+    ]
+    for i, (dimensao, media) in enumerate(zip(df_resultados['Dimensão'], df_resultados['Média']), 1):
+        # Dimensão sem respostas válidas no recorte (ex: um segmento pequeno) fica sem média
+        texto_media = "—" if media is None or pd.isna(media) else f"{media:.2f}"
+        dados.append([_texto_pdf(dimensao, paragrafo=False), texto_media, riscos["nome"][i - 1]])
+        estilo_tabela.append(('BACKGROUND', (0, i), (-1, i), colors.Color(*(c / 255 for c in riscos["rgb"][i - 1]))))
+        estilo_tabela.append(('TEXTCOLOR', (0, i), (-1, i), colors.white if riscos["cor_texto"][i - 1] == "white" else colors.black))
+    
+    tabela = Table(dados, colWidths=[80 * mm, 25 * mm, 60 * mm], repeatRows=1)
+    tabela.setStyle(TableStyle(estilo_tabela))
+    elementos.append(tabela)
+    
+    # Add dimension descriptions
+    elementos.append(Paragraph("Descrição das Dimensões:", estilos["secao"]))
+    for dimensao, descricao in DESCRICOES_DIMENSOES.items():
+        elementos.append(KeepTogether([
+            Paragraph(_texto_pdf(dimensao), estilos["subtitulo"]),
+            Paragraph(_texto_pdf(descricao), estilos["texto"])
+        ]))
+    
+    # Add risk classification information
+    elementos.extend(_legenda_riscos(estilos))
+    
+    # Add general recommendations
+    elementos.extend([
+        Paragraph("Recomendações Gerais:", estilos["secao"]),
+        Paragraph(
+            "Para resultados mais detalhados e um plano de ação personalizado, consulte o arquivo Excel completo "
+            "ou o documento do Plano de Ação fornecido. Priorize intervenções nas dimensões com maior nível de risco.",
+            estilos["texto"]
+        )
+    ])
+    
+    return _montar_pdf(elementos, "Relatório de Fatores Psicossociais - HSE-IT")
+
+# Cell values of a DataFrame, row by row, with NaN/NA as None (written as blank cells)
+def _linhas_planilha(df):
+    valores = df.astype(object).where(df.notna(), None)
+    return valores.to_numpy().tolist()
+
+# Writes a header row and the data rows of a DataFrame in row order (required by
+# xlsxwriter's constant_memory mode, which flushes each row once the next one starts)
+def _escrever_tabela(worksheet, df, formato_cabecalho, linha=0, indice=None):
+    cabecalho = list(df.columns)
+    linhas = _linhas_planilha(df)
+    if indice is not None:
+        cabecalho = [indice] + cabecalho
+        linhas = [[rotulo] + valores for rotulo, valores in zip(df.index.tolist(), linhas)]
+
+    worksheet.write_row(linha, 0, cabecalho, formato_cabecalho)
+    for i, valores in enumerate(linhas, linha + 1):
+        worksheet.write_row(i, 0, valores)
+    return linha + len(linhas)
+
+# One conditional format per risk level over a whole range of averages. The rules are
+# checked in order (highest risk first) and stop at the first match; blank cells
+# (segments without answers for a dimension) are left uncolored
+def _formatar_faixa_riscos(worksheet, primeira_linha, primeira_coluna, ultima_linha, ultima_coluna, risco_format):
+    faixa = (primeira_linha, primeira_coluna, ultima_linha, ultima_coluna)
+    worksheet.conditional_format(*faixa, {'type': 'blanks', 'stop_if_true': True})
+
+    for nivel, limite in zip(NIVEIS_RISCO, LIMITES_RISCO):
+        worksheet.conditional_format(*faixa, {
+            'type': 'cell', 'criteria': '<=', 'value': limite,
+            'format': risco_format[nivel["nome"]], 'stop_if_true': True
+        })
+    worksheet.conditional_format(*faixa, {
+        'type': 'cell', 'criteria': '>', 'value': LIMITES_RISCO[-1],
+        'format': risco_format[NIVEIS_RISCO[-1]["nome"]]
+    })
+
+# Function to generate Excel report with multiple sheets
+@cronometrar("gerar_excel_completo")
+def gerar_excel_completo(df, df_perguntas, colunas_filtro, colunas_perguntas,
+                         df_resultados, df_plano_acao, filtro_opcao="Empresa Toda", filtro_valor="Geral",
+                         segmentos=None, memoria_constante=False):
+    """
+    Gera o relatório Excel completo (resultados, plano de ação, análises por filtro,
+    gráfico e resumo executivo).
+
+    Args:
+        segmentos: Resultados por coluna já calculados ({coluna: DataFrame}, ex: do
+                   pré-cálculo em segundo plano); as colunas ausentes são calculadas aqui
+        memoria_constante: Usar o modo constant_memory do xlsxwriter, que grava cada
+                           linha assim que a seguinte é iniciada (memória limitada
+                           mesmo com muitos segmentos por coluna)
+
+    Returns:
+        BytesIO com o arquivo .xlsx
+    """
+    output = io.BytesIO()
+    
+    # Every sheet is written in row order, so the same code works in constant_memory mode
+    with xlsxwriter.Workbook(output, {'constant_memory': memoria_constante}) as workbook:
+        # Define formats
+        header_format = workbook.add_format({
+            'bold': True,
+            'text_wrap': True,
+            'valign': 'top',
+            'fg_color': '#D7E4BC',
+            'border': 1
+        })
+        bold_format = workbook.add_format({'bold': True})
+        
+        # Define risk formats
+        risco_format = {
+            nivel["nome"]: workbook.add_format({'bg_color': nivel["cor_hex"], 'font_color': nivel["cor_texto"]})
+            for nivel in NIVEIS_RISCO
+        }
+        
+        # Sheet 1: Overall company results
+        df_resultados_excel = df_resultados
+        if 'Questões' in df_resultados_excel.columns:
+            df_resultados_excel = df_resultados_excel.drop(columns=['Questões'])
+        
+        worksheet = workbook.add_worksheet('Empresa Toda')
+        
+        # Configure column widths
+        worksheet.set_column('A:A', 5)  # Index
+        worksheet.set_column('B:B', 25)  # Dimension
+        worksheet.set_column('C:C', 40)  # Description
+        worksheet.set_column('D:D', 10)  # Average
+        worksheet.set_column('E:E', 20)  # Risk
+        worksheet.set_column('F:F', 15)  # Number of Responses
+        
+        # Formatted headers and data
+        _escrever_tabela(worksheet, df_resultados_excel, header_format)
+        
+        # Add filters
+        worksheet.autofilter(0, 0, len(df_resultados_excel), len(df_resultados_excel.columns) - 1)
+        
+        # Freeze header row
+        worksheet.freeze_panes(1, 0)
+        
+        # Sheet 2: Action Plan
+        worksheet_plano = workbook.add_worksheet('Plano de Ação')
+
+        # Configure column widths
+        worksheet_plano.set_column('A:A', 25)  # Dimension
+        worksheet_plano.set_column('B:B', 15)  # Risk Level
+        worksheet_plano.set_column('C:C', 10)  # Average
+        worksheet_plano.set_column('D:D', 50)  # Action Suggestion
+        worksheet_plano.set_column('E:E', 15)  # Responsible
+        worksheet_plano.set_column('F:F', 15)  # Deadline
+        worksheet_plano.set_column('G:G', 15)  # Status
+
+        # Formatted headers and data
+        _escrever_tabela(worksheet_plano, df_plano_acao, header_format)
+
+        # Risk level colors: one rule per level for the whole column ("begins with" the
+        # level name matches the plain name and the label with emoji, and "Risco Alto"
+        # does not match "Risco Muito Alto")
+        if "Nível de Risco" in df_plano_acao.columns and len(df_plano_acao) > 0:
+            col_risco = df_plano_acao.columns.get_loc("Nível de Risco")
+            for nivel in NIVEIS_RISCO:
+                worksheet_plano.conditional_format(1, col_risco, len(df_plano_acao), col_risco, {
+                    'type': 'text', 'criteria': 'begins with', 'value': nivel["nome"],
+                    'format': risco_format[nivel["nome"]]
+                })
+
+        # Add data validation for Status column
+        status_options = ['Não iniciada', 'Em andamento', 'Concluída', 'Cancelada']
+        worksheet_plano.data_validation('G2:G1000', {'validate': 'list',
+                                     'source': status_options,
+                                     'input_title': 'Selecione o status:',
+                                     'input_message': 'Escolha um status da lista'})
+
+        # Add filters
+        worksheet_plano.autofilter(0, 0, len(df_plano_acao), len(df_plano_acao.columns) - 1)
+
+        # Freeze header row
+        worksheet_plano.freeze_panes(1, 0)
+        
+        # Sheet 3: Dimension Details (methodology explanation)
+        worksheet_detalhes = workbook.add_worksheet('Detalhes das Dimensões')
+        
+        # Configure column widths
+        worksheet_detalhes.set_column('A:A', 20)  # Dimension
+        worksheet_detalhes.set_column('B:B', 30)  # Questions
+        worksheet_detalhes.set_column('C:C', 50)  # Description
+        
+        # Headers and dimension data
+        worksheet_detalhes.write_row(0, 0, ["Dimensão", "Questões", "Descrição"],
+                                     workbook.add_format({'bold': True, 'bg_color': '#D7E4BC'}))
+        for row, (dimensao, questoes) in enumerate(DIMENSOES_HSE.items(), 1):
+            worksheet_detalhes.write_row(row, 0, [dimensao, str(questoes), DESCRICOES_DIMENSOES.get(dimensao, "")])
+        
+        # Add sheets for each filter type
+        for filtro in colunas_filtro:
+            if filtro != "Carimbo de data/hora":
+                # Create a summary sheet for this filter
+                sheet_name = f'Por {filtro}'
+                if len(sheet_name) > 31:  # Excel limits sheet names to 31 characters
+                    sheet_name = sheet_name[:31]
+                
+                # Calculate results for every value of this filter in a single pass
+                if segmentos and filtro in segmentos:
+                    df_resumo = segmentos[filtro]
+                else:
+                    df_resumo = calcular_resultados_segmentos(df, df_perguntas, colunas_perguntas, filtro)
+                
+                if df_resumo is not None:
+                    # Remove questions column for Excel output
+                    if 'Questões' in df_resumo.columns:
+                        df_resumo = df_resumo.drop(columns=['Questões'])
+                    
+                    # Pivot for better visualization
+                    if len(df_resumo) > 0:
+                        worksheet = workbook.add_worksheet(sheet_name)
+                        try:
+                            df_pivot = df_resumo.pivot(index='Dimensão', columns=filtro, values='Média')
+                        except Exception:
+                            # Fallback if pivot fails
+                            _escrever_tabela(worksheet, df_resumo, header_format)
+                            continue
+                        
+                        # Format as a pivot table: dimensions in the first column, one column per group
+                        worksheet.set_column(0, len(df_pivot.columns), 15)
+                        _escrever_tabela(worksheet, df_pivot, header_format, indice='Dimensão')
+                        
+                        # Risk colors for all data cells at once
+                        _formatar_faixa_riscos(worksheet, 1, 1, len(df_pivot), len(df_pivot.columns), risco_format)
+        
+        # Add sheet with chart of overall results
+        worksheet_grafico = workbook.add_worksheet('Gráfico de Riscos')
+        
+        # Add data for the chart
+        _escrever_tabela(worksheet_grafico, df_resultados[['Dimensão', 'Média', 'Risco']], None)
+        
+        # Create chart
+        chart = workbook.add_chart({'type': 'bar'})
+        
+        # Configure chart
+        chart.add_series({
+            'name': 'Média',
+            'categories': ['Gráfico de Riscos', 1, 0, len(df_resultados), 0],
+            'values': ['Gráfico de Riscos', 1, 1, len(df_resultados), 1],
+            'data_labels': {'value': True},
+            'fill': {'color': '#5A713D'}  # Escutaris color
+        })
+        
+        # Configure chart appearance
+        chart.set_title({'name': 'HSE-IT: Fatores Psicossociais - Avaliação de Riscos'})
+        chart.set_x_axis({'name': 'Dimensão'})
+        chart.set_legend({'position': 'bottom'})
+        chart.set_size({'width': 720, 'height': 576})
+        
+        # Add reference lines for risk levels
+        chart.set_y_axis({
+            'name': 'Média (1-5)',
+            'min': 0,
+            'max': 5,
+            'major_gridlines': {'visible': True},
+            'minor_gridlines': {'visible': False},
+            'major_unit': 1
+        })
+        
+        # Insert chart into worksheet
+        worksheet_grafico.insert_chart('E1', chart, {'x_scale': 1.5, 'y_scale': 1.5})
+        
+        # Add risk interpretation legend
+        worksheet_grafico.write('A20', 'Interpretação dos Riscos:', bold_format)
+        worksheet_grafico.write('A21', 'Média ≤ 1: Risco Muito Alto')
+        worksheet_grafico.write('A22', '1 < Média ≤ 2: Risco Alto')
+        worksheet_grafico.write('A23', '2 < Média ≤ 3: Risco Moderado')
+        worksheet_grafico.write('A24', '3 < Média ≤ 4: Risco Baixo')
+        worksheet_grafico.write('A25', 'Média > 4: Risco Muito Baixo')
+        
+        # Add an executive summary sheet
+        worksheet_resumo = workbook.add_worksheet('Resumo Executivo')
+        
+        # Title and introduction
+        worksheet_resumo.merge_range('A1:F1', 'RELATÓRIO EXECUTIVO - AVALIAÇÃO HSE-IT', 
+                                    workbook.add_format({
+                                        'bold': True, 
+                                        'font_size': 16, 
+                                        'align': 'center',
+                                        'valign': 'vcenter',
+                                        'bg_color': '#5A713D',
+                                        'font_color': 'white'
+                                    }))
+        
+        # Add date and filter info
+        date_format = workbook.add_format({'bold': True, 'align': 'right'})
+        worksheet_resumo.write('F3', f'Data: {datetime.now().strftime("%d/%m/%Y")}', date_format)
+        worksheet_resumo.write('F4', f'Filtro: {filtro_opcao} - {filtro_valor}', date_format)
+        
+        # Section header
+        section_format = workbook.add_format({
+            'bold': True, 
+            'bg_color': '#D7E4BC',
+            'border': 1,
+            'font_size': 12
+        })
+        
+        # Add key findings section
+        worksheet_resumo.merge_range('A6:F6', 'PRINCIPAIS DESCOBERTAS', section_format)
+        
+        # Calculate key metrics
+        media_geral = df_resultados["Média"].mean()
+        dimensao_mais_critica = df_resultados.loc[df_resultados["Média"].idxmin()]
+        dimensao_melhor = df_resultados.loc[df_resultados["Média"].idxmax()]
+        
+        # Add key metrics data
+        row = 7
+        worksheet_resumo.write(row, 0, 'Média Geral:', bold_format)
+        worksheet_resumo.write(row, 1, f"{media_geral:.2f}")
+        row += 1
+        
+        worksheet_resumo.write(row, 0, 'Dimensão Mais Crítica:', bold_format)
+        worksheet_resumo.write(row, 1, f"{dimensao_mais_critica['Dimensão']} ({dimensao_mais_critica['Média']:.2f})")
+        row += 1
+        
+        worksheet_resumo.write(row, 0, 'Dimensão Melhor Avaliada:', bold_format)
+        worksheet_resumo.write(row, 1, f"{dimensao_melhor['Dimensão']} ({dimensao_melhor['Média']:.2f})")
+        row += 2
+        
+        # Add all dimensions results
+        worksheet_resumo.merge_range(row, 0, row, 5, 'RESULTADOS POR DIMENSÃO', section_format)
+        row += 1
+        
+        # Headers for results table
+        worksheet_resumo.write_row(row, 0, ['Dimensão', 'Média', 'Nível de Risco', 'Prioridade de Ação'], header_format)
+        row += 1
+        
+        # Sort dimensions by priority (lowest average first)
+        df_sorted = df_resultados.sort_values(by="Média")
+        
+        # Risk level and action priority for all dimensions at once
+        riscos_ordenados = classificar_riscos(df_sorted["Média"])
+        
+        # Write dimension data
+        for i, (dimensao, media) in enumerate(zip(df_sorted["Dimensão"], df_sorted["Média"])):
+            nivel_risco = riscos_ordenados["nome"][i]
+            worksheet_resumo.write(row + i, 0, dimensao)
+            worksheet_resumo.write(row + i, 1, media)
+            
+            # Style the risk level cell based on risk
+            worksheet_resumo.write(row + i, 2, nivel_risco, risco_format.get(nivel_risco))
+            
+            # Set priority based on risk level
+            worksheet_resumo.write(row + i, 3, riscos_ordenados["prioridade"][i])
+        
+        row += len(df_sorted) + 1
+        
+        # Add recommendations section
+        worksheet_resumo.merge_range(row, 0, row, 5, 'RECOMENDAÇÕES', section_format)
+        row += 1
+        
+        # Add general recommendations
+        worksheet_resumo.merge_range(row, 0, row, 5, 'Com base nos resultados da avaliação HSE-IT, recomenda-se:')
+        row += 2
+        
+        # Add specific recommendations for high risk dimensions
+        high_risk_dims = df_sorted[df_sorted["Média"] <= 2]
+        if not high_risk_dims.empty:
+            for i, dim_name in enumerate(high_risk_dims["Dimensão"]):
+                worksheet_resumo.write(row + i, 0, f"{i+1}. Priorizar ações para a dimensão {dim_name}:")
+                
+                # Add a sample recommendation based on dimension
+                if df_plano_acao is not None:
+                    sample_actions = df_plano_acao[
+                        df_plano_acao["Dimensão"] == dim_name
+                    ]["Sugestão de Ação"].head(1).tolist()
+                    
+                    if sample_actions:
+                        worksheet_resumo.merge_range(row + i, 1, row + i, 5, sample_actions[0])
+        else:
+            worksheet_resumo.write(row, 0, "1. Manter as boas práticas atuais, com foco em melhorias contínuas.")
+            row += 1
+            worksheet_resumo.write(row, 0, "2. Revisar periodicamente os fatores psicossociais para garantir que permaneçam em níveis saudáveis.")
+    
+    output.seek(0)
+    return output
+
+# Quality workbook of an upload (utils.qualidade): summary, one row per question and the
+# respondents flagged for straight-lining, out-of-range values or no answers at all
+@cronometrar("gerar_planilha_qualidade")
+def gerar_planilha_qualidade(relatorio):
+    """
+    Gera a planilha de qualidade das respostas.
+
+    Args:
+        relatorio: Relatório de qualidade (utils.qualidade.perfilar_respostas)
+
+    Returns:
+        BytesIO com o arquivo .xlsx
+    """
+    from utils.qualidade import tabela_perguntas, tabela_respondentes, resumo_qualidade
+
+    output = io.BytesIO()
+    
+    with xlsxwriter.Workbook(output) as workbook:
+        header_format = workbook.add_format({
+            'bold': True,
+            'text_wrap': True,
+            'valign': 'top',
+            'fg_color': '#D7E4BC',
+            'border': 1
+        })
+        alerta_format = workbook.add_format({'bg_color': '#FFEB9C', 'font_color': '#9C5700'})
+        
+        # Sheet 1: Totals
+        worksheet_resumo = workbook.add_worksheet('Resumo')
+        worksheet_resumo.set_column('A:A', 40)
+        worksheet_resumo.set_column('B:B', 15)
+        worksheet_resumo.write_row(0, 0, ['Indicador', 'Valor'], header_format)
+        for row, (indicador, valor) in enumerate(resumo_qualidade(relatorio), 1):
+            worksheet_resumo.write_row(row, 0, [indicador, valor])
+        
+        # Sheet 2: One row per question, with the count of each answer value
+        df_perguntas = tabela_perguntas(relatorio)
+        worksheet_perguntas = workbook.add_worksheet('Por Pergunta')
+        worksheet_perguntas.set_column('A:A', 50)
+        worksheet_perguntas.set_column(1, len(df_perguntas.columns) - 1, 12)
+        _escrever_tabela(worksheet_perguntas, df_perguntas, header_format)
+        
+        # Highlight questions with missing or out-of-range answers
+        if len(df_perguntas) > 0:
+            for coluna in ('Ausentes', 'Fora da Faixa'):
+                col = df_perguntas.columns.get_loc(coluna)
+                worksheet_perguntas.conditional_format(1, col, len(df_perguntas), col, {
+                    'type': 'cell', 'criteria': '>', 'value': 0, 'format': alerta_format
+                })
+        worksheet_perguntas.autofilter(0, 0, len(df_perguntas), len(df_perguntas.columns) - 1)
+        worksheet_perguntas.freeze_panes(1, 1)
+        
+        # Sheet 3: Flagged respondents
+        df_respondentes = tabela_respondentes(relatorio)
+        worksheet_respondentes = workbook.add_worksheet('Respondentes com Alerta')
+        worksheet_respondentes.set_column(0, len(df_respondentes.columns) - 1, 15)
+        _escrever_tabela(worksheet_respondentes, df_respondentes, header_format)
+        worksheet_respondentes.autofilter(0, 0, len(df_respondentes), len(df_respondentes.columns) - 1)
+        worksheet_respondentes.freeze_panes(1, 0)
+    
+    output.seek(0)
+    return output